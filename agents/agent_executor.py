@@ -0,0 +1,54 @@
+import os
+import asyncio
+import logging
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI EXECUTOR AGEN ---
+# Setiap jenis agen punya pool thread sendiri agar satu layanan yang lambat
+# (misal Google Calendar) tidak menghabiskan worker untuk layanan lain.
+AGENT_POOL_SIZES = {
+    'calendar': int(os.getenv("AGENT_CALENDAR_WORKERS", "2")),
+    'papers': int(os.getenv("AGENT_PAPER_WORKERS", "4")),
+    'llm': int(os.getenv("AGENT_LLM_WORKERS", "4")),
+    'index': int(os.getenv("AGENT_INDEX_WORKERS", "2")),
+    'http': int(os.getenv("AGENT_HTTP_WORKERS", "8")),
+    'default': int(os.getenv("AGENT_DEFAULT_WORKERS", "4")),
+}
+
+
+class AgentExecutor:
+    """Pool thread terbatas per jenis agen untuk menjalankan fungsi sinkron tanpa memblokir event loop."""
+
+    def __init__(self, pool_sizes: dict = None):
+        self.pool_sizes = dict(pool_sizes or AGENT_POOL_SIZES)
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self, name: str) -> ThreadPoolExecutor:
+        with self._lock:
+            if name not in self._pools:
+                size = max(1, self.pool_sizes.get(name, self.pool_sizes.get('default', 4)))
+                self._pools[name] = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"agent-{name}")
+            return self._pools[name]
+
+    async def run(self, func, *args, pool: str = 'default', **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(pool), functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for executor in self._pools.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._pools.clear()
+
+
+agent_executor = AgentExecutor()
+
+
+async def run_blocking(func, *args, pool: str = 'default', **kwargs):
+    """Menjalankan func(*args, **kwargs) di pool agen `pool` dan menunggu hasilnya."""
+    return await agent_executor.run(func, *args, pool=pool, **kwargs)
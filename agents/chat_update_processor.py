@@ -0,0 +1,54 @@
+import os
+import asyncio
+import logging
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI PEMROSESAN UPDATE ---
+BOT_MAX_CONCURRENT_UPDATES = int(os.getenv("BOT_MAX_CONCURRENT_UPDATES", "64"))
+# Perintah yang boleh menyalip antrian chat-nya: hanya membaca status atau menghentikan
+# pekerjaan latar belakang, sehingga /batal tetap bekerja saat file sedang diproses.
+BYPASS_COMMANDS = {'batal', 'status'}
+
+
+def _command(update: Update):
+    text = update.message.text if update.message and update.message.text else ''
+    if not text.startswith('/'):
+        return None
+    return text[1:].split(maxsplit=1)[0].split('@', 1)[0].lower() if len(text) > 1 else None
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update dari chat yang berbeda diproses bersamaan, tetapi update dalam satu chat
+    diproses berurutan. State ConversationHandler tidak aman untuk update bersamaan:
+    dua pesan cepat dari satu pengguna bisa sama-sama dibaca pada state yang sama.
+    """
+
+    def __init__(self, max_concurrent_updates: int = BOT_MAX_CONCURRENT_UPDATES):
+        super().__init__(max_concurrent_updates)
+        self._locks = {}  # chat_id -> [asyncio.Lock, jumlah update yang memakainya]
+
+    async def do_process_update(self, update, coroutine) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None or _command(update) in BYPASS_COMMANDS:
+            await coroutine
+            return
+
+        entry = self._locks.setdefault(chat.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(chat.id, None)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
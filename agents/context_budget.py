@@ -0,0 +1,141 @@
+import os
+import re
+import math
+from agents.keyword_matcher import get_matcher
+from agents.sentence_index import normalize_words
+
+# --- KONFIGURASI ANGGARAN KONTEKS ---
+# Anggaran token per call site; bisa diganti lewat CONTEXT_BUDGET_<CALL_SITE>.
+DEFAULT_BUDGETS = {
+    'plan': 1000,
+    'quiz': 3000,
+    'summarize': 6000,
+}
+DEFAULT_BUDGET = 2000
+MAX_PASSAGE_TOKENS = 300
+
+_TOKEN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Baris daftar isi: "Bab 1 Pendahuluan ........ 12".
+_TOC_LINE = re.compile(r"(\.{4,}|…{2,})\s*\d+\s*$", re.MULTILINE)
+
+
+def budget_for(call_site: str) -> int:
+    override = os.getenv(f"CONTEXT_BUDGET_{call_site.upper()}")
+    if override is not None:
+        return int(override)
+    return DEFAULT_BUDGETS.get(call_site, DEFAULT_BUDGET)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Perkiraan jumlah token tanpa memanggil API: kata panjang dihitung sebagai
+    beberapa token (sekitar 4 karakter per token), tanda baca satu token.
+    """
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN.findall(text))
+
+
+def split_passages(text: str):
+    """Memecah teks menjadi paragraf [(awal, akhir)]; paragraf yang terlalu panjang dipecah per kalimat."""
+    passages = []
+    start = 0
+    for match in list(_PARAGRAPH_BREAK.finditer(text)) + [None]:
+        end = match.start() if match else len(text)
+        if text[start:end].strip():
+            if count_tokens(text[start:end]) <= MAX_PASSAGE_TOKENS:
+                passages.append((start, end))
+            else:
+                passages.extend(_split_long_passage(text, start, end))
+        start = match.end() if match else len(text)
+    return passages
+
+
+def _split_long_passage(text: str, start: int, end: int):
+    pieces, piece_start, tokens = [], start, 0
+    boundaries = [start + m.end() for m in _SENTENCE_BREAK.finditer(text, start, end)] + [end]
+    previous = start
+    for boundary in boundaries:
+        tokens += count_tokens(text[previous:boundary])
+        previous = boundary
+        if tokens >= MAX_PASSAGE_TOKENS or boundary == end:
+            pieces.append((piece_start, boundary))
+            piece_start, tokens = boundary, 0
+    return pieces
+
+
+def split_sentences(text: str) -> list:
+    """Kalimat-kalimat `text` (spasi/baris baru dirapikan), mengikuti batas paragraf lalu tanda akhir kalimat."""
+    sentences = []
+    for start, end in split_passages(text):
+        for sentence in _SENTENCE_BREAK.split(text[start:end]):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def score_passages(text: str, passages, language: str = 'en', query: str = None) -> list:
+    """
+    Skor informatif per passage: kata kunci penting dari leksikon (sama dengan
+    penilai kalimat sorotan), kecocokan dengan topik `query`, dan penalti untuk
+    bagian sampul/daftar isi/pengesahan.
+    """
+    categories = get_matcher(language).categorize(text, passages)
+    query_terms = {term for term in normalize_words(query or '') if len(term) > 2}
+    scores = []
+    for index, ((start, end), found) in enumerate(zip(passages, categories)):
+        passage = text[start:end]
+        words = normalize_words(passage)
+        score = 0.0
+        if 'high' in found:
+            score += 2
+        elif 'medium' in found:
+            score += 1
+        if 'boilerplate' in found:
+            score -= 3
+        if _TOC_LINE.search(passage):
+            score -= 3
+        if words:
+            # Passage yang sebagian besar angka/kata pendek biasanya tabel atau kop.
+            score += min(1.0, len([w for w in words if len(w) > 3 and not w.isdigit()]) / 40)
+            score += 1.5 * len(query_terms & set(words)) / max(len(query_terms), 1)
+        # Sedikit keunggulan untuk bagian awal (pendahuluan/abstrak) saat skor lain seimbang.
+        score += 0.3 * (1 - index / max(len(passages), 1))
+        scores.append(score)
+    return scores
+
+
+def fit_to_budget(text: str, max_tokens: int, language: str = 'en', query: str = None) -> str:
+    """
+    Mengembalikan `text` apa adanya jika muat dalam anggaran; jika tidak, memilih
+    passage paling informatif sampai anggaran habis dan menyusunnya kembali
+    sesuai urutan asli dokumen.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    passages = split_passages(text)
+    scores = score_passages(text, passages, language, query)
+    selected, used = [], 0
+    for index in sorted(range(len(passages)), key=lambda i: scores[i], reverse=True):
+        start, end = passages[index]
+        cost = count_tokens(text[start:end])
+        if used + cost > max_tokens:
+            continue
+        selected.append(index)
+        used += cost
+
+    parts, previous = [], None
+    for index in sorted(selected):
+        if previous is not None and index != previous + 1:
+            parts.append("[...]")
+        start, end = passages[index]
+        parts.append(text[start:end].strip())
+        previous = index
+    return "\n\n".join(parts)
+
+
+def build_context(text: str, call_site: str, language: str = 'en', query: str = None) -> str:
+    """Konteks dokumen untuk prompt di `call_site`, dipangkas ke anggaran token call site tersebut."""
+    return fit_to_budget(text, budget_for(call_site), language, query)
@@ -0,0 +1,293 @@
+import re
+import calendar
+from collections import namedtuple
+from datetime import datetime, date, time, timedelta
+
+# Hasil parsing: tanggal (date), jam (time atau None), dan span teks yang dikenali.
+ParsedDateTime = namedtuple('ParsedDateTime', ['date', 'time', 'spans'])
+
+WEEKDAYS = {
+    'senin': 0, 'selasa': 1, 'rabu': 2, 'kamis': 3, 'jumat': 4, "jum'at": 4, 'sabtu': 5, 'minggu': 6, 'ahad': 6,
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6,
+}
+MONTHS = {
+    'januari': 1, 'january': 1, 'jan': 1, 'februari': 2, 'february': 2, 'feb': 2, 'maret': 3, 'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4, 'mei': 5, 'may': 5, 'juni': 6, 'june': 6, 'jun': 6, 'juli': 7, 'july': 7, 'jul': 7,
+    'agustus': 8, 'august': 8, 'agu': 8, 'agt': 8, 'aug': 8, 'september': 9, 'sept': 9, 'sep': 9,
+    'oktober': 10, 'october': 10, 'okt': 10, 'oct': 10, 'november': 11, 'nov': 11,
+    'desember': 12, 'december': 12, 'des': 12, 'dec': 12,
+}
+NUMBER_WORDS = {
+    'satu': 1, 'se': 1, 'dua': 2, 'tiga': 3, 'empat': 4, 'lima': 5, 'enam': 6, 'tujuh': 7, 'delapan': 8,
+    'sembilan': 9, 'sepuluh': 10, 'one': 1, 'a': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10,
+}
+RELATIVE_DAYS = {
+    'hari ini': 0, 'today': 0, 'besok': 1, 'tomorrow': 1, 'lusa': 2, 'besok lusa': 2, 'day after tomorrow': 2,
+}
+# Jam bawaan jika hanya bagian hari yang disebut ("besok pagi").
+PART_OF_DAY_HOURS = {
+    'pagi': 8, 'morning': 8, 'siang': 12, 'noon': 12, 'sore': 16, 'afternoon': 15,
+    'malam': 19, 'evening': 19, 'night': 20, 'tonight': 19,
+}
+UNIT_DAYS = {'hari': 1, 'day': 1, 'days': 1, 'minggu': 7, 'pekan': 7, 'week': 7, 'weeks': 7}
+UNIT_MONTHS = {'bulan': 1, 'month': 1, 'months': 1}
+
+_WEEKDAY = "|".join(sorted((re.escape(name) for name in WEEKDAYS), key=len, reverse=True))
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+_NUMBER = r"\d+|" + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True))
+_PART = r"pagi|siang|sore|malam|morning|afternoon|evening|night|a\.?m\.?|p\.?m\.?"
+
+# Urutan penting: pola yang lebih spesifik diperiksa dulu dan span-nya tidak boleh dipakai ulang.
+DATE_PATTERNS = [
+    ('iso', re.compile(r"\b(?P<y>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})\b")),
+    ('numeric', re.compile(r"\b(?P<d>\d{1,2})(?P<sep>[/-])(?P<m>\d{1,2})(?:(?P=sep)(?P<y>\d{2}|\d{4}))?\b")),
+    ('day_month', re.compile(rf"\b(?:(?:tanggal|tgl\.?)\s*)?(?P<d>\d{{1,2}})\s+(?P<month>{_MONTH})\b\.?(?:\s+(?P<y>\d{{4}}))?", re.IGNORECASE)),
+    ('month_day', re.compile(rf"\b(?P<month>{_MONTH})\.?\s+(?P<d>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(?P<y>\d{{4}}))?", re.IGNORECASE)),
+    ('day_of_month', re.compile(r"\b(?:tanggal|tgl\.?)\s*(?P<d>\d{1,2})\b", re.IGNORECASE)),
+    ('tonight', re.compile(r"\b(?:nanti\s+malam|malam\s+ini|tonight)\b", re.IGNORECASE)),
+    ('relative', re.compile(r"\b(?P<rel>besok\s+lusa|day\s+after\s+tomorrow|hari\s+ini|today|besok|tomorrow|lusa)\b", re.IGNORECASE)),
+    ('offset', re.compile(
+        rf"\b(?:dalam\s+|in\s+)?(?P<n>{_NUMBER})\s*(?P<unit>hari|minggu|pekan|bulan|days?|weeks?|months?)\s+"
+        r"(?:lagi|ke\s*depan|from\s+now|mendatang)\b", re.IGNORECASE)),
+    ('offset_in', re.compile(rf"\b(?:dalam|in)\s+(?P<n>{_NUMBER})\s*(?P<unit>hari|minggu|pekan|bulan|days?|weeks?|months?)\b", re.IGNORECASE)),
+    ('next_weekday', re.compile(rf"\b(?P<mod>this|next)\s+(?P<wd>{_WEEKDAY})\b", re.IGNORECASE)),
+    ('next_period', re.compile(r"\b(?P<unit>minggu|pekan|bulan)\s+depan\b|\bnext\s+(?P<en_unit>week|month)\b", re.IGNORECASE)),
+    ('weekday', re.compile(rf"\b(?:hari\s+)?(?P<wd>{_WEEKDAY})\b(?:\s+(?P<mod>ini|depan))?", re.IGNORECASE)),
+]
+TIME_PATTERN = re.compile(
+    rf"(?:\b(?P<prefix>jam|pukul|pkl\.?|at)\s*)?\b(?P<h>\d{{1,2}})(?:[:.](?P<min>\d{{2}}))?(?:\s*(?P<part>{_PART}))?(?![\w/-])",
+    re.IGNORECASE,
+)
+_CLOCK_UNIT = r"jam|menit|hours?|minutes?|mins?"
+CLOCK_OFFSET_PATTERN = re.compile(
+    rf"\b(?:(?:dalam|in)\s+(?P<n>{_NUMBER})\s*(?P<unit>{_CLOCK_UNIT})"
+    rf"|(?P<n2>{_NUMBER})\s*(?P<unit2>{_CLOCK_UNIT})\s+(?:lagi|from\s+now|ke\s*depan))\b",
+    re.IGNORECASE,
+)
+PART_OF_DAY_PATTERN = re.compile(
+    r"\b(?:(?P<lead>nanti|this)\s+)?(?P<part>pagi|siang|sore|malam|morning|noon|afternoon|evening|night)\b", re.IGNORECASE
+)
+# Pemisah yang boleh ada antara ekspresi hari dan bagian hari ("besok pagi", "Jumat, sore").
+_PART_GAP = re.compile(r"[\s,]*")
+
+
+def _number(value: str) -> int:
+    value = value.lower()
+    return int(value) if value.isdigit() else NUMBER_WORDS[value]
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _overlaps(span, spans) -> bool:
+    return any(span[0] < end and span[1] > start for start, end in spans)
+
+
+def _upcoming(day: date, year: int, month: int, dom: int, explicit_year: bool):
+    """Tanggal tanpa tahun yang sudah lewat dianggap tahun depan."""
+    try:
+        candidate = date(year, month, dom)
+    except ValueError:
+        return None
+    if not explicit_year and candidate < day:
+        try:
+            candidate = date(year + 1, month, dom)
+        except ValueError:
+            return None
+    return candidate
+
+
+def _resolve_date(kind: str, match, today: date):
+    """Mengubah satu kecocokan pola tanggal menjadi (tanggal, weekday_polos)."""
+    groups = match.groupdict()
+    if kind in ('iso', 'numeric', 'day_month', 'month_day', 'day_of_month'):
+        year = groups.get('y')
+        month = MONTHS[groups['month'].lower()] if groups.get('month') else int(groups['m']) if groups.get('m') else today.month
+        dom = int(groups['d'])
+        if kind == 'day_of_month':
+            # "tanggal 5" yang sudah lewat bulan ini berarti tanggal 5 bulan depan.
+            candidate = _upcoming(today, today.year, month, dom, True)
+            if candidate is None or candidate < today:
+                next_month = _add_months(today.replace(day=1), 1)
+                candidate = _upcoming(today, next_month.year, next_month.month, dom, True)
+            return candidate, False
+        if year is not None:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+            return _upcoming(today, year, month, dom, True), False
+        return _upcoming(today, today.year, month, dom, False), False
+    if kind == 'tonight':
+        return today, False
+    if kind == 'relative':
+        return today + timedelta(days=RELATIVE_DAYS[re.sub(r"\s+", " ", groups['rel'].lower())]), False
+    if kind in ('offset', 'offset_in'):
+        amount, unit = _number(groups['n']), groups['unit'].lower()
+        if unit in UNIT_MONTHS:
+            return _add_months(today, amount), False
+        return today + timedelta(days=amount * UNIT_DAYS[unit]), False
+    if kind == 'next_period':
+        unit = (groups['unit'] or groups['en_unit']).lower()
+        if unit in ('bulan', 'month'):
+            return _add_months(today, 1), False
+        return today + timedelta(days=7), False
+
+    weekday = WEEKDAYS[groups['wd'].lower()]
+    modifier = (groups.get('mod') or '').lower()
+    if modifier in ('depan', 'next'):
+        # Hari tersebut di minggu kalender berikutnya (Senin-Minggu).
+        return today - timedelta(days=today.weekday()) + timedelta(days=7 + weekday), False
+    days_ahead = (weekday - today.weekday()) % 7
+    if modifier in ('ini', 'this'):
+        return today + timedelta(days=days_ahead), False
+    return today + timedelta(days=days_ahead), days_ahead == 0
+
+
+def _resolve_time(match):
+    """Mengubah kecocokan jam menjadi (time, tambahan_hari) atau None jika bukan jam."""
+    prefix, minute, part = match.group('prefix'), match.group('min'), (match.group('part') or '').lower().replace('.', '')
+    if not (prefix or minute or part):
+        return None  # angka polos (misal "tugas 2") bukan jam
+    hour, minute = int(match.group('h')), int(minute or 0)
+    if hour > 23 or minute > 59:
+        return None
+
+    extra_days = 0
+    if part in ('pm', 'siang', 'afternoon') and hour < 12:
+        hour = hour + 12 if part == 'pm' or hour < 11 else hour
+    elif part in ('sore', 'evening') and hour < 12:
+        hour += 12
+    elif part in ('malam', 'night'):
+        if hour == 12:
+            hour, extra_days = 0, 1
+        elif 5 <= hour < 12:
+            hour += 12
+    elif part == 'am' and hour == 12:
+        hour = 0
+    return time(hour, minute), extra_days
+
+
+def parse_datetime(text: str, now: datetime = None):
+    """
+    Mengurai ekspresi tanggal/jam bahasa Indonesia atau Inggris di dalam `text`
+    ("besok jam 5 sore", "Jumat ini 23:59", "minggu depan", "31 Agustus 2025 14.30").
+    Mengembalikan ParsedDateTime, atau None jika tidak ada tanggal maupun jam yang dikenali.
+    """
+    now = now or datetime.now()
+    today = now.date()
+
+    # "2 jam lagi" / "in 30 minutes": langsung relatif terhadap waktu sekarang.
+    match = CLOCK_OFFSET_PATTERN.search(text)
+    if match:
+        amount = _number(match.group('n') or match.group('n2'))
+        unit = (match.group('unit') or match.group('unit2')).lower()
+        delta = timedelta(hours=amount) if unit in ('jam', 'hour', 'hours') else timedelta(minutes=amount)
+        target = (now + delta).replace(second=0, microsecond=0)
+        return ParsedDateTime(target.date(), target.time(), [match.span()])
+
+    spans = []
+
+    resolved_date, bare_weekday, tonight = None, False, False
+    for kind, pattern in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            if _overlaps(match.span(), spans):
+                continue
+            candidate, bare = _resolve_date(kind, match, today)
+            if candidate is None:
+                continue
+            spans.append(match.span())
+            if resolved_date is None:
+                resolved_date, bare_weekday, tonight = candidate, bare, kind == 'tonight'
+
+    resolved_time, extra_days = None, 0
+    for match in TIME_PATTERN.finditer(text):
+        if _overlaps(match.span(), spans):
+            continue
+        result = _resolve_time(match)
+        if result:
+            resolved_time, extra_days = result
+            spans.append(match.span())
+            break
+    if resolved_time is None:
+        for match in PART_OF_DAY_PATTERN.finditer(text):
+            # Bagian hari polos hanya berarti jam jika menempel pada ekspresi hari ("besok pagi",
+            # "nanti sore"); di tempat lain ia bagian nama acara ("makan malam bersama keluarga").
+            anchored = match.group('lead') or any(
+                end <= match.start() and _PART_GAP.fullmatch(text, end, match.start()) for _, end in spans
+            )
+            if anchored and not _overlaps(match.span(), spans):
+                resolved_time = time(PART_OF_DAY_HOURS[match.group('part').lower()], 0)
+                spans.append(match.span())
+                break
+        if resolved_time is None and tonight:
+            resolved_time = time(PART_OF_DAY_HOURS['tonight'], 0)
+
+    if resolved_date is None and resolved_time is None:
+        return None
+    if resolved_date is None:
+        # Hanya jam: waktu terdekat yang belum lewat (hari ini atau besok).
+        resolved_date = today + timedelta(days=extra_days)
+        if datetime.combine(resolved_date, resolved_time) <= now:
+            resolved_date += timedelta(days=1)
+    else:
+        if bare_weekday and (resolved_time is None or datetime.combine(today, resolved_time) <= now):
+            # "Jumat" yang diucapkan pada hari Jumat berarti Jumat depan, kecuali jamnya masih akan datang.
+            resolved_date += timedelta(days=7)
+        resolved_date += timedelta(days=extra_days)
+    return ParsedDateTime(resolved_date, resolved_time, sorted(spans))
+
+
+def parse_time(text: str):
+    """Mengurai jawaban berisi jam saja ("jam 5 sore", "14:30", "9 pagi"). Mengembalikan time atau None."""
+    for match in TIME_PATTERN.finditer(text):
+        result = _resolve_time(match)
+        if result:
+            return result[0]
+    match = PART_OF_DAY_PATTERN.search(text)
+    if match:
+        return time(PART_OF_DAY_HOURS[match.group('part').lower()], 0)
+    return None
+
+
+def format_deadline(parsed: ParsedDateTime) -> str:
+    """Format yang dipakai kalender: 'YYYY-MM-DD HH:MM', atau 'YYYY-MM-DD' jika jam tidak disebut."""
+    if parsed.time is None:
+        return parsed.date.strftime("%Y-%m-%d")
+    return datetime.combine(parsed.date, parsed.time).strftime("%Y-%m-%d %H:%M")
+
+
+TITLE_NOISE = re.compile(
+    r"^(?:(?:tolong|ingatkan|ingetin|ingatin|reminder|remind|me|aku|saya|gue|gw|ada|untuk|tentang|soal)\b[\s,]*)+"
+    r"|(?:[\s,]+\b(?:pada|di|hari|tanggal|tgl|jam|pukul|on|at|by|sebelum|nanti|deadline(?=\s*$)))+\s*$",
+    re.IGNORECASE,
+)
+
+
+def extract_title(text: str, parsed: ParsedDateTime) -> str:
+    """Judul acara: teks tanpa ekspresi waktu dan kata pengantar ("ingatkan aku", "pada", "jam")."""
+    title, last = '', 0
+    for start, end in parsed.spans:
+        title += text[last:start] + ' '
+        last = end
+    title += text[last:]
+    title = re.sub(r"\s+", " ", title).strip(" ,.-")
+    previous = None
+    while previous != title:
+        previous, title = title, TITLE_NOISE.sub('', title).strip(" ,.-")
+    return title[:1].upper() + title[1:]
+
+
+def extract_reminder(text: str, now: datetime = None, require_time: bool = False):
+    """
+    Versi lokal dari ekstraksi reminder via AI: {"title", "deadline"}, atau None jika
+    tanggal/jam tidak dikenali (atau jam wajib tetapi tidak disebut).
+    """
+    parsed = parse_datetime(text, now)
+    if parsed is None or (require_time and parsed.time is None):
+        return None
+    title = extract_title(text, parsed)
+    if not title:
+        return None
+    return {"title": title, "deadline": format_deadline(parsed)}
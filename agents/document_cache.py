@@ -0,0 +1,106 @@
+import os
+import pickle
+import hashlib
+import logging
+import threading
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI CACHE ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CACHE_DIR = os.getenv("DOC_CACHE_DIR", os.path.join(PROJECT_ROOT, 'cache', 'documents'))
+MAX_CACHE_BYTES = int(os.getenv("DOC_CACHE_MAX_MB", "512")) * 1024 * 1024
+CACHE_SUFFIX = ".pkl"
+
+_eviction_lock = threading.Lock()
+
+
+def file_digest(file_path: str) -> str:
+    """Menghitung hash SHA-256 dari isi file (bukan namanya), dibaca per blok."""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}{CACHE_SUFFIX}")
+
+
+def get(key: str):
+    """
+    Mengambil record dari cache. Waktu akses file diperbarui agar
+    eviksi LRU tahu entri ini masih dipakai. Mengembalikan None jika tidak ada.
+    """
+    path = _entry_path(key)
+    try:
+        with open(path, 'rb') as f:
+            record = pickle.load(f)
+        os.utime(path, None)
+        return record
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # Entri rusak (misal proses mati saat menulis) dibuang saja.
+        logger.warning(f"Document Cache: Entri {key[:12]} rusak, dihapus - {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+
+def put(key: str, record: dict) -> None:
+    """Menyimpan record secara atomik lalu menjalankan eviksi jika cache melebihi batas."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _entry_path(key))
+    except Exception as e:
+        logger.error(f"Document Cache: Gagal menyimpan entri {key[:12]} - {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    evict()
+
+
+def update(key: str, **fields) -> dict:
+    """Menggabungkan field baru ke record yang sudah ada (atau membuat record baru)."""
+    record = get(key) or {}
+    record.update(fields)
+    put(key, record)
+    return record
+
+
+def evict(max_bytes: int = None) -> None:
+    """Menghapus entri yang paling lama tidak diakses sampai total ukuran di bawah batas."""
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+    with _eviction_lock:
+        try:
+            entries = []
+            for name in os.listdir(CACHE_DIR):
+                if not name.endswith(CACHE_SUFFIX):
+                    continue
+                path = os.path.join(CACHE_DIR, name)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except FileNotFoundError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        if total <= max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+            if total <= max_bytes:
+                break
+        logger.info(f"Document Cache: Eviksi selesai, ukuran cache sekarang {total / (1024 * 1024):.1f} MB")
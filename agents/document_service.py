@@ -0,0 +1,165 @@
+import os
+import asyncio
+import itertools
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from agents.gemini_client import gemini_client
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI LAYANAN ---
+DOC_WORKERS = int(os.getenv("DOC_WORKERS", str(os.cpu_count() or 2)))
+DOC_QUEUE_SIZE = int(os.getenv("DOC_QUEUE_SIZE", "10"))
+DOC_JOB_TIMEOUT = float(os.getenv("DOC_JOB_TIMEOUT", "600"))
+
+
+class QueueFullError(Exception):
+    """Dilempar saat antrian pemrosesan dokumen sudah penuh."""
+
+
+def _init_worker(gemini_relay=None):
+    """
+    Initializer proses worker: menyambungkan gemini_client ke relay proses bot
+    (agar batas laju Gemini tidak berlipat per worker) dan memuat model spaCy.
+    """
+    from agents import nlp_models
+    if gemini_relay:
+        gemini_client.connect_relay(*gemini_relay)
+    nlp_models.warm_up()
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+class DocumentProcessingService:
+    """
+    Menjalankan pekerjaan dokumen yang berat (spaCy, PyMuPDF) di ProcessPoolExecutor
+    dengan jumlah worker tetap dan antrian terbatas, sehingga tidak terhalang GIL
+    dan lonjakan unggahan tidak menumpuk tanpa batas.
+    """
+
+    def __init__(self, max_workers: int = DOC_WORKERS, max_queue: int = DOC_QUEUE_SIZE, job_timeout: float = DOC_JOB_TIMEOUT):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.job_timeout = job_timeout
+        self._executor = None
+        self._jobs = {}  # job_id -> (owner, concurrent future, asyncio future)
+        self._abandoned = set()  # job_id yang dibatalkan saat sudah berjalan di worker
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def pending_for(self, owner) -> int:
+        """Jumlah pekerjaan dokumen milik `owner` yang masih antri atau berjalan."""
+        return sum(1 for job_owner, _, _ in list(self._jobs.values()) if job_owner == owner)
+
+    def abandoned_for(self, owner) -> int:
+        """Pekerjaan `owner` yang sudah dibatalkan tetapi workernya belum selesai (slot masih terpakai)."""
+        return sum(1 for job_id, (job_owner, _, _) in list(self._jobs.items())
+                   if job_owner == owner and job_id in self._abandoned)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(f"Document Service: Menjalankan {self.max_workers} proses worker...")
+            # "spawn", bukan fork: proses bot sudah menjalankan thread (event loop Gemini, dll.)
+            # dan anak hasil fork mewarisi loop serta lock yang thread pemiliknya tidak ikut tersalin.
+            gemini_relay = gemini_client.start_relay() if gemini_client.available else None
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker, initargs=(gemini_relay,),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def start(self) -> None:
+        """
+        Menyalakan semua proses worker di thread latar belakang (dipanggil dari run_bot),
+        sehingga unggahan pertama tidak menanggung biaya spawn dan impor worker.
+        """
+        def warm():
+            with self._lock:
+                executor = self._get_executor()
+                # Satu pekerjaan kosong per worker: pool hanya membuat proses baru saat ada pekerjaan.
+                futures = [executor.submit(_worker_ready) for _ in range(self.max_workers)]
+            try:
+                pids = {future.result() for future in futures}
+                logger.info(f"Document Service: {len(pids)} proses worker siap.")
+            except Exception as e:
+                logger.error(f"Document Service: Gagal menyalakan worker - {e}")
+
+        threading.Thread(target=warm, name="document-service-warmup", daemon=True).start()
+
+    async def submit(self, func, *args, owner=None, timeout: float = None):
+        """
+        Menjalankan func(*args) di proses worker dan menunggu hasilnya.
+        Melempar QueueFullError jika antrian penuh, asyncio.TimeoutError jika melewati
+        batas waktu, dan asyncio.CancelledError jika dibatalkan lewat cancel().
+        """
+        with self._lock:
+            if len(self._jobs) >= self.capacity:
+                raise QueueFullError(f"Antrian penuh ({len(self._jobs)}/{self.capacity} pekerjaan).")
+            job_id = next(self._ids)
+            try:
+                future = self._get_executor().submit(func, *args)
+            except BrokenProcessPool:
+                # Worker mati (misal kehabisan memori); buat pool baru.
+                logger.error("Document Service: Process pool rusak, membuat ulang...")
+                self._executor = None
+                future = self._get_executor().submit(func, *args)
+            waiter = asyncio.wrap_future(future)
+            self._jobs[job_id] = (owner, future, waiter)
+
+        # Slot baru dilepas saat proses worker benar-benar selesai, bukan saat pemanggil berhenti menunggu.
+        future.add_done_callback(lambda _: self._release(job_id))
+        logger.info(f"Document Service: Pekerjaan #{job_id} masuk antrian ({self.pending}/{self.capacity}).")
+
+        try:
+            return await asyncio.wait_for(waiter, timeout or self.job_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Document Service: Pekerjaan #{job_id} melewati batas waktu.")
+            future.cancel()
+            raise
+        except BrokenProcessPool:
+            self._executor = None
+            raise
+
+    def _release(self, job_id) -> None:
+        self._jobs.pop(job_id, None)
+        self._abandoned.discard(job_id)
+
+    def cancel(self, owner) -> tuple:
+        """
+        Membatalkan semua pekerjaan milik `owner`. Pekerjaan yang masih antri dihentikan;
+        yang sudah berjalan tidak bisa dihentikan di tengah jalan, jadi hasilnya diabaikan
+        dan slotnya tetap terhitung sampai worker selesai.
+        Mengembalikan (jumlah dihentikan, jumlah ditinggalkan).
+        """
+        stopped, abandoned = 0, 0
+        for job_id, (job_owner, future, waiter) in list(self._jobs.items()):
+            if job_owner != owner or job_id in self._abandoned:
+                continue
+            if future.cancel():
+                stopped += 1
+            else:
+                self._abandoned.add(job_id)
+                abandoned += 1
+            waiter.cancel()
+        return stopped, abandoned
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+document_service = DocumentProcessingService()
@@ -0,0 +1,186 @@
+import re
+import copy
+import shutil
+import zipfile
+from lxml import etree
+from agents.sentence_index import SentenceIndex, normalize_token
+
+DOCUMENT_PART = 'word/document.xml'
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W = f'{{{W_NS}}}'
+HIGHLIGHT_COLOR = 'C80000'  # sama dengan RGBColor(200, 0, 0) versi lama
+
+# Urutan anak <w:rPr> menurut skema OOXML; Word menolak file jika urutannya salah.
+RPR_ORDER = [
+    'rStyle', 'rFonts', 'b', 'bCs', 'i', 'iCs', 'caps', 'smallCaps', 'strike', 'dstrike',
+    'outline', 'shadow', 'emboss', 'imprint', 'noProof', 'snapToGrid', 'vanish', 'webHidden',
+    'color', 'spacing', 'w', 'kern', 'position', 'sz', 'szCs', 'highlight', 'u', 'effect',
+    'bdr', 'shd', 'fitText', 'vertAlign', 'rtl', 'cs', 'em', 'lang', 'eastAsianLayout',
+    'specVanish', 'oMath', 'rPrChange',
+]
+_WORD = re.compile(r'\S+')
+_BODY_MARKER = b'<!--body-->'
+
+
+def _own_runs(paragraph):
+    """Run milik paragraf ini saja (bukan run di paragraf bersarang, misal kotak teks)."""
+    for run in paragraph.iter(f'{W}r'):
+        if next(run.iterancestors(f'{W}p'), None) is paragraph:
+            yield run
+
+
+def _run_text(run) -> str:
+    parts = []
+    for child in run.iter(f'{W}t', f'{W}tab', f'{W}br', f'{W}cr'):
+        if child.tag == f'{W}t':
+            parts.append(child.text or '')
+        elif child.tag == f'{W}tab':
+            parts.append('\t')
+        else:
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def iter_docx_paragraphs(docx_path):
+    """Generator teks per paragraf yang membaca word/document.xml secara streaming."""
+    with zipfile.ZipFile(docx_path) as package:
+        with package.open(DOCUMENT_PART) as stream:
+            for _, paragraph in etree.iterparse(stream, events=('end',), tag=f'{W}p', huge_tree=True):
+                yield ''.join(_run_text(run) for run in _own_runs(paragraph))
+                # Pola iterparse standar: kosongkan paragraf dan buang saudara sebelumnya
+                # yang sudah dibaca, agar pohon tidak tumbuh sebesar dokumen.
+                paragraph.clear()
+                while paragraph.getprevious() is not None:
+                    del paragraph.getparent()[0]
+
+
+def _set_rpr_child(rpr, name, **attributes):
+    """Menambah/mengganti elemen di <w:rPr> pada posisi yang sesuai skema."""
+    existing = rpr.find(f'{W}{name}')
+    if existing is not None:
+        rpr.remove(existing)
+    element = etree.Element(f'{W}{name}')
+    for key, value in attributes.items():
+        element.set(f'{W}{key}', value)
+
+    rank = RPR_ORDER.index(name)
+    for index, child in enumerate(rpr):
+        child_name = etree.QName(child).localname
+        if child_name in RPR_ORDER and RPR_ORDER.index(child_name) > rank:
+            rpr.insert(index, element)
+            return
+    rpr.append(element)
+
+
+def _emphasize_run(run):
+    rpr = run.find(f'{W}rPr')
+    if rpr is None:
+        rpr = etree.Element(f'{W}rPr')
+        run.insert(0, rpr)
+    _set_rpr_child(rpr, 'b')
+    _set_rpr_child(rpr, 'color', val=HIGHLIGHT_COLOR)
+
+
+def _highlight_paragraph(paragraph, sentence_index) -> int:
+    """Menandai run yang menutupi kalimat terpilih di satu paragraf. Mengembalikan jumlah kecocokan."""
+    runs, run_spans, text = [], [], ''
+    for run in _own_runs(paragraph):
+        run_text = _run_text(run)
+        runs.append(run)
+        run_spans.append((len(text), len(text) + len(run_text)))
+        text += run_text
+
+    tokens, token_spans = [], []
+    for match in _WORD.finditer(text):
+        token = normalize_token(match.group(0))
+        if token:
+            tokens.append(token)
+            token_spans.append(match.span())
+
+    matches = 0
+    for start, end, _ in sentence_index.find_all(tokens):
+        char_start, char_end = token_spans[start][0], token_spans[end - 1][1]
+        for run, (run_start, run_end) in zip(runs, run_spans):
+            if run_start < char_end and run_end > char_start:
+                _emphasize_run(run)
+        matches += 1
+    return matches
+
+
+def _document_shell(body):
+    """Bagian awal dan akhir document.xml di sekitar isi <w:body> (deklarasi, <w:document>, <w:body>)."""
+    root = body.getparent()
+    shell = etree.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap)
+    for sibling in root:
+        if sibling is body:
+            break
+        shell.append(copy.deepcopy(sibling))
+    etree.SubElement(shell, body.tag, attrib=dict(body.attrib)).append(etree.Comment('body'))
+    head, tail = etree.tostring(shell, xml_declaration=True, encoding='UTF-8', standalone=True).split(_BODY_MARKER)
+    return head, tail
+
+
+def _detach(element, root) -> bytes:
+    """
+    Melepas elemen dari pohon dan mengembalikan XML-nya. Elemen dipindah ke pembungkus
+    dengan namespace yang sama seperti <w:document>, sehingga deklarasi namespace tidak
+    diulang di setiap paragraf.
+    """
+    wrapper = etree.Element(root.tag, nsmap=root.nsmap)
+    wrapper.append(element)
+    xml = etree.tostring(wrapper, encoding='UTF-8')
+    return xml[xml.index(b'>') + 1:xml.rindex(b'</')]
+
+
+def _highlight_document_xml(stream, target, sentence_index) -> int:
+    """
+    Menandai word/document.xml sambil menulis hasilnya secara streaming. Setiap anak
+    <w:body> yang sudah selesai diproses ditulis ke `target` lalu dibuang dari pohon,
+    jadi yang tersimpan di memori hanya elemen tingkat atas yang sedang dibaca.
+    """
+    matches, root, body, tail = 0, None, None, b''
+    context = etree.iterparse(stream, events=('end',), tag=f'{W}p', huge_tree=True)
+    for _, paragraph in context:
+        matches += _highlight_paragraph(paragraph, sentence_index)
+        if body is None:
+            body = next(paragraph.iterancestors(f'{W}body'), None)
+            if body is None:
+                continue
+            root = body.getparent()
+            head, tail = _document_shell(body)
+            target.write(head)
+
+        top = paragraph
+        while top.getparent() is not body:
+            top = top.getparent()
+        # Saudara sebelum `top` sudah lengkap (parser sudah melewatinya).
+        while body[0] is not top:
+            target.write(_detach(body[0], root))
+
+    if body is None:
+        target.write(etree.tostring(context.root.getroottree(), xml_declaration=True, encoding='UTF-8', standalone=True))
+        return matches
+    while len(body):
+        target.write(_detach(body[0], root))
+    target.write(tail)
+    return matches
+
+
+def highlight_docx_package(docx_path, output_path, sentences) -> int:
+    """
+    Menyalin paket DOCX dan menandai (tebal + merah) run yang memuat kalimat terpilih.
+    Hanya word/document.xml yang diproses; bagian lain (gambar, style, header) disalin apa adanya.
+    Mengembalikan jumlah kalimat yang ditemukan.
+    """
+    sentence_index = SentenceIndex(sentences)
+    matches = 0
+
+    with zipfile.ZipFile(docx_path) as package_in, zipfile.ZipFile(output_path, 'w') as package_out:
+        for item in package_in.infolist():
+            with package_in.open(item) as source, package_out.open(item, 'w') as target:
+                if item.filename == DOCUMENT_PART:
+                    matches += _highlight_document_xml(source, target, sentence_index)
+                else:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+
+    return matches
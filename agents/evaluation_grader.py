@@ -0,0 +1,172 @@
+import os
+import re
+import json
+from agents.quiz_generator import score_essay_answers
+from agents.sentence_index import normalize_words
+
+# --- KONFIGURASI PENILAIAN EVALUASI ---
+# Skor esai 0-100 dikonversi ke poin 0 / 0.5 / 1 seperti rubrik sebelumnya.
+ESSAY_FULL_POINT_SCORE = int(os.getenv("ESSAY_FULL_POINT_SCORE", "70"))
+ESSAY_HALF_POINT_SCORE = int(os.getenv("ESSAY_HALF_POINT_SCORE", "40"))
+
+MULTIPLE_CHOICE = 'Pilihan Ganda'
+TRUE_FALSE = 'Benar/Salah'
+
+TRUE_WORDS = {'benar', 'betul', 'true', 'ya', 'iya', 'b', 't', 'yes'}
+FALSE_WORDS = {'salah', 'keliru', 'false', 'tidak', 's', 'f', 'no'}
+
+# "A. Opsi", "a) Opsi", "(A) Opsi", "A: Opsi" atau label saja "A".
+_OPTION_LABEL = re.compile(r"^\s*\(?([A-Za-z])(?:[.):]|\s*\)|\s*$)\s*(.*)$", re.DOTALL)
+
+
+def _split_option(text: str):
+    """('a', 'opsi 1') dari 'A. Opsi 1'; label None jika teks tidak diawali label opsi."""
+    match = _OPTION_LABEL.match(text or '')
+    if match:
+        return match.group(1).lower(), " ".join(normalize_words(match.group(2)))
+    return None, " ".join(normalize_words(text or ''))
+
+
+def _option_identity(text: str, options) -> set:
+    """Label dan isi opsi yang dimaksud `text`, dilengkapi dari daftar opsi soal."""
+    label, body = _split_option(text)
+    identity = set()
+    if label:
+        identity.add(('label', label))
+    if body:
+        identity.add(('body', body))
+    for option in options or []:
+        option_label, option_body = _split_option(option)
+        if (label and label == option_label) or (body and body == option_body):
+            if option_label:
+                identity.add(('label', option_label))
+            if option_body:
+                identity.add(('body', option_body))
+    return identity
+
+
+def is_correct_choice(answer: str, key: str, options=None) -> bool:
+    """Mencocokkan jawaban pilihan ganda dengan kunci, baik lewat label ('B') maupun isi opsinya."""
+    return bool(_option_identity(answer, options) & _option_identity(key, options))
+
+
+def normalize_true_false(text: str):
+    """True/False dari variasi 'Benar', 'betul', 'True', 'S', ...; None jika tidak dikenali."""
+    words = normalize_words(text or '')
+    if not words:
+        return None
+    if words[0] in TRUE_WORDS:
+        return True
+    if words[0] in FALSE_WORDS:
+        return False
+    return None
+
+
+def _essay_points(score: int) -> float:
+    if score >= ESSAY_FULL_POINT_SCORE:
+        return 1.0
+    if score >= ESSAY_HALF_POINT_SCORE:
+        return 0.5
+    return 0.0
+
+
+def level_for(percentage: float) -> str:
+    """Level pemahaman: > 80% Sangat Baik, 50-80% Cukup Baik, < 50% Perlu Belajar Lagi."""
+    if percentage > 80:
+        return "Sangat Baik"
+    if percentage >= 50:
+        return "Cukup Baik"
+    return "Perlu Belajar Lagi"
+
+
+def grade_evaluation(eval_data: dict, user_answers: list) -> dict:
+    """
+    Menilai satu sesi evaluasi. Pilihan Ganda dan Benar/Salah dinilai lokal dari
+    kunci jawaban; esai dinilai sekaligus lewat score_essay_answers.
+    """
+    items, essays = [], []
+    for index, question in enumerate(eval_data.get('quiz', [])):
+        answer = user_answers[index] if index < len(user_answers) else ''
+        item = {
+            'number': question.get('question_number', index + 1),
+            'type': question.get('type', ''),
+            'question': question.get('question', ''),
+            'answer': answer,
+            'correct_answer': question.get('answer', ''),
+            'points': 0.0,
+            'essay_score': None,
+        }
+        if item['type'] == MULTIPLE_CHOICE:
+            item['points'] = float(is_correct_choice(answer, item['correct_answer'], question.get('options')))
+        elif item['type'] == TRUE_FALSE:
+            expected = normalize_true_false(item['correct_answer'])
+            item['points'] = float(expected is not None and normalize_true_false(answer) == expected)
+        else:
+            essays.append(item)
+        items.append(item)
+
+    if essays:
+        scores = score_essay_answers([(item['correct_answer'], item['answer']) for item in essays])
+        for item, score in zip(essays, scores):
+            item['essay_score'] = score
+            item['points'] = _essay_points(score)
+
+    total = sum(item['points'] for item in items)
+    percentage = 100 * total / len(items) if items else 0.0
+    return {
+        'topic': eval_data.get('topic', ''),
+        'items': items,
+        'score': total,
+        'max_score': len(items),
+        'percentage': percentage,
+        'level': level_for(percentage),
+    }
+
+
+def _format_points(points: float) -> str:
+    return f"{points:g}"
+
+
+def format_breakdown(result: dict) -> str:
+    """Rincian skor per soal dalam Markdown, dihitung tanpa AI."""
+    lines = [f"📊 *Skor: {_format_points(result['score'])}/{result['max_score']}* ({result['percentage']:.0f}%) — {result['level']}", ""]
+    for item in result['items']:
+        mark = "✅" if item['points'] == 1 else ("➖" if item['points'] > 0 else "❌")
+        line = f"{mark} {item['number']}. {item['type']}"
+        if item['essay_score'] is not None:
+            line += f" (kemiripan {item['essay_score']}/100)"
+        elif item['points'] < 1:
+            line += f" — jawaban benar: {item['correct_answer']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def build_feedback_prompt(result: dict) -> str:
+    """Prompt umpan balik: ringkasan skor ringkas plus detail hanya untuk soal esai dan soal yang salah."""
+    missed = [
+        {"soal": item['question'], "jawaban_siswa": item['answer'], "jawaban_benar": item['correct_answer']}
+        for item in result['items'] if item['essay_score'] is None and item['points'] < 1
+    ]
+    essays = [
+        {"soal": item['question'], "jawaban_ideal": item['correct_answer'], "jawaban_siswa": item['answer'], "skor": item['essay_score']}
+        for item in result['items'] if item['essay_score'] is not None
+    ]
+    summary = {
+        "topik": result['topic'],
+        "skor": f"{_format_points(result['score'])}/{result['max_score']}",
+        "persentase": round(result['percentage']),
+        "level": result['level'],
+    }
+    return (
+        "Anda adalah seorang guru yang memberi umpan balik hasil kuis. Skor sudah dihitung, JANGAN menghitung ulang.\n"
+        f"**Ringkasan Hasil**: {json.dumps(summary, ensure_ascii=False)}\n"
+        f"**Soal Objektif yang Salah**: {json.dumps(missed, ensure_ascii=False)}\n"
+        f"**Jawaban Esai**: {json.dumps(essays, ensure_ascii=False)}\n\n"
+        "Tugas Anda:\n"
+        "1.  Sesuai level siswa, berikan kesimpulan yang membangun:\n"
+        "    - **Sangat Baik**: Puji pemahaman mereka.\n"
+        "    - **Cukup Baik**: Beri tahu apa yang sudah bagus dan sebutkan 1-2 area spesifik yang perlu diperkuat.\n"
+        "    - **Perlu Belajar Lagi**: Beri semangat dan sarankan untuk mempelajari kembali materi, terutama pada konsep yang salah dijawab.\n"
+        "2.  Untuk setiap jawaban esai, beri 1-2 kalimat masukan tentang apa yang kurang dibanding jawaban ideal.\n"
+        "3.  Sajikan dalam satu pesan singkat yang terstruktur dengan Markdown."
+    )
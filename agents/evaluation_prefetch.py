@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from agents.gemini_client import gemini_client, PRIORITY_BULK
+from agents.sentence_index import normalize_words
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI PREFETCH EVALUASI ---
+EVAL_PREFETCH_ENABLED = os.getenv("EVAL_PREFETCH_ENABLED", "1") not in ("0", "false", "False")
+EVAL_PREFETCH_TTL = int(os.getenv("EVAL_PREFETCH_TTL", str(3 * 3600)))
+EVAL_PREFETCH_MAX_ENTRIES = int(os.getenv("EVAL_PREFETCH_MAX_ENTRIES", "50"))
+EVAL_PREFETCH_WORKERS = int(os.getenv("EVAL_PREFETCH_WORKERS", "2"))
+# Dokumen yang diunggah dalam jendela ini dianggap materi sesi fokus berikutnya.
+EVAL_RECENT_DOCUMENT_WINDOW = int(os.getenv("EVAL_RECENT_DOCUMENT_WINDOW", str(6 * 3600)))
+EVAL_RECENT_DOCUMENTS_KEPT = 5
+
+EVALUATION_PROMPT = (
+    "Anda adalah seorang tutor ahli. Saya baru saja selesai mempelajari topik: '{topic}'.\n\n"
+    "Tugas Anda adalah membuat paket evaluasi komprehensif berdasarkan topik ini. Lakukan langkah-langkah berikut:\n\n"
+    "1.  **Lakukan Riset Mendalam**: Cari informasi yang akurat dan relevan tentang '{topic}'.\n"
+    "2.  **Buat Ringkasan Poin Kunci**: Sajikan 3-5 poin paling penting dari topik ini dalam format bullet point. Gunakan *teks tebal* untuk menyorot istilah kunci.\n"
+    "3.  **Buat Kuis Evaluasi**: Buat 5-7 pertanyaan yang beragam untuk menguji pemahaman. Campurkan jenis pertanyaan (misalnya, Pilihan Ganda, Benar/Salah, Esai Singkat).\n"
+    "4.  **Format Output**: Kembalikan seluruh output dalam format JSON yang ketat. Strukturnya harus seperti ini:\n"
+    "    ```json\n"
+    "    {{\n"
+    '        "topic": "{topic}",\n'
+    '        "summary": ["Poin kunci pertama...", "Poin kunci kedua..."],\n'
+    '        "quiz": [\n'
+    '            {{"question_number": 1, "type": "Pilihan Ganda", "question": "...", "options": ["A. Opsi 1", "B. Opsi 2"], "answer": "..."}},\n'
+    '            {{"question_number": 2, "type": "Benar/Salah", "question": "...", "answer": "Benar"}},\n'
+    '            {{"question_number": 3, "type": "Esai Singkat", "question": "...", "answer": "Jawaban ideal..."}}\n'
+    '        ]\n'
+    '    }}\n'
+    "    ```\n\n"
+    "Pastikan JSON yang Anda hasilkan valid."
+)
+
+
+def normalize_topic(topic: str) -> str:
+    """Kunci cache topik: huruf kecil, tanpa tanda baca, kata dinormalisasi."""
+    return " ".join(normalize_words(topic or ''))
+
+
+def topic_from_filename(file_name: str) -> str:
+    """Menebak topik dari nama file: 'Materi_Jaringan-Komputer (1).pdf' -> 'Materi Jaringan Komputer'."""
+    stem = os.path.splitext(os.path.basename(file_name))[0]
+    stem = re.sub(r"\(\d+\)|[_\-.]+", " ", stem)
+    return re.sub(r"\s+", " ", stem).strip()
+
+
+def remember_document(chat_data: dict, file_name: str) -> None:
+    """Mencatat dokumen terbaru di chat_data sebagai sumber tebakan topik sesi fokus."""
+    topic = topic_from_filename(file_name)
+    if not normalize_topic(topic):
+        return
+    recent = [doc for doc in chat_data.get('recent_documents', []) if normalize_topic(doc['topic']) != normalize_topic(topic)]
+    recent.append({'topic': topic, 'uploaded_at': time.time()})
+    chat_data['recent_documents'] = recent[-EVAL_RECENT_DOCUMENTS_KEPT:]
+
+
+def guess_study_topic(chat_data: dict):
+    """Topik sesi fokus: dari `/fokus <topik>`, atau dokumen terakhir yang baru diunggah."""
+    if chat_data.get('focus_topic'):
+        return chat_data['focus_topic']
+    recent = chat_data.get('recent_documents', [])
+    if recent and time.time() - recent[-1]['uploaded_at'] <= EVAL_RECENT_DOCUMENT_WINDOW:
+        return recent[-1]['topic']
+    return None
+
+
+def parse_evaluation_package(response_text: str) -> dict:
+    """Paket evaluasi dari blok ```json respons AI; melempar ValueError jika tidak bisa dipakai."""
+    cleaned_json = re.search(r'```json\n(.*?)\n```', response_text or '', re.DOTALL)
+    if not cleaned_json:
+        raise ValueError("AI tidak mengembalikan format JSON yang valid.")
+
+    eval_data = json.loads(cleaned_json.group(1))
+    if not eval_data.get('quiz'):
+        raise ValueError("Paket evaluasi tidak berisi pertanyaan.")
+    return eval_data
+
+
+def build_evaluation_package(topic: str) -> dict:
+    """Membuat paket evaluasi (ringkasan + kuis) untuk `topic`. Fungsi murni tanpa state Telegram."""
+    response_text = gemini_client.generate_sync(
+        EVALUATION_PROMPT.format(topic=topic), call_site='evaluation', priority=PRIORITY_BULK,
+        validate=parse_evaluation_package,
+    )
+    return parse_evaluation_package(response_text)
+
+
+class EvaluationPrefetcher:
+    """
+    Membuat paket evaluasi di latar belakang selama sesi fokus, disimpan per
+    topik ternormalisasi. Saat sesi selesai, hasil yang sudah jadi (atau yang
+    masih berjalan) dipakai ulang; entri kedaluwarsa atau berlebih dibuang.
+    """
+
+    def __init__(self, build=build_evaluation_package, ttl: int = EVAL_PREFETCH_TTL,
+                 max_entries: int = EVAL_PREFETCH_MAX_ENTRIES, workers: int = EVAL_PREFETCH_WORKERS):
+        self._build = build
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.workers = max(1, workers)
+        self._executor = None
+        self._entries = {}  # kunci topik -> (future, dibuat pada)
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="eval-prefetch")
+        return self._executor
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key, (future, created_at) in list(self._entries.items()):
+            failed = future.done() and (future.cancelled() or future.exception() is not None)
+            if failed or now - created_at > self.ttl:
+                future.cancel()
+                del self._entries[key]
+        # Terlama dibuang lebih dulu (dict mempertahankan urutan penyisipan).
+        while len(self._entries) > self.max_entries:
+            key = next(iter(self._entries))
+            self._entries.pop(key)[0].cancel()
+
+    def prefetch(self, topic: str):
+        """Mulai membuat paket untuk `topic` jika belum ada. Mengembalikan future-nya."""
+        key = normalize_topic(topic)
+        if not key:
+            return None
+        with self._lock:
+            self._evict()
+            if key in self._entries:
+                return self._entries[key][0]
+            logger.info(f"Eval Prefetch: Membuat paket evaluasi untuk '{topic}' di latar belakang...")
+            future = self._get_executor().submit(self._build, topic)
+            self._entries[key] = (future, time.monotonic())
+            return future
+
+    def get(self, topic: str):
+        """Future paket yang sudah jadi atau masih berjalan untuk `topic`, atau None."""
+        key = normalize_topic(topic)
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def package_for(self, topic: str):
+        """Future paket untuk `topic`: hasil prefetch jika ada, jika tidak dibuat sekarang."""
+        future = self.get(topic)
+        if future is not None:
+            logger.info(f"Eval Prefetch: Memakai paket '{topic}' ({'siap' if future.done() else 'sedang dibuat'}).")
+            return future
+        return self.prefetch(topic)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            self._entries.clear()
+
+
+evaluation_prefetcher = EvaluationPrefetcher()
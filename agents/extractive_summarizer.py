@@ -0,0 +1,140 @@
+import os
+import re
+import math
+import time
+from collections import Counter
+import numpy as np
+from agents.context_budget import split_sentences
+from agents.keyword_matcher import get_matcher
+from agents.sentence_index import normalize_words
+
+# --- KONFIGURASI RINGKASAN EKSTRAKTIF ---
+EXTRACTIVE_SUMMARY_SENTENCES = int(os.getenv("EXTRACTIVE_SUMMARY_SENTENCES", "10"))
+EXTRACTIVE_MAX_SENTENCES = int(os.getenv("EXTRACTIVE_MAX_SENTENCES", "2000"))
+EXTRACTIVE_MAX_FEATURES = int(os.getenv("EXTRACTIVE_MAX_FEATURES", "2048"))
+# Ambang kemiripan sisi graf LexRank dan batas kemiripan antar kalimat terpilih.
+LEXRANK_THRESHOLD = 0.1
+REDUNDANCY_THRESHOLD = 0.5
+DAMPING = 0.85
+MIN_SENTENCE_WORDS = 6
+MAX_SENTENCE_WORDS = 80
+OPENING_SENTENCES = 2
+
+_TOC_SENTENCE = re.compile(r"(\.{4,}|…{2,})")
+
+HEADINGS = {
+    'id': ("Ringkasan Cepat (ekstraktif, tanpa AI)", "Poin-poin penting:"),
+    'en': ("Quick Summary (extractive, no AI)", "Key points:"),
+}
+
+
+def _candidate_sentences(text: str, language: str):
+    """Kalimat yang layak masuk ringkasan beserta bobot kata kunci leksikonnya."""
+    sentences = [
+        sentence for sentence in split_sentences(text)
+        if MIN_SENTENCE_WORDS <= len(sentence.split()) <= MAX_SENTENCE_WORDS and not _TOC_SENTENCE.search(sentence)
+    ]
+    if not sentences:
+        return [], []
+    joined = "\n".join(sentences)
+    spans, offset = [], 0
+    for sentence in sentences:
+        spans.append((offset, offset + len(sentence)))
+        offset += len(sentence) + 1
+
+    candidates, weights = [], []
+    for sentence, found in zip(sentences, get_matcher(language).categorize(joined, spans)):
+        if 'boilerplate' in found:
+            continue
+        candidates.append(sentence)
+        weights.append(1.5 if 'high' in found else (1.2 if 'medium' in found else 1.0))
+    if len(candidates) > EXTRACTIVE_MAX_SENTENCES:
+        # Dokumen sangat panjang: sampel merata agar matriks kemiripan tetap kecil.
+        step = len(candidates) / EXTRACTIVE_MAX_SENTENCES
+        keep = [int(i * step) for i in range(EXTRACTIVE_MAX_SENTENCES)]
+        candidates = [candidates[i] for i in keep]
+        weights = [weights[i] for i in keep]
+    return candidates, weights
+
+
+def tfidf_matrix(sentences) -> np.ndarray:
+    """Matriks TF-IDF kalimat x istilah (baris ternormalisasi L2), kosakata dibatasi EXTRACTIVE_MAX_FEATURES."""
+    tokenized = [[token for token in normalize_words(sentence) if len(token) > 2] for sentence in sentences]
+    document_frequency = Counter()
+    for tokens in tokenized:
+        document_frequency.update(set(tokens))
+    # Istilah yang muncul di lebih dari separuh kalimat hampir tidak membedakan apa pun.
+    limit = max(2, len(sentences) // 2)
+    vocabulary = [term for term, df in document_frequency.most_common() if df <= limit][:EXTRACTIVE_MAX_FEATURES]
+    columns = {term: i for i, term in enumerate(vocabulary)}
+    idf = np.array([math.log((1 + len(sentences)) / (1 + document_frequency[term])) + 1 for term in vocabulary], dtype=np.float32)
+
+    rows, cols, values = [], [], []
+    for row, tokens in enumerate(tokenized):
+        for term, count in Counter(tokens).items():
+            column = columns.get(term)
+            if column is not None:
+                rows.append(row)
+                cols.append(column)
+                values.append(1 + math.log(count))
+    matrix = np.zeros((len(sentences), len(vocabulary)), dtype=np.float32)
+    matrix[rows, cols] = values
+    matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def lexrank_scores(similarity: np.ndarray, iterations: int = 50, tolerance: float = 1e-5) -> np.ndarray:
+    """Sentralitas LexRank: power iteration atas graf kalimat dengan sisi di atas LEXRANK_THRESHOLD."""
+    n = similarity.shape[0]
+    adjacency = (similarity > LEXRANK_THRESHOLD).astype(np.float32)
+    np.fill_diagonal(adjacency, 0.0)
+    degree = adjacency.sum(axis=1, keepdims=True)
+    # Kalimat tanpa tetangga dianggap terhubung ke semua kalimat (teleport seragam).
+    transition = np.where(degree > 0, adjacency / np.maximum(degree, 1.0), 1.0 / n)
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def select_sentences(text: str, language: str = 'en', count: int = None) -> list:
+    """Kalimat paling sentral (tidak saling mengulang), dikembalikan sesuai urutan dokumen."""
+    count = count or EXTRACTIVE_SUMMARY_SENTENCES
+    sentences, weights = _candidate_sentences(text, language)
+    if len(sentences) <= count:
+        return sentences
+
+    matrix = tfidf_matrix(sentences)
+    similarity = matrix @ matrix.T
+    scores = lexrank_scores(similarity) * np.asarray(weights, dtype=np.float32)
+
+    selected = []
+    for index in np.argsort(-scores):
+        if all(similarity[index, chosen] < REDUNDANCY_THRESHOLD for chosen in selected):
+            selected.append(int(index))
+            if len(selected) == count:
+                break
+    return [sentences[index] for index in sorted(selected)]
+
+
+def summarize(text: str, language: str = 'en', count: int = None) -> str:
+    """
+    Ringkasan ekstraktif lokal: paragraf pembuka dari kalimat terpilih pertama,
+    sisanya sebagai poin-poin. Mengembalikan string kosong jika tidak ada kalimat layak.
+    """
+    started = time.perf_counter()
+    sentences = select_sentences(text, language, count)
+    if not sentences:
+        return ""
+    title, points_heading = HEADINGS.get(language, HEADINGS['en'])
+    opening, points = sentences[:OPENING_SENTENCES], sentences[OPENING_SENTENCES:]
+    parts = [title, "", " ".join(opening)]
+    if points:
+        parts += ["", points_heading] + [f"• {sentence}" for sentence in points]
+    print(f"   -> Ringkasan ekstraktif dibuat dalam {time.perf_counter() - started:.2f} detik.")
+    return "\n".join(parts)
@@ -0,0 +1,343 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+import threading
+import concurrent.futures
+from multiprocessing import current_process
+from multiprocessing.managers import BaseManager
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from dotenv import load_dotenv
+from agents import llm_cache
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# --- KONFIGURASI KLIEN GEMINI ---
+DEFAULT_MODEL_NAME = 'gemini-1.5-flash-latest'
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "60"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1.0"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "20"))
+# Waktu tambahan di atas deadline sebelum generate_sync menyerah menunggu loop klien.
+GEMINI_SYNC_GRACE = float(os.getenv("GEMINI_SYNC_GRACE", "10"))
+
+# Jalur prioritas: angka kecil dilayani lebih dulu saat slot penuh.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+)
+
+
+_STREAM_END = object()
+
+
+class GeminiNotConfiguredError(Exception):
+    """Dilempar saat GEMINI_API_KEY tidak diatur."""
+
+
+class _RelayManager(BaseManager):
+    """Manager yang menyajikan gemini_client proses bot ke proses worker dokumen."""
+
+
+class TokenBucket:
+    """Pembatas laju: `rate` permintaan per detik dengan ledakan maksimal `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class PriorityLimiter:
+    """Semaphore dengan antrian prioritas: slot yang lepas diberikan ke penunggu berprioritas tertinggi."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, priority: int) -> None:
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot sudah diserahkan tepat sebelum dibatalkan; kembalikan.
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)  # slot langsung berpindah tangan
+                return
+        self.active -= 1
+
+
+class GeminiClient:
+    """
+    Satu-satunya jalur ke Gemini API. `genai.configure` dipanggil sekali, objek model
+    dipakai ulang per nama, dan semua panggilan berjalan di satu event loop latar
+    sehingga klien async gRPC (yang terikat ke loop) juga dipakai ulang.
+    Menerapkan token bucket, batas konkurensi global dengan jalur prioritas,
+    deadline per panggilan, dan retry dengan backoff ber-jitter untuk 429/5xx.
+    Proses worker dokumen tidak memakai limiter sendiri: lewat connect_relay(),
+    generate_sync di worker diteruskan ke klien proses bot, sehingga batas laju
+    dan jalur prioritas tetap satu untuk seluruh bot.
+    """
+
+    def __init__(self, api_key: str = GEMINI_API_KEY, rpm: float = GEMINI_RPM, burst: int = GEMINI_BURST,
+                 max_concurrency: int = GEMINI_MAX_CONCURRENCY):
+        self.api_key = api_key
+        self._rpm = rpm
+        self._burst = burst
+        self._max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._relay = None
+        self._relay_server = None
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        """Status yang terikat ke proses: loop latar, limiter, dan objek model (klien gRPC)."""
+        self._bucket = TokenBucket(self._rpm / 60.0, self._burst)
+        self._limiter = PriorityLimiter(self._max_concurrency)
+        self._models = {}
+        self._checked_models = set()
+        self._loop = None
+        self._pid = os.getpid()
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._pid != os.getpid():
+            # Proses hasil fork mewarisi objek loop tanpa thread-nya (dan mungkin lock yang sedang
+            # dipegang); bangun ulang semuanya untuk proses ini.
+            self._lock = threading.Lock()
+            self._reset_state()
+        with self._lock:
+            if self._loop is None:
+                if not self.api_key:
+                    raise GeminiNotConfiguredError("GEMINI_API_KEY tidak diatur di file .env")
+                genai.configure(api_key=self.api_key)
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="gemini-client", daemon=True).start()
+            return self._loop
+
+    def start_relay(self):
+        """
+        Menjalankan server relay di proses ini (proses bot) dan mengembalikan
+        (alamat, authkey) yang diberikan ke proses worker untuk connect_relay().
+        """
+        authkey = bytes(current_process().authkey)
+        with self._lock:
+            if self._relay_server is None:
+                self._relay_server = _RelayManager(authkey=authkey).get_server()
+                threading.Thread(target=self._relay_server.serve_forever, name="gemini-relay", daemon=True).start()
+            return self._relay_server.address, authkey
+
+    def connect_relay(self, address, authkey) -> None:
+        """Dipanggil di proses worker: generate_sync selanjutnya dijalankan oleh klien proses bot."""
+        manager = _RelayManager(address=address, authkey=authkey)
+        manager.connect()
+        self._relay = manager.gemini_client()
+
+    def check_model(self, model_name: str = DEFAULT_MODEL_NAME) -> None:
+        """Memastikan model tersedia (sekali per nama model); melempar exception jika tidak."""
+        if model_name in self._checked_models:
+            return
+        self._ensure_loop()
+        genai.get_model(f"models/{model_name}")
+        self._checked_models.add(model_name)
+
+    def get_model(self, model_name: str = DEFAULT_MODEL_NAME):
+        model = self._models.get(model_name)
+        if model is None:
+            model = self._models[model_name] = genai.GenerativeModel(model_name)
+        return model
+
+    async def _call_model(self, prompt, model_name, priority, timeout, kwargs) -> str:
+        deadline = time.monotonic() + timeout
+        for attempt in range(GEMINI_MAX_RETRIES + 1):
+            await asyncio.wait_for(self._limiter.acquire(priority), max(deadline - time.monotonic(), 0))
+            try:
+                await self._bucket.acquire()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                response = await asyncio.wait_for(
+                    self.get_model(model_name).generate_content_async(prompt, **kwargs), remaining
+                )
+                return response.text if response.parts else ''
+            except RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(e, attempt, deadline)
+            finally:
+                self._limiter.release()
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error, attempt, deadline) -> float:
+        """Jeda backoff eksponensial ber-jitter; melempar ulang `error` jika tidak ada waktu/percobaan tersisa."""
+        delay = min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+        if attempt == GEMINI_MAX_RETRIES or time.monotonic() + delay >= deadline:
+            raise error
+        logger.warning(f"Gemini Client: {type(error).__name__}, mencoba lagi dalam {delay:.1f} detik...")
+        return delay
+
+    async def _stream(self, prompt, model_name, call_site, priority, timeout, kwargs, emit) -> None:
+        """Berjalan di loop klien; mengirim setiap potongan teks ke `emit`, diakhiri _STREAM_END."""
+        try:
+            cached = llm_cache.get_cached(call_site, model_name, prompt) if call_site else None
+            if cached:
+                emit(cached)
+                return
+
+            started = time.perf_counter()
+            deadline = started + timeout
+            parts = []
+            for attempt in range(GEMINI_MAX_RETRIES + 1):
+                await asyncio.wait_for(self._limiter.acquire(priority), max(deadline - time.monotonic(), 0))
+                try:
+                    await self._bucket.acquire()
+                    response = await asyncio.wait_for(
+                        self.get_model(model_name).generate_content_async(prompt, stream=True, **kwargs),
+                        max(deadline - time.monotonic(), 0),
+                    )
+                    chunks = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - time.monotonic(), 0))
+                        except StopAsyncIteration:
+                            break
+                        if chunk.parts and chunk.text:
+                            parts.append(chunk.text)
+                            emit(chunk.text)
+                    break
+                except RETRYABLE_ERRORS as e:
+                    if parts:
+                        # Sebagian teks sudah terkirim ke pengguna; mengulang akan menduplikasinya.
+                        raise
+                    delay = self._retry_delay(e, attempt, deadline)
+                finally:
+                    self._limiter.release()
+                await asyncio.sleep(delay)
+
+            if call_site:
+                llm_cache.put(call_site, model_name, prompt, ''.join(parts), time.perf_counter() - started)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            emit(e)
+        finally:
+            emit(_STREAM_END)
+
+    async def _generate(self, prompt, model_name, call_site, priority, timeout, validate, kwargs) -> str:
+        async def generate():
+            return await self._call_model(prompt, model_name, priority, timeout, kwargs)
+        if call_site is None:
+            return await generate()
+        return await llm_cache.aget_or_generate(call_site, model_name, prompt, generate, validate)
+
+    def _submit(self, prompt, model_name, call_site, priority, timeout, validate, kwargs):
+        loop = self._ensure_loop()
+        coro = self._generate(prompt, model_name, call_site, priority, timeout or GEMINI_TIMEOUT, validate, kwargs)
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    async def generate(self, prompt: str, *, model_name: str = DEFAULT_MODEL_NAME, call_site: str = None,
+                       priority: int = PRIORITY_INTERACTIVE, timeout: float = None, validate=None, **kwargs) -> str:
+        """
+        Menghasilkan teks untuk prompt. Jika `call_site` diberikan, respons di-cache
+        lewat llm_cache (hanya jika lolos `validate`, bila ada). Mengembalikan string
+        kosong jika API tidak memberikan hasil.
+        """
+        return await asyncio.wrap_future(self._submit(prompt, model_name, call_site, priority, timeout, validate, kwargs))
+
+    async def stream(self, prompt: str, *, model_name: str = DEFAULT_MODEL_NAME, call_site: str = None,
+                     priority: int = PRIORITY_INTERACTIVE, timeout: float = None, **kwargs):
+        """
+        Async generator yang menghasilkan potongan teks segera setelah diterima dari
+        API streaming Gemini. Jika respons ada di cache, seluruh teks dikirim sekaligus.
+        """
+        caller_loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def emit(item):
+            if not caller_loop.is_closed():
+                caller_loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        coro = self._stream(prompt, model_name, call_site, priority, timeout or GEMINI_TIMEOUT, kwargs, emit)
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def generate_sync(self, prompt: str, *, model_name: str = DEFAULT_MODEL_NAME, call_site: str = None,
+                      priority: int = PRIORITY_INTERACTIVE, timeout: float = None, validate=None, **kwargs) -> str:
+        """
+        Versi sinkron dari generate() untuk thread dan proses worker. Melempar TimeoutError
+        jika hasil tidak datang dalam deadline + GEMINI_SYNC_GRACE, alih-alih menunggu selamanya.
+        Di proses worker yang terhubung ke relay, panggilan dijalankan oleh klien proses bot.
+        """
+        if self._relay is not None:
+            return self._relay.generate_sync(
+                prompt, model_name=model_name, call_site=call_site, priority=priority,
+                timeout=timeout, validate=validate, **kwargs,
+            )
+        future = self._submit(prompt, model_name, call_site, priority, timeout, validate, kwargs)
+        try:
+            return future.result(timeout=(timeout or GEMINI_TIMEOUT) + GEMINI_SYNC_GRACE)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+gemini_client = GeminiClient()
+_RelayManager.register('gemini_client', callable=lambda: gemini_client)
@@ -1,11 +1,13 @@
 import datetime
 import os.path
 import json
+import threading
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from agents.agent_executor import run_blocking
 
 # --- KONFIGURASI PATH ---
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -16,6 +18,9 @@ TASK_FILE = os.path.join(PROJECT_ROOT, 'tasks.json')
 # Scope ini memberikan izin untuk membaca dan menulis di kalender.
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# Event bisa dibuat dari beberapa thread sekaligus; baca-ubah-tulis tasks.json harus berurutan.
+_task_file_lock = threading.Lock()
+
 
 # --- FUNGSI OTENTIKASI (UNTUK SATU PENGGUNA) ---
 def authenticate_google_calendar():
@@ -45,21 +50,22 @@ def authenticate_google_calendar():
 def save_task_for_reminder(title, deadline_str):
     """Menyimpan detail tugas ke file JSON lokal sebagai catatan."""
     new_task = {'title': title, 'deadline': deadline_str}
-    tasks = []
+    with _task_file_lock:
+        tasks = []
     
-    if os.path.exists(TASK_FILE):
-        try:
-            with open(TASK_FILE, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if content:
-                    tasks = json.loads(content)
-        except (json.JSONDecodeError, FileNotFoundError):
-            tasks = [] 
+        if os.path.exists(TASK_FILE):
+            try:
+                with open(TASK_FILE, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                    if content:
+                        tasks = json.loads(content)
+            except (json.JSONDecodeError, FileNotFoundError):
+                tasks = [] 
     
-    tasks.append(new_task)
+        tasks.append(new_task)
     
-    with open(TASK_FILE, 'w', encoding='utf-8') as f:
-        json.dump(tasks, f, indent=4, ensure_ascii=False)
+        with open(TASK_FILE, 'w', encoding='utf-8') as f:
+            json.dump(tasks, f, indent=4, ensure_ascii=False)
     print(" -> Tugas berhasil dicatat di file tasks.json.")
 
 
@@ -114,4 +120,9 @@ def create_calendar_event(summary, deadline_str):
     except Exception as e:
         error_msg = f"Terjadi error tak terduga: {e}"
         print(f" -> {error_msg}")
-        return f"❌ Gagal: {error_msg}"
\ No newline at end of file
+        return f"❌ Gagal: {error_msg}"
+
+
+async def acreate_calendar_event(summary, deadline_str):
+    """Versi async create_calendar_event; berjalan di pool agen 'calendar'."""
+    return await run_blocking(create_calendar_event, summary, deadline_str, pool='calendar')
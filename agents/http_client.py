@@ -0,0 +1,83 @@
+import os
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from agents.agent_executor import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI KLIEN HTTP ---
+# Batas waktu (detik) untuk membuka koneksi dan menunggu respons; bisa diganti per panggilan lewat `timeout`.
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+# Koneksi keep-alive yang disimpan per host.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+# Percobaan ulang untuk gagal koneksi dan 429/502/503/504 pada metode idempoten (menghormati Retry-After).
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+USER_AGENT = "AcademicTelegramBot/1.0"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_RETRIES, connect=HTTP_RETRIES, read=0, backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504), allowed_methods=frozenset({'GET', 'HEAD'}),
+        respect_retry_after_header=True, raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """Session bersama: koneksi TCP+TLS ke host yang sama dipakai ulang antar permintaan dan antar thread."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def request(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """Seperti requests.request, tapi lewat pool koneksi bersama dan selalu dengan batas waktu."""
+    if timeout is None:
+        timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    return get_session().request(method, url, timeout=timeout, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+async def arequest(method: str, url: str, **kwargs) -> requests.Response:
+    """Versi async request; berjalan di pool agen 'http' agar event loop tidak terblokir."""
+    return await run_blocking(request, method, url, pool='http', **kwargs)
+
+
+async def aget(url: str, **kwargs) -> requests.Response:
+    return await arequest('GET', url, **kwargs)
+
+
+async def apost(url: str, **kwargs) -> requests.Response:
+    return await arequest('POST', url, **kwargs)
+
+
+def close() -> None:
+    """Menutup semua koneksi yang tersimpan (dipanggil saat bot berhenti)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -1,32 +1,34 @@
-import google.generativeai as genai
 import logging
 import json
 import re
-import os
-from dotenv import load_dotenv
+from agents.gemini_client import gemini_client
+from agents.agent_executor import run_blocking
+from agents.local_intent_classifier import LocalIntentClassifier, log_traffic, clean_reminder_details
 
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
+if not gemini_client.available:
     raise ValueError("GEMINI_API_KEY tidak ditemukan di environment.")
 
-genai.configure(api_key=GEMINI_API_KEY)
+INTENT_MODEL_NAME = 'gemini-1.5-flash-latest'
 
-def classify_intent(user_text: str) -> dict:
-    """
-    Menggunakan Gemini untuk mengklasifikasikan niat pengguna dan mengekstrak entitas.
-    """
-    try:
-        genai.get_model('models/gemini-1.5-flash-latest')
-    except Exception:
-        logger.error("Gemini API key tidak terkonfigurasi atau model tidak ditemukan.")
-        return {"intent": "error", "details": "Konfigurasi AI tidak valid."}
+# Contoh di prompt Gemini; sekaligus data latih awal untuk klasifikasi lokal.
+INTENT_EXAMPLES = [
+    ("ingatkan aku ada rapat besok jam 3 sore", {"intent": "create_reminder", "details": "rapat besok jam 3 sore"}),
+    ("ingatkan saya deadline tugas ssdlc hari jumat", {"intent": "create_reminder", "details": "deadline tugas ssdlc hari jumat"}),
+    ("carikan saya paper tentang dampak AI pada pendidikan", {"intent": "find_paper", "topic": "dampak AI pada pendidikan"}),
+    ("saya ada tugas makalah, tolong buatkan rencananya", {"intent": "create_task_plan", "topic": "tugas makalah", "deadline": None}),
+    ("saya ada tugas dkp deadline besok, butuh bantuan mengerjakannya", {"intent": "create_task_plan", "topic": "tugas dkp", "deadline": "besok"}),
+    ("halo apa kabar", {"intent": "greeting"}),
+]
+
+local_classifier = LocalIntentClassifier(INTENT_EXAMPLES)
 
-    prompt = f"""
+def _build_prompt(user_text: str) -> str:
+    examples = "\n".join(
+        f'    Teks: "{text}"\n    JSON: {json.dumps(result, ensure_ascii=False)}\n' for text, result in INTENT_EXAMPLES
+    )
+    return f"""
     Analisis niat dari teks pengguna. Balas HANYA dengan JSON yang valid.
     Pilihan niat: 'create_reminder', 'find_paper', 'create_task_plan', 'greeting', 'unknown'.
 
@@ -35,49 +37,89 @@ def classify_intent(user_text: str) -> dict:
     - Jika pengguna HANYA ingin "diingatkan" tentang sesuatu (bahkan jika itu tugas), niatnya adalah 'create_reminder'. Prioritaskan 'create_task_plan' jika ada permintaan untuk bantuan.
 
     Contoh:
-    Teks: "ingatkan aku ada rapat besok jam 3 sore"
-    JSON: {{"intent": "create_reminder", "details": "rapat besok jam 3 sore"}}
-
-    Teks: "ingatkan saya deadline tugas ssdlc hari jumat"
-    JSON: {{"intent": "create_reminder", "details": "deadline tugas ssdlc hari jumat"}}
-
-    Teks: "carikan saya paper tentang dampak AI pada pendidikan"
-    JSON: {{"intent": "find_paper", "topic": "dampak AI pada pendidikan"}}
-    
-    Teks: "saya ada tugas makalah, tolong buatkan rencananya"
-    JSON: {{"intent": "create_task_plan", "topic": "tugas makalah", "deadline": null}}
-
-    Teks: "saya ada tugas dkp deadline besok, butuh bantuan mengerjakannya"
-    JSON: {{"intent": "create_task_plan", "topic": "tugas dkp", "deadline": "besok"}}
-
-    Teks: "halo apa kabar"
-    JSON: {{"intent": "greeting"}}
-
+{examples}
     ---
     Teks Pengguna: "{user_text}"
     JSON:
     """
 
+
+def _is_intent_json(ai_output: str) -> bool:
+    """Respons intent hanya di-cache jika berisi objek JSON dengan kunci 'intent'."""
+    match = re.search(r'\{.*\}', ai_output, re.DOTALL)
+    return bool(match) and 'intent' in json.loads(match.group(0))
+
+
+def _parse_result(user_text: str, ai_output: str) -> dict:
+    match = re.search(r'\{.*\}', ai_output, re.DOTALL)
+    if not match:
+        logger.error(f"Output Gemini tidak mengandung JSON: {ai_output}")
+        return {"intent": "unknown", "details": "Gagal mengekstrak JSON dari AI."}
+
+    json_text = match.group(0)
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
-        response = model.generate_content(prompt)
-        ai_output = response.text.strip()
-        
-        match = re.search(r'\{.*\}', ai_output, re.DOTALL)
-        if match:
-            json_text = match.group(0)
-        else:
-            logger.error(f"Output Gemini tidak mengandung JSON: {ai_output}")
-            return {"intent": "unknown", "details": "Gagal mengekstrak JSON dari AI."}
-        
         result = json.loads(json_text)
-        logger.info(f"Intent classified for '{user_text}': {result}")
-        return result
-    
     except json.JSONDecodeError:
         logger.error(f"Output Gemini bukan JSON valid: {json_text}")
         return {"intent": "unknown", "details": ai_output}
 
+    if result.get('intent') == 'create_reminder' and isinstance(result.get('details'), str):
+        result['details'] = clean_reminder_details(result['details'])
+    logger.info(f"Intent classified for '{user_text}': {result}")
+    log_traffic(user_text, result)
+    return result
+
+
+def _classify_locally(user_text: str):
+    local_result = local_classifier.classify(user_text)
+    if local_result:
+        logger.info(f"Intent classified locally for '{user_text}': {local_result}")
+    return local_result
+
+
+def classify_intent(user_text: str) -> dict:
+    """
+    Mengklasifikasikan niat pengguna dan mengekstrak entitas. Pesan yang jelas
+    (sapaan, cari paper, reminder) diputuskan secara lokal; sisanya memakai Gemini.
+    """
+    local_result = _classify_locally(user_text)
+    if local_result:
+        return local_result
+
+    try:
+        gemini_client.check_model(INTENT_MODEL_NAME)
+    except Exception:
+        logger.error("Gemini API key tidak terkonfigurasi atau model tidak ditemukan.")
+        return {"intent": "error", "details": "Konfigurasi AI tidak valid."}
+
+    try:
+        ai_output = gemini_client.generate_sync(
+            _build_prompt(user_text), model_name=INTENT_MODEL_NAME, call_site='intent', validate=_is_intent_json
+        ).strip()
+        return _parse_result(user_text, ai_output)
+    except Exception as e:
+        logger.error(f"Error saat klasifikasi niat: {e}")
+        return {"intent": "error", "details": str(e)}
+
+
+async def aclassify_intent(user_text: str) -> dict:
+    """Versi async classify_intent untuk handler bot; tidak pernah memblokir event loop."""
+    local_result = _classify_locally(user_text)
+    if local_result:
+        return local_result
+
+    try:
+        # Pengecekan model hanya memanggil API sekali per nama model, tapi tetap blocking.
+        await run_blocking(gemini_client.check_model, INTENT_MODEL_NAME, pool='llm')
+    except Exception:
+        logger.error("Gemini API key tidak terkonfigurasi atau model tidak ditemukan.")
+        return {"intent": "error", "details": "Konfigurasi AI tidak valid."}
+
+    try:
+        ai_output = await gemini_client.generate(
+            _build_prompt(user_text), model_name=INTENT_MODEL_NAME, call_site='intent', validate=_is_intent_json
+        )
+        return _parse_result(user_text, ai_output.strip())
     except Exception as e:
         logger.error(f"Error saat klasifikasi niat: {e}")
         return {"intent": "error", "details": str(e)}
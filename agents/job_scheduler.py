@@ -0,0 +1,155 @@
+import os
+import time
+import asyncio
+import itertools
+import logging
+from collections import deque
+from agents.document_service import QueueFullError
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI PENJADWAL PEKERJAAN ---
+JOB_MAX_CONCURRENCY = int(os.getenv("JOB_MAX_CONCURRENCY", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "20"))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "300"))
+JOB_HISTORY_PER_OWNER = int(os.getenv("JOB_HISTORY_PER_OWNER", "5"))
+
+STATUS_LABELS = {
+    'queued': "⏳ menunggu",
+    'running': "⚙️ berjalan",
+    'done': "✅ selesai",
+    'failed': "❌ gagal",
+    'cancelled': "🚫 dibatalkan",
+}
+
+
+class Job:
+    """Satu pekerjaan latar belakang beserta status dan waktunya."""
+
+    def __init__(self, job_id: int, owner, name: str):
+        self.id = job_id
+        self.owner = owner
+        self.name = name
+        self.status = 'queued'
+        self.error = None
+        self.created_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ('queued', 'running')
+
+    @property
+    def wait_seconds(self) -> float:
+        return (self.started_at or self.finished_at or time.monotonic()) - self.created_at
+
+    @property
+    def run_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def describe(self) -> str:
+        line = f"#{self.id} {self.name} — {STATUS_LABELS.get(self.status, self.status)}"
+        if self.status == 'queued':
+            line += f" ({self.wait_seconds:.0f} dtk)"
+        elif self.started_at is not None:
+            line += f" ({self.run_seconds:.0f} dtk)"
+        if self.error:
+            line += f": {self.error}"
+        return line
+
+
+class JobScheduler:
+    """
+    Menjalankan pekerjaan latar belakang bot (membuat dan menilai evaluasi) sebagai
+    task asyncio di event loop bot. Jumlah yang berjalan bersamaan dibatasi semaphore,
+    antrian dibatasi JOB_QUEUE_SIZE, dan setiap pekerjaan punya ID, status, serta
+    bisa dibatalkan per pengguna.
+    """
+
+    def __init__(self, max_concurrency: int = JOB_MAX_CONCURRENCY, max_queue: int = JOB_QUEUE_SIZE,
+                 timeout: float = JOB_TIMEOUT, history: int = JOB_HISTORY_PER_OWNER):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.history = history
+        self._ids = itertools.count(1)
+        self._active = {}    # job_id -> Job
+        self._finished = {}  # owner -> deque[Job]
+        self._semaphore = None
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrency + self.max_queue
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Dibuat saat pertama dipakai agar terikat ke event loop bot.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def submit(self, func, *args, owner=None, name: str = "Pekerjaan") -> Job:
+        """
+        Menjadwalkan coroutine func(*args). Harus dipanggil dari event loop bot.
+        Melempar QueueFullError jika antrian sudah penuh.
+        """
+        if len(self._active) >= self.capacity:
+            raise QueueFullError(f"Antrian pekerjaan penuh ({len(self._active)}/{self.capacity}).")
+        job = Job(next(self._ids), owner, name)
+        self._active[job.id] = job
+        job.task = asyncio.create_task(self._run(job, func, args), name=f"job-{job.id}")
+        job.task.add_done_callback(lambda _: self._finish(job))
+        logger.info(f"Job Scheduler: #{job.id} '{name}' masuk antrian ({len(self._active)}/{self.capacity}).")
+        return job
+
+    async def _run(self, job: Job, func, args) -> None:
+        try:
+            async with self._get_semaphore():
+                job.status = 'running'
+                job.started_at = time.monotonic()
+                await asyncio.wait_for(func(*args), self.timeout)
+            job.status = 'done'
+        except asyncio.CancelledError:
+            job.status = 'cancelled'
+        except asyncio.TimeoutError:
+            job.status = 'failed'
+            job.error = "melewati batas waktu"
+            logger.warning(f"Job Scheduler: #{job.id} '{job.name}' melewati batas waktu {self.timeout:.0f} detik.")
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            logger.error(f"Job Scheduler: #{job.id} '{job.name}' gagal - {e}")
+
+    def _finish(self, job: Job) -> None:
+        # Task yang dibatalkan sebelum sempat berjalan tidak pernah masuk ke _run.
+        if job.active:
+            job.status = 'cancelled'
+        job.finished_at = time.monotonic()
+        if self._active.pop(job.id, None) is not None:
+            self._finished.setdefault(job.owner, deque(maxlen=self.history)).append(job)
+            logger.info(f"Job Scheduler: #{job.id} {job.status} (tunggu {job.wait_seconds:.1f} dtk, jalan {job.run_seconds:.1f} dtk).")
+
+    def jobs_for(self, owner) -> list:
+        """Pekerjaan aktif milik `owner` diikuti riwayat terbarunya."""
+        active = [job for job in self._active.values() if job.owner == owner]
+        return active + list(reversed(self._finished.get(owner, ())))
+
+    def cancel(self, owner) -> int:
+        """Membatalkan semua pekerjaan aktif milik `owner`. Mengembalikan jumlahnya."""
+        cancelled = 0
+        for job in list(self._active.values()):
+            if job.owner == owner and job.task is not None:
+                job.task.cancel()
+                cancelled += 1
+        return cancelled
+
+    def shutdown(self) -> None:
+        for job in list(self._active.values()):
+            if job.task is not None:
+                job.task.cancel()
+
+
+job_scheduler = JobScheduler()
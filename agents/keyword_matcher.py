@@ -0,0 +1,81 @@
+import os
+import re
+import json
+import logging
+from bisect import bisect_right
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+LEXICON_DIR = os.getenv("LEXICON_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons'))
+DEFAULT_LANGUAGE = 'en'
+# Kategori leksikon yang bukan kata kunci penanda kalimat penting.
+NON_MATCH_CATEGORIES = {'stopwords'}
+
+
+class KeywordMatcher:
+    """
+    Pencocok banyak kata kunci sekaligus: semua istilah dari semua kategori
+    dikompilasi menjadi satu regex alternasi, sehingga teks cukup dipindai sekali
+    berapa pun jumlah istilahnya. Pencocokan bersifat substring dan tidak peka huruf besar.
+    """
+
+    def __init__(self, lexicon: dict):
+        self._categories = {}
+        for category, terms in lexicon.items():
+            if category in NON_MATCH_CATEGORIES:
+                continue
+            for term in terms:
+                term = term.strip().lower()
+                if term:
+                    self._categories.setdefault(term, set()).add(category)
+
+        if self._categories:
+            alternation = "|".join(re.escape(term) for term in sorted(self._categories, key=len, reverse=True))
+            # Lookahead agar istilah yang saling tumpang tindih tetap terdeteksi semua.
+            self._pattern = re.compile(f"(?=({alternation}))", re.IGNORECASE)
+        else:
+            self._pattern = None
+
+    def categorize(self, text: str, spans) -> list:
+        """
+        Untuk setiap span (awal, akhir) di `text`, mengembalikan set kategori
+        yang istilahnya muncul di dalam span tersebut. Span harus terurut.
+        """
+        found = [set() for _ in spans]
+        if self._pattern is None or not spans:
+            return found
+
+        starts = [start for start, _ in spans]
+        for match in self._pattern.finditer(text):
+            term = match.group(1)
+            position = match.start()
+            index = bisect_right(starts, position) - 1
+            if index < 0 or position + len(term) > spans[index][1]:
+                continue
+            found[index] |= self._categories[term.lower()]
+        return found
+
+
+def load_lexicon(language: str) -> dict:
+    """Memuat leksikon kata kunci untuk bahasa tersebut dari LEXICON_DIR/<bahasa>.json."""
+    path = os.path.join(LEXICON_DIR, f"{language}.json")
+    if not os.path.exists(path):
+        logger.warning(f"Keyword Matcher: Leksikon '{language}' tidak ditemukan, memakai '{DEFAULT_LANGUAGE}'.")
+        path = os.path.join(LEXICON_DIR, f"{DEFAULT_LANGUAGE}.json")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(languages=('id', 'en')) -> frozenset:
+    """Gabungan kata umum (kategori 'stopwords') dari leksikon bahasa-bahasa tersebut."""
+    return frozenset(
+        word.strip().lower() for language in languages for word in load_lexicon(language).get('stopwords', [])
+    )
+
+
+@lru_cache(maxsize=None)
+def get_matcher(language: str) -> KeywordMatcher:
+    """Matcher yang sudah dikompilasi per bahasa (dibuat sekali per proses)."""
+    return KeywordMatcher(load_lexicon(language))
@@ -0,0 +1,102 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from langdetect import DetectorFactory, detect_langs
+    from langdetect.lang_detect_exception import LangDetectException
+except ImportError:
+    DetectorFactory = None
+    logger.warning("Language Detector: Paket 'langdetect' tidak terpasang, semua dokumen dianggap berbahasa Inggris.")
+
+# --- KONFIGURASI DETEKSI BAHASA ---
+LANGDETECT_SEED = int(os.getenv("LANGDETECT_SEED", "0"))
+DOCUMENT_SAMPLES = int(os.getenv("LANGDETECT_DOCUMENT_SAMPLES", "5"))
+SAMPLE_CHARS = 500
+PAGE_SAMPLE_CHARS = 400
+MIN_SAMPLE_CHARS = 40
+DEFAULT_LANGUAGE = 'en'
+# Kode langdetect -> bahasa pipeline kita. Melayu sering tertukar dengan Indonesia.
+LANGUAGE_MAP = {'id': 'id', 'ms': 'id'}
+
+if DetectorFactory is not None:
+    # Seed tetap membuat hasil langdetect sama di setiap eksekusi.
+    DetectorFactory.seed = LANGDETECT_SEED
+
+
+def _snippet_at(text: str, position: int, length: int) -> str:
+    """Potongan teks mulai dari batas kata terdekat setelah `position`."""
+    if position > 0:
+        space = text.find(' ', position, position + 50)
+        position = space + 1 if space != -1 else position
+    return text[position:position + length]
+
+
+def _probabilities(snippet: str) -> dict:
+    """Probabilitas per bahasa (sudah dipetakan ke 'id'/'en') untuk satu potongan teks."""
+    if DetectorFactory is None or len(snippet.strip()) < MIN_SAMPLE_CHARS:
+        return {}
+    try:
+        scores = {}
+        for result in detect_langs(snippet):
+            language = LANGUAGE_MAP.get(result.lang, DEFAULT_LANGUAGE)
+            scores[language] = scores.get(language, 0.0) + result.prob
+        return scores
+    except LangDetectException:
+        return {}
+
+
+def detect_document_language(text: str, samples: int = None) -> str:
+    """
+    Mendeteksi bahasa dominan dokumen dari beberapa potongan yang tersebar
+    merata di seluruh teks, bukan hanya halaman sampul.
+    """
+    samples = samples or DOCUMENT_SAMPLES
+    if not text.strip():
+        return DEFAULT_LANGUAGE
+
+    step = max(len(text) // samples, 1)
+    totals = {}
+    for i in range(samples):
+        for language, prob in _probabilities(_snippet_at(text, i * step, SAMPLE_CHARS)).items():
+            totals[language] = totals.get(language, 0.0) + prob
+    if not totals:
+        return DEFAULT_LANGUAGE
+    return max(totals, key=totals.get)
+
+
+def detect_page_languages(pages, default: str = DEFAULT_LANGUAGE) -> list:
+    """
+    Memberi label bahasa untuk setiap halaman dari satu potongan di tengah halaman.
+    Halaman yang terlalu sedikit teksnya mengikuti label halaman sebelumnya.
+    """
+    labels = []
+    previous = default
+    for page_text in pages:
+        middle = max(len(page_text) // 2 - PAGE_SAMPLE_CHARS // 2, 0)
+        scores = _probabilities(_snippet_at(page_text, middle, PAGE_SAMPLE_CHARS))
+        previous = max(scores, key=scores.get) if scores else previous
+        labels.append(previous)
+    return labels
+
+
+def group_sections(page_languages, min_pages: int = 2) -> list:
+    """
+    Menggabungkan halaman berurutan yang bahasanya sama: [(bahasa, halaman_awal, halaman_akhir)].
+    Bagian yang lebih pendek dari `min_pages` dianggap salah deteksi dan ikut bagian sebelumnya.
+    """
+    sections = []
+    for page_no, language in enumerate(page_languages):
+        if sections and sections[-1][0] == language:
+            sections[-1] = (language, sections[-1][1], page_no)
+        else:
+            sections.append((language, page_no, page_no))
+
+    merged = []
+    for language, first, last in sections:
+        if merged and (last - first + 1 < min_pages or merged[-1][0] == language):
+            merged[-1] = (merged[-1][0], merged[-1][1], last)
+        else:
+            merged.append((language, first, last))
+    return merged
@@ -0,0 +1,279 @@
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI CACHE RESPONS LLM ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(PROJECT_ROOT, 'cache', 'llm_cache.sqlite3'))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+
+# TTL (detik) per call site; 0 berarti tidak di-cache. Bisa diganti lewat LLM_CACHE_TTL_<CALL_SITE>.
+DEFAULT_TTLS = {
+    'summarize': 7 * 24 * 3600,
+    'quiz': 24 * 3600,
+    'essay_score': 30 * 24 * 3600,
+    'intent': 24 * 3600,
+    'plan': 6 * 3600,
+    'reminder': 600,
+    'evaluation': 24 * 3600,
+    'final_scoring': 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+_local = threading.local()
+_inflight = {}  # kunci -> Future milik pemanggil pertama (single-flight)
+_inflight_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'saved_seconds': 0.0}
+_inserts_since_eviction = 0
+_eviction_lock = threading.Lock()
+
+
+def ttl_for(call_site: str) -> int:
+    override = os.getenv(f"LLM_CACHE_TTL_{call_site.upper()}")
+    if override is not None:
+        return int(override)
+    return DEFAULT_TTLS.get(call_site, DEFAULT_TTL)
+
+
+def _connection() -> sqlite3.Connection:
+    """Satu koneksi SQLite per thread (WAL agar aman dipakai beberapa proses)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_PATH, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, call_site TEXT NOT NULL, response TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL, latency REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def make_key(call_site: str, model_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{call_site}\x00{model_name}\x00{prompt}".encode('utf-8')).hexdigest()
+
+
+def _lookup(key: str, ttl: int):
+    conn = _connection()
+    row = conn.execute("SELECT response, created_at, latency FROM responses WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None
+    response, created_at, latency = row
+    now = time.time()
+    if now - created_at > ttl:
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        conn.commit()
+        return None
+    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+    conn.commit()
+    return response, latency
+
+
+def _store(key: str, call_site: str, response: str, latency: float) -> None:
+    global _inserts_since_eviction
+    conn = _connection()
+    now = time.time()
+    conn.execute(
+        "INSERT OR REPLACE INTO responses (key, call_site, response, created_at, last_access, latency) VALUES (?, ?, ?, ?, ?, ?)",
+        (key, call_site, response, now, now, latency),
+    )
+    conn.commit()
+    with _eviction_lock:
+        _inserts_since_eviction += 1
+        due = _inserts_since_eviction >= 50
+        if due:
+            _inserts_since_eviction = 0
+    if due:
+        evict()
+
+
+def evict(max_entries: int = None) -> None:
+    """Menghapus entri yang paling lama tidak diakses jika jumlahnya melebihi batas."""
+    max_entries = LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    conn = _connection()
+    (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+    if count > max_entries:
+        conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+            (count - max_entries,),
+        )
+        conn.commit()
+        logger.info(f"LLM Cache: {count - max_entries} entri lama dihapus.")
+
+
+def _record(stat: str, amount=1) -> None:
+    with _stats_lock:
+        _stats[stat] += amount
+
+
+def _is_valid(validate, response: str) -> bool:
+    """Respons layak disimpan jika tidak kosong dan lolos `validate` (False atau exception berarti tidak)."""
+    if not response:
+        return False
+    if validate is None:
+        return True
+    try:
+        return bool(validate(response))
+    except Exception:
+        return False
+
+
+def _claim(call_site: str, model_name: str, prompt: str, validate=None):
+    """
+    Mencari respons di cache. Mengembalikan (kunci, respons, leader, future):
+    respons terisi jika hit, leader terisi jika permintaan identik sedang berjalan,
+    dan future terisi jika pemanggil ini yang harus memanggil model.
+    """
+    key = make_key(call_site, model_name, prompt)
+    try:
+        cached = _lookup(key, ttl_for(call_site))
+    except sqlite3.Error as e:
+        logger.warning(f"LLM Cache: Gagal membaca cache - {e}")
+        cached = None
+    if cached is not None and not _is_valid(validate, cached[0]):
+        # Entri lama yang tidak bisa dipakai pemanggil; buang dan minta ulang ke model.
+        _delete(key)
+        cached = None
+    if cached is not None:
+        _record('hits')
+        _record('saved_seconds', cached[1])
+        return key, cached[0], None, None
+
+    with _inflight_lock:
+        leader = _inflight.get(key)
+        if leader is None:
+            future = _inflight[key] = Future()
+    if leader is not None:
+        _record('coalesced')
+        return key, None, leader, None
+    _record('misses')
+    return key, None, None, future
+
+
+def _finish(key: str, call_site: str, future: Future, response: str, latency: float, validate=None) -> None:
+    if _is_valid(validate, response):
+        try:
+            _store(key, call_site, response, latency)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM Cache: Gagal menyimpan respons - {e}")
+    elif response:
+        logger.warning(f"LLM Cache: Respons '{call_site}' tidak lolos validasi, tidak disimpan.")
+    future.set_result(response)
+
+
+def _delete(key: str) -> None:
+    try:
+        conn = _connection()
+        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.warning(f"LLM Cache: Gagal menghapus respons - {e}")
+
+
+def _release(key: str) -> None:
+    with _inflight_lock:
+        _inflight.pop(key, None)
+
+
+def _cacheable(call_site: str) -> bool:
+    return LLM_CACHE_ENABLED and ttl_for(call_site) > 0
+
+
+def get_or_generate(call_site: str, model_name: str, prompt: str, generate, validate=None):
+    """
+    Mengembalikan respons teks untuk prompt dari cache, atau memanggil generate()
+    sekali saja walaupun ada beberapa permintaan identik yang datang bersamaan.
+    Respons kosong, exception, dan respons yang ditolak `validate(respons)`
+    (mengembalikan False atau melempar exception) tidak disimpan.
+    """
+    if not _cacheable(call_site):
+        return generate()
+
+    key, response, leader, future = _claim(call_site, model_name, prompt, validate)
+    if future is None:
+        return response if leader is None else leader.result()
+    try:
+        started = time.perf_counter()
+        response = generate()
+        _finish(key, call_site, future, response, time.perf_counter() - started, validate)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        _release(key)
+
+
+async def aget_or_generate(call_site: str, model_name: str, prompt: str, agenerate, validate=None):
+    """Versi async dari get_or_generate(); `agenerate` adalah fungsi coroutine tanpa argumen."""
+    if not _cacheable(call_site):
+        return await agenerate()
+
+    key, response, leader, future = _claim(call_site, model_name, prompt, validate)
+    if future is None:
+        return response if leader is None else await asyncio.wrap_future(leader)
+    try:
+        started = time.perf_counter()
+        response = await agenerate()
+        _finish(key, call_site, future, response, time.perf_counter() - started, validate)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        _release(key)
+
+
+def get_cached(call_site: str, model_name: str, prompt: str):
+    """Respons yang tersimpan untuk prompt ini, atau None (untuk pemanggil yang tidak lewat get_or_generate)."""
+    if not _cacheable(call_site):
+        return None
+    try:
+        cached = _lookup(make_key(call_site, model_name, prompt), ttl_for(call_site))
+    except sqlite3.Error as e:
+        logger.warning(f"LLM Cache: Gagal membaca cache - {e}")
+        return None
+    if cached is None:
+        _record('misses')
+        return None
+    _record('hits')
+    _record('saved_seconds', cached[1])
+    return cached[0]
+
+
+def put(call_site: str, model_name: str, prompt: str, response: str, latency: float = 0.0) -> None:
+    if not _cacheable(call_site) or not response:
+        return
+    try:
+        _store(make_key(call_site, model_name, prompt), call_site, response, latency)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM Cache: Gagal menyimpan respons - {e}")
+
+
+def invalidate(call_site: str, model_name: str, prompt: str) -> None:
+    """Membuang respons tersimpan untuk prompt ini (misalnya setelah pemanggil gagal memakainya)."""
+    if _cacheable(call_site):
+        _delete(make_key(call_site, model_name, prompt))
+
+
+def get_stats() -> dict:
+    """Statistik hit/miss dan perkiraan waktu tunggu yang dihemat oleh cache."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+    stats['hit_rate'] = round((stats['hits'] + stats['coalesced']) / lookups, 3) if lookups else 0.0
+    stats['saved_seconds'] = round(stats['saved_seconds'], 2)
+    return stats
@@ -0,0 +1,230 @@
+import os
+import re
+import json
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from agents.sentence_index import normalize_words
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI KLASIFIKASI LOKAL ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+INTENT_TRAFFIC_LOG = os.getenv("INTENT_TRAFFIC_LOG", os.path.join(PROJECT_ROOT, 'cache', 'intent_traffic.jsonl'))
+INTENT_TRAFFIC_MAX_EXAMPLES = int(os.getenv("INTENT_TRAFFIC_MAX_EXAMPLES", "2000"))
+LOCAL_INTENT_THRESHOLD = float(os.getenv("LOCAL_INTENT_THRESHOLD", "0.5"))
+LOCAL_INTENT_MARGIN = float(os.getenv("LOCAL_INTENT_MARGIN", "0.15"))
+# Model dilatih ulang di latar belakang jika log lalu lintas bertambah dan model sudah setua ini (detik).
+INTENT_RETRAIN_INTERVAL = int(os.getenv("INTENT_RETRAIN_INTERVAL", str(6 * 3600)))
+
+# Niat yang boleh diputuskan secara lokal; sisanya (misal rencana tugas) butuh ekstraksi AI.
+LOCAL_INTENTS = {'greeting', 'find_paper', 'create_reminder'}
+
+# Hanya sapaan yang menjadi seluruh isi pesan: "malam ini ada tugas apa?" bukan sapaan.
+_GREETING_WORD = (
+    r"(?:halo+|hal+o|hai+|hi+|hello|hey|hei|selamat\s+(?:pagi|siang|sore|malam)|pagi|siang|sore|malam|"
+    r"assalamu'?alaikum|apa\s+kabar(?:nya)?)"
+)
+GREETING_PATTERN = re.compile(
+    rf"^\s*{_GREETING_WORD}(?:[\s,]+(?:{_GREETING_WORD}|bot|kak|min|semua|semuanya))*[\s,!.?]*$",
+    re.IGNORECASE,
+)
+PAPER_PATTERN = re.compile(
+    r"\b(?:cari(?:kan)?|temukan|carii?n)\s+(?:saya\s+|aku\s+|gue\s+)?"
+    r"(?:paper|jurnal|artikel(?:\s+ilmiah)?|referensi|publikasi)\s+"
+    r"(?:tentang|mengenai|soal|terkait|seputar)?\s*(?P<topic>.+)$",
+    re.IGNORECASE,
+)
+REMINDER_PATTERN = re.compile(
+    r"\b(?:tolong\s+)?(?:ingatkan|ingetin|ingatin)\s+(?:aku|saya|gue|gw)?\s*"
+    r"(?:ada\s+|untuk\s+|tentang\s+|kalau\s+)?(?P<details>.+)$",
+    re.IGNORECASE,
+)
+# Kata ganti dan pengisi yang bukan bagian isi reminder ("ingatkan aku dong" tidak punya isi).
+REMINDER_FILLER = re.compile(
+    r"^(?:(?:aku|saya|gue|gw|dong|ya|yah|deh|nih|please|pls|tolong|ada|untuk|tentang|kalau)\b[\s,]*)+"
+    r"|(?:[\s,]+(?:dong|ya|yah|deh|nih|please|pls)\b)+[\s.?!]*$",
+    re.IGNORECASE,
+)
+TOPIC_PATTERN = re.compile(r"\b(?:tentang|mengenai|terkait|seputar)\s+(?P<topic>.+)$", re.IGNORECASE)
+PLAN_WORDS = {'rencana', 'rencananya', 'bantuan', 'bantu', 'kerjakan', 'mengerjakan', 'mengerjakannya', 'buatkan'}
+TASK_WORDS = {'tugas', 'pr'}
+
+
+def clean_reminder_details(text: str) -> str:
+    """Isi reminder tanpa kata ganti/pengisi di awal dan akhir; string kosong jika tidak ada isinya."""
+    details, previous = (text or '').strip(" .?!"), None
+    while previous != details:
+        previous, details = details, REMINDER_FILLER.sub('', details).strip(" ,.?!")
+    return details
+
+
+def _features(text: str) -> Counter:
+    tokens = normalize_words(text)
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+
+class TfidfCentroidClassifier:
+    """
+    Klasifikasi TF-IDF murni Python: setiap niat diwakili satu centroid (rata-rata
+    vektor TF-IDF contoh-contohnya) dan teks baru diberi label centroid dengan
+    kemiripan kosinus tertinggi.
+    """
+
+    def __init__(self, examples):
+        documents = [(_features(text), intent) for text, intent in examples if text.strip()]
+        document_frequency = Counter()
+        for features, _ in documents:
+            document_frequency.update(features.keys())
+        total = len(documents) or 1
+        self._idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+        sums, counts = {}, Counter()
+        for features, intent in documents:
+            centroid = sums.setdefault(intent, Counter())
+            for term, weight in self._vectorize(features).items():
+                centroid[term] += weight
+            counts[intent] += 1
+        self._centroids = {
+            intent: self._normalize({term: weight / counts[intent] for term, weight in centroid.items()})
+            for intent, centroid in sums.items()
+        }
+
+    @staticmethod
+    def _normalize(vector: dict) -> dict:
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def _vectorize(self, features: Counter) -> dict:
+        return self._normalize({
+            term: (1 + math.log(count)) * self._idf[term] for term, count in features.items() if term in self._idf
+        })
+
+    def predict(self, text: str):
+        """Mengembalikan daftar (niat, kemiripan) terurut dari yang paling mirip."""
+        vector = self._vectorize(_features(text))
+        scores = [
+            (intent, sum(weight * centroid.get(term, 0.0) for term, weight in vector.items()))
+            for intent, centroid in self._centroids.items()
+        ]
+        return sorted(scores, key=lambda item: item[1], reverse=True)
+
+
+def _load_traffic_examples() -> list:
+    """Contoh (teks, niat) dari log hasil klasifikasi Gemini sebelumnya."""
+    if not os.path.exists(INTENT_TRAFFIC_LOG):
+        return []
+    examples = []
+    with open(INTENT_TRAFFIC_LOG, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                examples.append((record['text'], record['intent']))
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return examples[-INTENT_TRAFFIC_MAX_EXAMPLES:]
+
+
+class LocalIntentClassifier:
+    """
+    Tahap pertama klasifikasi niat: aturan kata kunci untuk pola yang jelas, lalu
+    model TF-IDF yang dilatih dari contoh prompt dan log lalu lintas. Mengembalikan
+    None jika tidak yakin, sehingga pemanggil bisa jatuh ke Gemini.
+    """
+
+    def __init__(self, seed_examples=()):
+        self._seed_examples = [(text, result['intent']) for text, result in seed_examples]
+        self._model = None
+        self._trained_at = 0.0
+        self._retraining = False
+        self._lock = threading.Lock()
+
+    def _get_model(self) -> TfidfCentroidClassifier:
+        with self._lock:
+            if self._model is None:
+                self._model, self._trained_at = self._train()
+            elif self._retrain_due():
+                # Model lama tetap melayani selama model baru dilatih.
+                self._retraining = True
+                threading.Thread(target=self.retrain, name="intent-retrain", daemon=True).start()
+            return self._model
+
+    def _train(self):
+        started = time.time()
+        return TfidfCentroidClassifier(self._seed_examples + _load_traffic_examples()), started
+
+    def _retrain_due(self) -> bool:
+        if self._retraining or time.time() - self._trained_at < INTENT_RETRAIN_INTERVAL:
+            return False
+        try:
+            return os.path.getmtime(INTENT_TRAFFIC_LOG) > self._trained_at
+        except OSError:
+            return False
+
+    def retrain(self) -> None:
+        """Melatih ulang model dari contoh awal dan log lalu lintas terbaru, lalu menggantinya."""
+        try:
+            model, trained_at = self._train()
+            with self._lock:
+                self._model, self._trained_at = model, trained_at
+            logger.info("Local Intent: Model dilatih ulang dari log lalu lintas.")
+        except Exception as e:
+            logger.error(f"Local Intent: Gagal melatih ulang model - {e}")
+        finally:
+            self._retraining = False
+
+    @staticmethod
+    def _wants_plan(tokens: set) -> bool:
+        return bool(tokens & TASK_WORDS) and bool(tokens & PLAN_WORDS)
+
+    def _extract(self, intent: str, text: str):
+        """Melengkapi hasil dengan entitas yang dibutuhkan handler, atau None jika gagal."""
+        if intent == 'greeting':
+            return {"intent": "greeting"}
+        if intent == 'find_paper':
+            match = PAPER_PATTERN.search(text) or TOPIC_PATTERN.search(text)
+            topic = match.group('topic').strip(" .?!") if match else ''
+            return {"intent": "find_paper", "topic": topic} if topic else None
+        if intent == 'create_reminder':
+            match = REMINDER_PATTERN.search(text)
+            # Isi kosong ("ingatkan aku") tetap niat reminder; handler menanyakan isinya.
+            return {"intent": "create_reminder", "details": clean_reminder_details(match.group('details') if match else text)}
+        return None
+
+    def classify(self, text: str):
+        tokens = set(normalize_words(text))
+        if not tokens or self._wants_plan(tokens):
+            return None
+
+        # Aturan kata kunci: pola eksplisit tidak perlu model sama sekali.
+        for intent, pattern in (('find_paper', PAPER_PATTERN), ('create_reminder', REMINDER_PATTERN)):
+            if pattern.search(text):
+                result = self._extract(intent, text)
+                if result:
+                    return result
+
+        # Model diberi kesempatan lebih dulu agar pesan tugas yang diawali "pagi"/"malam" tidak dianggap sapaan.
+        scores = self._get_model().predict(text)
+        intent, confidence = scores[0] if scores else (None, 0.0)
+        runner_up = scores[1][1] if len(scores) > 1 else 0.0
+        confident = confidence >= LOCAL_INTENT_THRESHOLD and confidence - runner_up >= LOCAL_INTENT_MARGIN
+        if confident and intent != 'greeting':
+            return self._extract(intent, text) if intent in LOCAL_INTENTS else None
+        if GREETING_PATTERN.match(text) or confident:
+            return self._extract('greeting', text)
+        return None
+
+
+def log_traffic(text: str, result: dict) -> None:
+    """Mencatat hasil klasifikasi Gemini sebagai data latih untuk model lokal."""
+    intent = result.get('intent')
+    if not intent or intent in ('error', 'unknown'):
+        return
+    try:
+        os.makedirs(os.path.dirname(INTENT_TRAFFIC_LOG), exist_ok=True)
+        with open(INTENT_TRAFFIC_LOG, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"text": text, "intent": intent}, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"Local Intent: Gagal mencatat lalu lintas - {e}")
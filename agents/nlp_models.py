@@ -0,0 +1,136 @@
+import gc
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# --- KONFIGURASI MODEL ---
+# bahasa -> (nama model spaCy, perlu sentencizer?, perkiraan memori MB jika psutil tidak ada)
+MODEL_SPECS = {
+    'en': ('en_core_web_sm', False, 60),
+    'id': ('xx_ent_wiki_sm', True, 40),
+}
+NLP_MEMORY_BUDGET_MB = int(os.getenv("NLP_MEMORY_BUDGET_MB", "0"))  # 0 = tanpa batas
+NLP_IDLE_SECONDS = int(os.getenv("NLP_IDLE_SECONDS", "1800"))
+# Bahasa yang dimuat saat worker dimulai. Default kosong: setiap worker memuat model
+# suatu bahasa saat pertama kali membutuhkannya, jadi tidak semua worker memegang semua model.
+NLP_WARMUP_LANGUAGES = [lang.strip() for lang in os.getenv("NLP_WARMUP_LANGUAGES", "").split(",") if lang.strip()]
+
+_models = {}          # bahasa -> {'nlp', 'loaded_at', 'last_used', 'size_mb'}
+_load_timings = {}    # bahasa -> {'last_seconds', 'total_seconds', 'loads'}
+_registry_lock = threading.Lock()
+_load_locks = {lang: threading.Lock() for lang in MODEL_SPECS}
+
+
+def _rss_mb() -> float:
+    if psutil is None:
+        return 0.0
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _load_model(language: str):
+    import spacy
+
+    model_name, needs_sentencizer, estimated_mb = MODEL_SPECS[language]
+    logger.info(f"NLP Registry: Memuat model '{model_name}' untuk bahasa '{language}'...")
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+
+    nlp = spacy.load(model_name)
+    if needs_sentencizer and 'sentencizer' not in nlp.pipe_names:
+        nlp.add_pipe('sentencizer')
+
+    elapsed = time.perf_counter() - started
+    size_mb = (_rss_mb() - rss_before) if psutil else estimated_mb
+    timing = _load_timings.setdefault(language, {'last_seconds': 0.0, 'total_seconds': 0.0, 'loads': 0})
+    timing['last_seconds'] = elapsed
+    timing['total_seconds'] += elapsed
+    timing['loads'] += 1
+    logger.info(f"NLP Registry: Model '{model_name}' siap dalam {elapsed:.2f} detik (~{max(size_mb, 0):.0f} MB).")
+    return nlp, max(size_mb, 0.0)
+
+
+def get_nlp(language: str = 'en'):
+    """Mengembalikan pipeline spaCy untuk bahasa tersebut, memuatnya saat pertama kali dibutuhkan."""
+    language = language if language in MODEL_SPECS else 'en'
+    unload_idle_models()
+
+    entry = _models.get(language)
+    if entry is None:
+        with _load_locks[language]:
+            entry = _models.get(language)
+            if entry is None:
+                nlp, size_mb = _load_model(language)
+                now = time.monotonic()
+                entry = {'nlp': nlp, 'loaded_at': now, 'last_used': now, 'size_mb': size_mb}
+                with _registry_lock:
+                    _models[language] = entry
+                _enforce_memory_budget(keep=language)
+
+    entry['last_used'] = time.monotonic()
+    return entry['nlp']
+
+
+def unload(language: str) -> bool:
+    """Melepas model dari memori. Mengembalikan True jika ada model yang dilepas."""
+    with _registry_lock:
+        entry = _models.pop(language, None)
+    if entry is None:
+        return False
+    del entry
+    gc.collect()
+    logger.info(f"NLP Registry: Model bahasa '{language}' dilepas dari memori.")
+    return True
+
+
+def unload_idle_models(max_idle_seconds: int = None) -> list:
+    """Melepas model yang tidak dipakai lebih lama dari batas idle."""
+    max_idle_seconds = NLP_IDLE_SECONDS if max_idle_seconds is None else max_idle_seconds
+    if max_idle_seconds <= 0:
+        return []
+    now = time.monotonic()
+    idle = [lang for lang, entry in list(_models.items()) if now - entry['last_used'] > max_idle_seconds]
+    return [lang for lang in idle if unload(lang)]
+
+
+def _enforce_memory_budget(keep: str) -> None:
+    """Jika total memori model melebihi anggaran, lepas model yang paling lama idle (kecuali `keep`)."""
+    if NLP_MEMORY_BUDGET_MB <= 0:
+        return
+    candidates = sorted(
+        (entry['last_used'], lang) for lang, entry in list(_models.items()) if lang != keep
+    )
+    for _, lang in candidates:
+        if sum(entry['size_mb'] for entry in list(_models.values())) <= NLP_MEMORY_BUDGET_MB:
+            break
+        unload(lang)
+
+
+def warm_up(languages=None) -> None:
+    """Memuat model secara sinkron (misalnya di initializer proses worker)."""
+    for language in NLP_WARMUP_LANGUAGES if languages is None else languages:
+        try:
+            get_nlp(language)
+        except Exception as e:
+            logger.error(f"NLP Registry: Gagal memuat model bahasa '{language}' - {e}")
+
+
+def get_load_timings() -> dict:
+    """Statistik waktu muat (cold-start) per bahasa beserta status model saat ini."""
+    now = time.monotonic()
+    stats = {}
+    for language in MODEL_SPECS:
+        timing = dict(_load_timings.get(language, {'last_seconds': 0.0, 'total_seconds': 0.0, 'loads': 0}))
+        entry = _models.get(language)
+        timing['loaded'] = entry is not None
+        timing['size_mb'] = round(entry['size_mb'], 1) if entry else 0.0
+        timing['idle_seconds'] = round(now - entry['last_used'], 1) if entry else None
+        stats[language] = timing
+    return stats
@@ -1,6 +1,7 @@
 import os
 import requests
 from dotenv import load_dotenv
+from agents import http_client
 
 
 load_dotenv()
@@ -24,7 +25,7 @@ def send_telegram_message(message: str):
     }
     
     try:
-        response = requests.post(url, json=payload)
+        response = http_client.post(url, json=payload)
         response.raise_for_status() 
         print(f" -> Pesan reminder berhasil dikirim ke Telegram.")
     except requests.exceptions.RequestException as e:
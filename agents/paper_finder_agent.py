@@ -1,9 +1,36 @@
 import arxiv
 import logging
+from agents.agent_executor import run_blocking
 
 
 logger = logging.getLogger(__name__)
 
+def cari_paper_ilmiah_records(query: str, max_results: int = 5) -> list:
+    """
+    Mencari paper di arXiv dan mengembalikan record terstruktur
+    {title, authors, abstract, url, pdf_url, doi, year, source}. Error diteruskan ke pemanggil.
+    """
+    logger.info(f"Paper Finder Agent: Mencari record untuk query '{query}'")
+    search = arxiv.Search(
+        query=query,
+        max_results=max_results,
+        sort_by=arxiv.SortCriterion.Relevance
+    )
+    return [
+        {
+            'title': result.title,
+            'authors': [author.name for author in result.authors],
+            'abstract': result.summary,
+            'url': result.entry_id,
+            'pdf_url': result.pdf_url,
+            'doi': result.doi,
+            'year': result.published.year if result.published else None,
+            'source': 'arXiv',
+        }
+        for result in search.results()
+    ]
+
+
 def cari_paper_ilmiah(query: str, max_results: int = 5) -> list:
     """
     Fungsi agen yang bertanggung jawab untuk mencari paper di arXiv.
@@ -12,26 +39,19 @@ def cari_paper_ilmiah(query: str, max_results: int = 5) -> list:
     formatted_query = " AND ".join(query.split())
     logger.info(f"Paper Finder Agent: Query asli '{query}', diubah menjadi '{formatted_query}'")
     try:
-        
-        search = arxiv.Search(
-            query=query,
-            max_results=max_results,
-            sort_by=arxiv.SortCriterion.Relevance
-        )
-
-        hasil_format = []
-        results = list(search.results()) 
+        results = cari_paper_ilmiah_records(query, max_results)
         
         if not results:
             logger.warning(f"Paper Finder Agent: Tidak ada hasil untuk query '{query}'")
             return ["Maaf, tidak ada paper yang cocok dengan pencarian Anda."]
 
+        hasil_format = []
         for result in results:
-            authors = ', '.join(author.name for author in result.authors)
+            authors = ', '.join(result['authors'])
             paper_info = (
-                f"📄 *Judul:* {result.title}\n"
+                f"📄 *Judul:* {result['title']}\n"
                 f"✍️ *Penulis:* {authors}\n"
-                f"🔗 *Link PDF:* {result.pdf_url}"
+                f"🔗 *Link PDF:* {result['pdf_url']}"
             )
             hasil_format.append(paper_info)
         
@@ -39,4 +59,9 @@ def cari_paper_ilmiah(query: str, max_results: int = 5) -> list:
 
     except Exception as e:
         logger.error(f"Paper Finder Agent: Terjadi error - {e}")
-        return [f"Terjadi kesalahan internal saat mencari paper: {e}"]
\ No newline at end of file
+        return [f"Terjadi kesalahan internal saat mencari paper: {e}"]
+
+
+async def acari_paper_ilmiah(query: str, max_results: int = 5) -> list:
+    """Versi async cari_paper_ilmiah; berjalan di pool agen 'papers'."""
+    return await run_blocking(cari_paper_ilmiah, query, max_results, pool='papers')
@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import logging
+import threading
+from agents.keyword_matcher import get_stopwords
+from agents.sentence_index import normalize_words
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI INDEKS PAPER ---
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PAPER_INDEX_PATH = os.getenv("PAPER_INDEX_PATH", os.path.join(PROJECT_ROOT, 'cache', 'paper_index.sqlite3'))
+PAPER_INDEX_ENABLED = os.getenv("PAPER_INDEX_ENABLED", "1") != "0"
+# Hasil kueri yang lebih tua dari ini tetap ditampilkan, tapi disegarkan di latar belakang.
+PAPER_INDEX_MAX_AGE = int(os.getenv("PAPER_INDEX_MAX_AGE", str(24 * 3600)))
+# Hasil pencarian teks penuh harus memuat setidaknya bagian ini dari kata kueri (minimal dua kata).
+PAPER_INDEX_MIN_TERM_MATCH = float(os.getenv("PAPER_INDEX_MIN_TERM_MATCH", "0.5"))
+
+_DOI_PREFIX = re.compile(r"^(https?://(dx\.)?doi\.org/|doi:)", re.IGNORECASE)
+
+_local = threading.local()
+
+
+def _connection() -> sqlite3.Connection:
+    """Satu koneksi SQLite per thread (WAL agar aman dipakai beberapa proses)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(PAPER_INDEX_PATH), exist_ok=True)
+        conn = sqlite3.connect(PAPER_INDEX_PATH, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            " id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, title TEXT NOT NULL, authors TEXT NOT NULL,"
+            " abstract TEXT, url TEXT, pdf_url TEXT, doi TEXT, year INTEGER, source TEXT, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(title, authors, abstract)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS queries ("
+            " source TEXT NOT NULL, query TEXT NOT NULL, paper_keys TEXT NOT NULL, max_results INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (source, query))"
+        )
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(normalize_words(query or ''))
+
+
+def normalize_doi(doi: str):
+    if not doi:
+        return None
+    return _DOI_PREFIX.sub('', doi.strip()).lower() or None
+
+
+def paper_key(record: dict) -> str:
+    """Identitas paper: DOI jika ada, jika tidak judul ternormalisasi (sama dengan dedup pencarian)."""
+    doi = normalize_doi(record.get('doi'))
+    if doi:
+        return f"doi:{doi}"
+    return f"title:{' '.join(normalize_words(record.get('title') or ''))}"
+
+
+def _row_to_record(row) -> dict:
+    title, authors, abstract, url, pdf_url, doi, year, source = row
+    return {
+        'title': title, 'authors': json.loads(authors), 'abstract': abstract, 'url': url,
+        'pdf_url': pdf_url, 'doi': doi, 'year': year, 'source': source,
+    }
+
+
+def add_papers(records: list) -> list:
+    """Menyimpan/memperbarui record paper di indeks. Mengembalikan kunci masing-masing record."""
+    conn = _connection()
+    now = time.time()
+    keys = []
+    for record in records:
+        key = paper_key(record)
+        if key in ('title:', 'doi:'):
+            continue
+        authors = record.get('authors') or []
+        values = (
+            record.get('title') or '', json.dumps(authors, ensure_ascii=False), record.get('abstract'),
+            record.get('url'), record.get('pdf_url'), record.get('doi'), record.get('year'), record.get('source'), now,
+        )
+        row = conn.execute("SELECT id FROM papers WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            cursor = conn.execute(
+                "INSERT INTO papers (title, authors, abstract, url, pdf_url, doi, year, source, updated_at, key)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", values + (key,),
+            )
+            rowid = cursor.lastrowid
+        else:
+            rowid = row[0]
+            conn.execute(
+                "UPDATE papers SET title = ?, authors = ?, abstract = ?, url = ?, pdf_url = ?, doi = ?, year = ?,"
+                " source = ?, updated_at = ? WHERE id = ?", values + (rowid,),
+            )
+            conn.execute("DELETE FROM papers_fts WHERE rowid = ?", (rowid,))
+        conn.execute(
+            "INSERT INTO papers_fts (rowid, title, authors, abstract) VALUES (?, ?, ?, ?)",
+            (rowid, values[0], " ".join(authors), record.get('abstract') or ''),
+        )
+        keys.append(key)
+    conn.commit()
+    return keys
+
+
+def store_query_results(source: str, query: str, records: list, max_results: int) -> None:
+    """Menyimpan hasil satu sumber untuk satu kueri (diminta `max_results`) beserta waktu pengambilannya."""
+    if not PAPER_INDEX_ENABLED:
+        return
+    keys = add_papers(records)
+    conn = _connection()
+    conn.execute(
+        "INSERT OR REPLACE INTO queries (source, query, paper_keys, max_results, fetched_at) VALUES (?, ?, ?, ?, ?)",
+        (source, normalize_query(query), json.dumps(keys), max_results, time.time()),
+    )
+    conn.commit()
+
+
+def get_query_results(source: str, query: str, max_results: int):
+    """
+    (record, umur dalam detik) dari pengambilan terakhir kueri ini di `source`, atau None
+    jika belum pernah diambil dengan setidaknya `max_results` hasil.
+    """
+    if not PAPER_INDEX_ENABLED:
+        return None
+    conn = _connection()
+    row = conn.execute(
+        "SELECT paper_keys, max_results, fetched_at FROM queries WHERE source = ? AND query = ?", (source, normalize_query(query))
+    ).fetchone()
+    if row is None or row[1] < max_results:
+        return None
+    keys = json.loads(row[0])[:max_results]
+    by_key = {}
+    if keys:
+        placeholders = ",".join("?" * len(keys))
+        for key, *fields in conn.execute(
+            f"SELECT key, title, authors, abstract, url, pdf_url, doi, year, source FROM papers WHERE key IN ({placeholders})", keys
+        ):
+            by_key[key] = _row_to_record(fields)
+    return [by_key[key] for key in keys if key in by_key], time.time() - row[2]
+
+
+def is_stale(age: float) -> bool:
+    return age > PAPER_INDEX_MAX_AGE
+
+
+def query_terms(query: str) -> list:
+    """Kata kueri yang bermakna: tanpa kata umum dari leksikon dan kata sangat pendek."""
+    stopwords = get_stopwords()
+    terms = []
+    for term in normalize_words(query or ''):
+        if len(term) > 2 and term not in stopwords and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def search(query: str, limit: int = 5) -> list:
+    """
+    Pencarian teks penuh (FTS5, peringkat bm25) atas semua paper yang pernah
+    ditemukan. Semua kata kueri dicocokkan dulu; jika kurang, paper yang memuat
+    sebagian besar kata (lihat PAPER_INDEX_MIN_TERM_MATCH) ikut ditampilkan.
+    """
+    if not PAPER_INDEX_ENABLED:
+        return []
+    terms = query_terms(query)
+    if not terms:
+        return []
+    conn = _connection()
+    quoted = [f'"{term}"' for term in terms]
+    required = max(2, math.ceil(len(terms) * PAPER_INDEX_MIN_TERM_MATCH))
+    results, seen = [], set()
+    passes = [(" AND ".join(quoted), limit, False)]
+    if required < len(terms):
+        passes.append((" OR ".join(quoted), limit * 5, True))
+    for expression, fetch, partial in passes:
+        rows = conn.execute(
+            "SELECT p.id, p.title, p.authors, p.abstract, p.url, p.pdf_url, p.doi, p.year, p.source"
+            " FROM papers_fts JOIN papers p ON p.id = papers_fts.rowid"
+            " WHERE papers_fts MATCH ? ORDER BY bm25(papers_fts) LIMIT ?",
+            (expression, fetch),
+        ).fetchall()
+        for rowid, *fields in rows:
+            if rowid in seen or len(results) >= limit:
+                continue
+            record = _row_to_record(fields)
+            if partial and _matched_terms(record, terms) < required:
+                continue
+            seen.add(rowid)
+            results.append(record)
+        if len(results) >= limit:
+            break
+    return results
+
+
+def _matched_terms(record: dict, terms: list) -> int:
+    words = set(normalize_words(" ".join([record['title'] or '', record['abstract'] or '', " ".join(record['authors'])])))
+    return sum(1 for term in terms if term in words)
@@ -0,0 +1,216 @@
+import os
+import asyncio
+import logging
+import telegram
+from agents import paper_index
+from agents.paper_index import normalize_doi
+from agents.agent_executor import run_blocking
+from agents.sentence_index import normalize_words
+from agents.telegram_streaming import TELEGRAM_MESSAGE_LIMIT
+from agents.paper_finder_agent import cari_paper_ilmiah_records
+from agents.semantic_scholar_agent import cari_paper_semantic_scholar_records
+
+logger = logging.getLogger(__name__)
+
+# --- KONFIGURASI PENCARIAN PAPER ---
+# Batas waktu per sumber; bisa diganti per sumber lewat PAPER_SOURCE_TIMEOUT_<NAMA>.
+PAPER_SOURCE_TIMEOUT = float(os.getenv("PAPER_SOURCE_TIMEOUT", "8"))
+ABSTRACT_PREVIEW_CHARS = 150
+MAX_LISTED_AUTHORS = 3
+
+# nama -> {'label', 'search', 'timeout'}; sumber baru cukup didaftarkan lewat register_source.
+PAPER_SOURCES = {}
+
+_refreshing = {}  # (sumber, kueri ternormalisasi) -> task penyegaran latar belakang
+
+
+def register_source(name: str, label: str = None, timeout: float = None):
+    """
+    Dekorator untuk mendaftarkan sumber paper. Fungsi sumber menerima
+    (query, max_results) dan mengembalikan daftar record
+    {title, authors, abstract, url, pdf_url, doi, year, source}; boleh sinkron
+    (dijalankan di pool agen 'papers') maupun coroutine.
+    """
+    def decorator(search):
+        PAPER_SOURCES[name] = {'label': label or name, 'search': search, 'timeout': timeout}
+        return search
+    return decorator
+
+
+def source_timeout(name: str) -> float:
+    override = os.getenv(f"PAPER_SOURCE_TIMEOUT_{name.upper()}")
+    if override is not None:
+        return float(override)
+    return PAPER_SOURCES[name]['timeout'] or PAPER_SOURCE_TIMEOUT
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(normalize_words(title or ''))
+
+
+def merge_papers(papers: list, new_papers: list) -> list:
+    """Menggabungkan hasil baru ke `papers`, membuang duplikat berdasarkan DOI atau judul ternormalisasi."""
+    seen = set()
+    for paper in papers:
+        seen.update(key for key in (normalize_doi(paper.get('doi')), normalize_title(paper.get('title'))) if key)
+    merged = list(papers)
+    for paper in new_papers:
+        keys = [key for key in (normalize_doi(paper.get('doi')), normalize_title(paper.get('title'))) if key]
+        if not keys or any(key in seen for key in keys):
+            continue
+        seen.update(keys)
+        merged.append(paper)
+    return merged
+
+
+async def _fetch_source(name: str, query: str, max_results: int) -> list:
+    """Mengambil hasil langsung dari sumber (dengan batas waktunya) lalu menyimpannya ke indeks lokal."""
+    search = PAPER_SOURCES[name]['search']
+    if asyncio.iscoroutinefunction(search):
+        call = search(query, max_results)
+    else:
+        call = run_blocking(search, query, max_results, pool='papers')
+    records = await asyncio.wait_for(call, source_timeout(name))
+    try:
+        await run_blocking(paper_index.store_query_results, name, query, records, max_results, pool='index')
+    except Exception as e:
+        logger.warning(f"Paper Search: Gagal menyimpan hasil '{name}' ke indeks - {e}")
+    return records
+
+
+async def _refresh(name: str, query: str, max_results: int) -> None:
+    try:
+        await _fetch_source(name, query, max_results)
+        logger.info(f"Paper Search: Hasil '{name}' untuk '{query}' disegarkan.")
+    except Exception as e:
+        logger.warning(f"Paper Search: Penyegaran '{name}' untuk '{query}' gagal - {e!r}")
+    finally:
+        _refreshing.pop((name, paper_index.normalize_query(query)), None)
+
+
+def _schedule_refresh(name: str, query: str, max_results: int) -> None:
+    key = (name, paper_index.normalize_query(query))
+    if key not in _refreshing:
+        _refreshing[key] = asyncio.create_task(_refresh(name, query, max_results))
+
+
+async def _query_source(name: str, query: str, max_results: int):
+    """
+    Stale-while-revalidate: kueri yang pernah diambil dijawab dari indeks lokal
+    (dan disegarkan di latar belakang jika sudah melewati PAPER_INDEX_MAX_AGE);
+    kueri baru diambil langsung dari sumber.
+    """
+    try:
+        cached = await run_blocking(paper_index.get_query_results, name, query, max_results, pool='index')
+    except Exception as e:
+        logger.warning(f"Paper Search: Indeks lokal tidak bisa dibaca - {e}")
+        cached = None
+    if cached is not None:
+        records, age = cached
+        if paper_index.is_stale(age):
+            _schedule_refresh(name, query, max_results)
+        return name, records, None, True
+
+    try:
+        return name, await _fetch_source(name, query, max_results), None, False
+    except asyncio.TimeoutError:
+        logger.warning(f"Paper Search: Sumber '{name}' melewati batas {source_timeout(name):g} detik.")
+        return name, [], "waktu habis", False
+    except Exception as e:
+        logger.error(f"Paper Search: Sumber '{name}' gagal - {e}")
+        return name, [], "gagal", False
+
+
+async def search_papers(query: str, max_results: int = 3, sources=None):
+    """
+    Mencari di semua sumber terdaftar secara bersamaan. Menghasilkan
+    (nama sumber, record, error, dari_indeks) begitu tiap sumber selesai atau
+    melewati batas waktunya.
+    """
+    names = list(sources or PAPER_SOURCES)
+    for completed in asyncio.as_completed([_query_source(name, query, max_results) for name in names]):
+        yield await completed
+
+
+def format_paper(paper: dict) -> str:
+    authors = ', '.join(paper.get('authors', [])[:MAX_LISTED_AUTHORS])
+    if len(paper.get('authors', [])) > MAX_LISTED_AUTHORS:
+        authors += ", dkk."
+    lines = [f"📄 *Judul:* {paper['title']}", f"✍️ *Penulis:* {authors or '-'}"]
+    abstract = " ".join((paper.get('abstract') or '').split())
+    if abstract:
+        if len(abstract) > ABSTRACT_PREVIEW_CHARS:
+            abstract = abstract[:ABSTRACT_PREVIEW_CHARS] + "..."
+        lines.append(f"📖 *Abstrak:* _{abstract}_")
+    if paper.get('pdf_url'):
+        lines.append(f"🔗 *Link PDF:* {paper['pdf_url']}")
+    else:
+        lines.append(f"🔗 *Link Halaman:* {paper.get('url', '#')}")
+    lines.append(f"🗂️ {paper.get('source', '')}" + (f", {paper['year']}" if paper.get('year') else ""))
+    return "\n".join(lines)
+
+
+def format_search_message(query: str, papers: list, statuses: dict, finished: bool) -> str:
+    """Isi pesan hasil pencarian: status tiap sumber lalu daftar paper, dipangkas agar muat satu pesan."""
+    status_line = " · ".join(f"{PAPER_SOURCES[name]['label']} {status}" for name, status in statuses.items())
+    if finished and not papers:
+        return f"Maaf, saya tidak menemukan paper yang cocok untuk topik '{query}'.\n\n{status_line}"
+    header = f"📚 Hasil pencarian untuk '{query}'" + ("" if finished else " (masih mencari...)") + f"\n{status_line}"
+    text = header
+    for index, paper in enumerate(papers):
+        entry = "\n\n---\n\n" + format_paper(paper)
+        if len(text) + len(entry) > TELEGRAM_MESSAGE_LIMIT - 100:
+            text += f"\n\n... dan {len(papers) - index} paper lainnya."
+            break
+        text += entry
+    return text
+
+
+async def _show(bot, chat_id: int, message, text: str):
+    """Mengirim atau mengedit pesan hasil; Markdown dari judul/abstrak bisa rusak, jadi ada cadangan teks polos."""
+    try:
+        if message is None:
+            return await bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
+        await message.edit_text(text, parse_mode="Markdown")
+    except telegram.error.BadRequest as e:
+        if "not modified" in str(e).lower():
+            return message
+        if message is None:
+            return await bot.send_message(chat_id=chat_id, text=text)
+        await message.edit_text(text)
+    except telegram.error.RetryAfter as e:
+        await asyncio.sleep(e.retry_after)
+        return await _show(bot, chat_id, message, text)
+    return message
+
+
+async def stream_paper_search(bot, chat_id: int, query: str, max_results: int = 3) -> list:
+    """
+    Pencarian paper yang hasilnya tampil bertahap: satu pesan awal diedit setiap
+    kali sebuah sumber menjawab. Mengembalikan daftar paper gabungan tanpa duplikat.
+    """
+    statuses = {name: "⏳" for name in PAPER_SOURCES}
+    # Paper yang pernah ditemukan untuk kueri serupa langsung ditampilkan dari indeks lokal,
+    # sehingga hasil tetap ada meski API sumber sedang lambat atau membatasi permintaan.
+    try:
+        papers = await run_blocking(paper_index.search, query, max_results, pool='index')
+    except Exception as e:
+        logger.warning(f"Paper Search: Indeks lokal tidak bisa dibaca - {e}")
+        papers = []
+    if papers:
+        initial_text = format_search_message(query, papers, statuses, finished=False)
+    else:
+        initial_text = f"🔎 Mencari paper tentang '{query}'...\n" + " · ".join(
+            f"{source['label']} ⏳" for source in PAPER_SOURCES.values()
+        )
+    message = await _show(bot, chat_id, None, initial_text)
+    async for name, records, error, from_index in search_papers(query, max_results):
+        statuses[name] = f"❌ ({error})" if error else f"✅ {len(records)}" + (" (indeks)" if from_index else "")
+        papers = merge_papers(papers, records)
+        finished = all(status != "⏳" for status in statuses.values())
+        message = await _show(bot, chat_id, message, format_search_message(query, papers, statuses, finished))
+    return papers
+
+
+register_source('arxiv', label='arXiv')(cari_paper_ilmiah_records)
+register_source('semantic_scholar', label='Semantic Scholar')(cari_paper_semantic_scholar_records)
@@ -1,28 +1,33 @@
 import os
 import json
 import re
-import google.generativeai as genai
-from dotenv import load_dotenv
+import math
+from collections import Counter
+from agents.gemini_client import gemini_client, PRIORITY_BULK
+from agents import context_budget, language_detector
+from agents.sentence_index import normalize_words
 
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+QUIZ_MODEL_NAME = 'gemini-1.5-flash'
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+# --- KONFIGURASI PENILAIAN ESAI ---
+# Kemiripan lokal (0-1) di atas batas ini dinilai tanpa AI; jawaban kosong/terlalu pendek langsung 0.
+ESSAY_LOCAL_MATCH_THRESHOLD = float(os.getenv("ESSAY_LOCAL_MATCH_THRESHOLD", "0.8"))
+ESSAY_MIN_WORDS = int(os.getenv("ESSAY_MIN_WORDS", "3"))
 
-def generate_quiz(text: str, quiz_type: str) -> str:
+def generate_quiz(text: str, quiz_type: str, language: str = None) -> str:
     """
-    Membuat kuis dalam format JSON.
+    Membuat kuis dalam format JSON dari passage paling informatif dokumen.
     - Pilihan Ganda: {question, options, correct_answer}
     - Esai: {question, ideal_answer}
     """
     print(f" -> Agen Kuis: Memulai pembuatan kuis tipe '{quiz_type}' dalam format JSON...")
     
-    if not GEMINI_API_KEY:
+    if not gemini_client.available:
         return json.dumps({"error": "Kunci API Gemini tidak ditemukan."})
 
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        language = language or language_detector.detect_document_language(text)
+        document_text = context_budget.build_context(text, 'quiz', language)
         prompt = ""
         
         if quiz_type == "Pilihan Ganda":
@@ -31,7 +36,7 @@ def generate_quiz(text: str, quiz_type: str) -> str:
                 "Respon WAJIB dalam format JSON yang valid. JSON harus berupa sebuah array dari objek. "
                 "Setiap objek harus memiliki tiga kunci: 'question' (string), 'options' (sebuah array berisi 4 string pilihan jawaban), dan 'correct_answer' (string berisi jawaban yang benar persis seperti salah satu opsi). "
                 "JANGAN tambahkan teks atau format markdown apa pun sebelum atau sesudah blok JSON.\n\n"
-                f"--- TEKS DOKUMEN ---\n{text[:15000]}\n\n--- AKHIR TEKS ---\n\n"
+                f"--- TEKS DOKUMEN ---\n{document_text}\n\n--- AKHIR TEKS ---\n\n"
             )
         elif quiz_type == "Esai":
             prompt = (
@@ -39,16 +44,18 @@ def generate_quiz(text: str, quiz_type: str) -> str:
                 "Respon WAJIB dalam format JSON yang valid. JSON harus berupa sebuah array dari objek. "
                 "Setiap objek harus memiliki dua kunci: 'question' (string berisi pertanyaan) dan 'ideal_answer' (string berisi jawaban ideal yang komprehensif untuk pertanyaan tersebut). "
                 "JANGAN tambahkan teks atau format markdown apa pun sebelum atau sesudah blok JSON.\n\n"
-                f"--- TEKS DOKUMEN ---\n{text[:15000]}\n\n--- AKHIR TEKS ---\n\n"
+                f"--- TEKS DOKUMEN ---\n{document_text}\n\n--- AKHIR TEKS ---\n\n"
             )
         else:
             return json.dumps({"error": "Tipe kuis tidak valid."})
 
-        response = model.generate_content(prompt)
+        response_text = gemini_client.generate_sync(
+            prompt, model_name=QUIZ_MODEL_NAME, call_site='quiz', priority=PRIORITY_BULK, validate=_is_quiz_json
+        )
         
-        if response.parts:
+        if response_text:
             try:
-                cleaned_text = re.search(r'\[.*\]', response.text, re.DOTALL).group(0)
+                cleaned_text = re.search(r'\[.*\]', response_text, re.DOTALL).group(0)
                 print(" -> Kuis JSON berhasil dibuat oleh Gemini API.")
                 return cleaned_text
             except AttributeError:
@@ -61,32 +68,105 @@ def generate_quiz(text: str, quiz_type: str) -> str:
         print(f" -> Terjadi error saat memanggil Gemini API untuk kuis: {e}")
         return json.dumps({"error": f"Gagal menghubungi layanan AI: {e}"})
 
-def score_essay_answer(ideal_answer: str, user_answer: str) -> int:
-    """Membandingkan jawaban pengguna dengan jawaban ideal dan memberikan skor 1-100."""
-    print(" -> Agen Penilai: Memulai penilaian jawaban esai...")
-    if not GEMINI_API_KEY:
-        return 0
-    
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        prompt = (
-            "Anda adalah seorang asisten dosen yang tugasnya menilai jawaban esai. "
-            "Bandingkan 'Jawaban Mahasiswa' dengan 'Kunci Jawaban Ideal' berdasarkan kesamaan konsep dan substansi. "
-            "Abaikan perbedaan gaya bahasa atau panjang kalimat. Berikan skor kemiripan dari 1 hingga 100. "
-            "RESPON ANDA HANYA BOLEH BERUPA ANGKA SAJA (contoh: 85). Jangan tambahkan teks atau penjelasan lain.\n\n"
-            f"--- KUNCI JAWABAN IDEAL ---\n{ideal_answer}\n\n"
-            f"--- JAWABAN MAHASISWA ---\n{user_answer}\n\n"
-            "SKOR (1-100):"
-        )
-        response = model.generate_content(prompt)
-        
-        # Ekstrak hanya angka dari respons
-        score_text = ''.join(filter(str.isdigit, response.text))
-        if score_text:
-            score = int(score_text)
-            print(f" -> Skor yang diberikan: {score}")
-            return score
+def _is_quiz_json(response_text: str) -> bool:
+    """Respons kuis hanya di-cache jika berisi array JSON pertanyaan yang valid."""
+    match = re.search(r'\[.*\]', response_text, re.DOTALL)
+    return bool(match) and bool(json.loads(match.group(0)))
+
+
+def _essay_features(text: str) -> Counter:
+    tokens = [token for token in normalize_words(text) if len(token) > 2]
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+
+def _cosine(a: dict, b: dict) -> float:
+    dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+    norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def local_essay_similarity(items) -> list:
+    """
+    Kemiripan leksikal (0-1) tiap pasangan (jawaban ideal, jawaban pengguna):
+    kosinus TF-IDF unigram+bigram, dengan IDF dihitung dari seluruh teks sesi.
+    """
+    features = [(_essay_features(ideal), _essay_features(answer)) for ideal, answer in items]
+    document_frequency = Counter()
+    for ideal_features, answer_features in features:
+        document_frequency.update(ideal_features.keys())
+        document_frequency.update(answer_features.keys())
+    total = 2 * len(features)
+    idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    def vectorize(counts: Counter) -> dict:
+        return {term: (1 + math.log(count)) * idf[term] for term, count in counts.items()}
+
+    return [_cosine(vectorize(ideal), vectorize(answer)) for ideal, answer in features]
+
+
+def _prescreen_essay(ideal_answer: str, user_answer: str, similarity: float):
+    """Skor lokal untuk kasus yang jelas, atau None jika perlu dinilai AI."""
+    if len(normalize_words(user_answer or '')) < ESSAY_MIN_WORDS:
         return 0
-    except Exception as e:
-        print(f" -> Gagal memberikan skor: {e}")
-        return 0
\ No newline at end of file
+    if similarity >= ESSAY_LOCAL_MATCH_THRESHOLD:
+        return min(100, round(similarity * 100))
+    return None
+
+
+def _parse_batch_scores(response_text: str) -> dict:
+    """{id: skor} dari respons AI berbentuk array JSON [{"id": .., "score": ..}]."""
+    match = re.search(r'\[.*\]', response_text or '', re.DOTALL)
+    if not match:
+        return {}
+    scores = {}
+    for entry in json.loads(match.group(0)):
+        try:
+            scores[int(entry['id'])] = max(0, min(100, int(entry['score'])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return scores
+
+
+def score_essay_answers(items) -> list:
+    """
+    Menilai sekumpulan jawaban esai [(jawaban ideal, jawaban pengguna)] dengan skor 0-100.
+    Jawaban kosong dan yang jelas cocok dinilai lokal; sisanya dinilai AI dalam satu
+    permintaan. Jika AI tidak tersedia atau gagal, skor kemiripan lokal yang dipakai.
+    """
+    items = list(items)
+    print(f" -> Agen Penilai: Memulai penilaian {len(items)} jawaban esai...")
+    similarities = local_essay_similarity(items)
+    scores = [_prescreen_essay(ideal, answer, similarity) for (ideal, answer), similarity in zip(items, similarities)]
+    pending = [i for i, score in enumerate(scores) if score is None]
+    print(f" -> {len(items) - len(pending)} jawaban dinilai lokal, {len(pending)} dikirim ke AI.")
+
+    if pending and gemini_client.available:
+        try:
+            batch = [{"id": i, "ideal_answer": items[i][0], "student_answer": items[i][1]} for i in pending]
+            prompt = (
+                "Anda adalah seorang asisten dosen yang tugasnya menilai jawaban esai. "
+                "Untuk setiap item, bandingkan 'student_answer' dengan 'ideal_answer' berdasarkan kesamaan konsep dan substansi. "
+                "Abaikan perbedaan gaya bahasa atau panjang kalimat. Berikan skor kemiripan dari 1 hingga 100. "
+                "RESPON ANDA HANYA BOLEH BERUPA ARRAY JSON dengan format "
+                '[{"id": <id item>, "score": <angka 1-100>}] untuk SETIAP item. Jangan tambahkan teks atau penjelasan lain.\n\n'
+                f"--- JAWABAN YANG DINILAI ---\n{json.dumps(batch, ensure_ascii=False, indent=2)}\n\n"
+                "SKOR (JSON):"
+            )
+            response_text = gemini_client.generate_sync(
+                prompt, model_name=QUIZ_MODEL_NAME, call_site='essay_score', validate=_parse_batch_scores
+            )
+            for i, score in _parse_batch_scores(response_text).items():
+                if i in pending:
+                    scores[i] = score
+        except Exception as e:
+            print(f" -> Gagal memberikan skor lewat AI: {e}")
+
+    # Item yang tidak dinilai AI memakai skor kemiripan lokal.
+    scores = [round(similarities[i] * 100) if score is None else score for i, score in enumerate(scores)]
+    print(f" -> Skor yang diberikan: {scores}")
+    return scores
+
+
+def score_essay_answer(ideal_answer: str, user_answer: str) -> int:
+    """Membandingkan jawaban pengguna dengan jawaban ideal dan memberikan skor 0-100."""
+    return score_essay_answers([(ideal_answer, user_answer)])[0]
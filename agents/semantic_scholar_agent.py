@@ -1,53 +1,71 @@
 import requests
 import logging
+from agents import http_client
+from agents.agent_executor import run_blocking
 
 logger = logging.getLogger(__name__)
 
-def cari_paper_semantic_scholar(query: str, max_results: int = 5) -> list:
+API_URL = "https://api.semanticscholar.org/graph/v1/paper/search"
+REQUEST_TIMEOUT = 15
+
+
+def cari_paper_semantic_scholar_records(query: str, max_results: int = 5, timeout: float = REQUEST_TIMEOUT) -> list:
     """
-    Mencari paper di Semantic Scholar menggunakan API publik mereka.
+    Mencari paper di Semantic Scholar dan mengembalikan record terstruktur
+    {title, authors, abstract, url, pdf_url, doi, year, source}. Error diteruskan ke pemanggil.
     """
-    api_url = "https://api.semanticscholar.org/graph/v1/paper/search"
-    
     params = {
         'query': query,
         'limit': max_results,
-        'fields': 'title,authors,url,abstract'
-    }
-
-    headers = {
-        'User-Agent': 'AcademicTelegramBot/1.0'
+        'fields': 'title,authors,url,abstract,year,externalIds,openAccessPdf'
     }
 
     logger.info(f"Semantic Scholar Agent: Mencari dengan kueri '{query}'")
+    response = http_client.get(API_URL, params=params, timeout=(http_client.HTTP_CONNECT_TIMEOUT, timeout))
+    response.raise_for_status()
+
+    return [
+        {
+            'title': paper.get('title') or 'Tanpa Judul',
+            'authors': [author['name'] for author in paper.get('authors') or []],
+            'abstract': paper.get('abstract'),
+            'url': paper.get('url') or '#',
+            'pdf_url': (paper.get('openAccessPdf') or {}).get('url'),
+            'doi': (paper.get('externalIds') or {}).get('DOI'),
+            'year': paper.get('year'),
+            'source': 'Semantic Scholar',
+        }
+        for paper in response.json().get('data') or []
+    ]
+
 
+def cari_paper_semantic_scholar(query: str, max_results: int = 5) -> list:
+    """
+    Mencari paper di Semantic Scholar menggunakan API publik mereka.
+    """
     try:
-        response = requests.get(api_url, params=params, headers=headers)
-        response.raise_for_status()  
+        papers = cari_paper_semantic_scholar_records(query, max_results)
         
-        data = response.json()
-        
-        if not data.get('data'):
+        if not papers:
             logger.warning(f"Semantic Scholar Agent: Tidak ada hasil untuk kueri '{query}'")
             return []
 
         hasil_format = []
-        for paper in data['data']:
-            authors_list = [author['name'] for author in paper.get('authors', [])[:3]]
-            authors = ', '.join(authors_list)
-            if len(paper.get('authors', [])) > 3:
+        for paper in papers:
+            authors = ', '.join(paper['authors'][:3])
+            if len(paper['authors']) > 3:
                 authors += ", dkk."
             
 
-            abstract = paper.get('abstract', 'Tidak ada abstrak.')
-            if abstract and len(abstract) > 150:
+            abstract = paper['abstract'] or 'Tidak ada abstrak.'
+            if len(abstract) > 150:
                 abstract = abstract[:150] + "..."
 
             paper_info = (
-                f"📄 *Judul:* {paper.get('title', 'Tanpa Judul')}\n"
+                f"📄 *Judul:* {paper['title']}\n"
                 f"✍️ *Penulis:* {authors}\n"
                 f"📖 *Abstrak:* _{abstract}_\n"
-                f"🔗 *Link Halaman:* {paper.get('url', '#')}"
+                f"🔗 *Link Halaman:* {paper['url']}"
             )
             hasil_format.append(paper_info)
             
@@ -58,4 +76,9 @@ def cari_paper_semantic_scholar(query: str, max_results: int = 5) -> list:
         return [f"Gagal menghubungi Semantic Scholar: {e}"]
     except Exception as e:
         logger.error(f"Semantic Scholar Agent: Error tidak terduga - {e}")
-        return [f"Terjadi kesalahan pada agen Semantic Scholar: {e}"]
\ No newline at end of file
+        return [f"Terjadi kesalahan pada agen Semantic Scholar: {e}"]
+
+
+async def acari_paper_semantic_scholar(query: str, max_results: int = 5) -> list:
+    """Versi async cari_paper_semantic_scholar; berjalan di pool agen 'papers'."""
+    return await run_blocking(cari_paper_semantic_scholar, query, max_results, pool='papers')
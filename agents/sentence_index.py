@@ -0,0 +1,48 @@
+import re
+
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+INDEX_KEY_TOKENS = 3
+
+
+def normalize_token(word: str) -> str:
+    """Menyamakan satu kata: huruf kecil tanpa tanda baca (agar 'Hasil,' == 'hasil')."""
+    return _NON_WORD.sub('', word.lower())
+
+
+def normalize_words(text: str) -> list:
+    """Memecah teks di spasi/baris baru dan mengembalikan token yang sudah dinormalisasi."""
+    return [token for token in (normalize_token(word) for word in text.split()) if token]
+
+
+class SentenceIndex:
+    """
+    Indeks kalimat yang dikunci dengan beberapa token pertamanya.
+    Dipakai untuk menemukan semua kalimat terpilih dalam satu kali lintasan
+    atas aliran kata dokumen, tanpa mencari setiap kalimat satu per satu.
+    """
+
+    def __init__(self, sentences, key_tokens: int = INDEX_KEY_TOKENS):
+        self._by_key = {}
+        for sentence in sentences:
+            tokens = normalize_words(sentence)
+            if not tokens:
+                continue
+            key = tuple(tokens[:key_tokens])
+            self._by_key.setdefault(key, []).append((tokens, sentence))
+        # Kalimat yang lebih pendek dari key_tokens punya kunci yang lebih pendek.
+        self._key_lengths = sorted({len(key) for key in self._by_key}, reverse=True)
+
+    def __len__(self):
+        return sum(len(candidates) for candidates in self._by_key.values())
+
+    def find_all(self, tokens):
+        """Menghasilkan (awal, akhir, kalimat) untuk setiap kemunculan kalimat di daftar token."""
+        for i in range(len(tokens)):
+            for key_length in self._key_lengths:
+                candidates = self._by_key.get(tuple(tokens[i:i + key_length]))
+                if not candidates:
+                    continue
+                for sentence_tokens, sentence in candidates:
+                    end = i + len(sentence_tokens)
+                    if tokens[i:end] == sentence_tokens:
+                        yield i, end, sentence
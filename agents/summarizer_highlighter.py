@@ -1,124 +1,249 @@
 import os
 import re
-import spacy
+import hashlib
+import shutil
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from bisect import bisect_right
 import fitz
-import docx
-from docx.shared import RGBColor
-import google.generativeai as genai 
 from dotenv import load_dotenv
+from agents import document_cache, nlp_models, language_detector, llm_cache, context_budget, extractive_summarizer
+from agents.gemini_client import gemini_client, PRIORITY_BULK
+from agents.sentence_index import SentenceIndex, normalize_token
+from agents.keyword_matcher import get_matcher
+from agents.docx_highlighter import highlight_docx_package, iter_docx_paragraphs
 
 
 load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
+if not gemini_client.available:
     print("PERINGATAN: GEMINI_API_KEY tidak ditemukan di file .env. Fitur ringkasan AI tidak akan berfungsi.")
 
-print("Memuat model NLP (Spacy)...")
-nlp_en = spacy.load("en_core_web_sm")
-nlp_id = spacy.load("xx_ent_wiki_sm")
-nlp_id.add_pipe('sentencizer')
-
-
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 input_dir = os.path.join(project_root, 'input_files')
 output_dir = os.path.join(project_root, 'output_files')
 os.makedirs(output_dir, exist_ok=True)
 
+# Naikkan jika logika penilaian kalimat berubah agar hasil lama di cache tidak dipakai.
+SENTENCE_SCORER_VERSION = 6
+
+# --- KONFIGURASI PIPELINE NLP ---
+NLP_BATCH_CHARS = int(os.getenv("NLP_BATCH_CHARS", "20000"))
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "8"))
+NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))
+# Komponen yang dibaca oleh penilai kalimat: batas kalimat dan entitas.
+SCORER_PIPES = {'tok2vec', 'parser', 'senter', 'sentencizer', 'ner'}
+
+# --- KONFIGURASI MODE STREAMING (PDF BESAR) ---
+STREAM_PAGE_THRESHOLD = int(os.getenv("STREAM_PAGE_THRESHOLD", "150"))
+STREAM_WINDOW_PAGES = int(os.getenv("STREAM_WINDOW_PAGES", "10"))
+
+# --- KONFIGURASI RINGKASAN MAP-REDUCE ---
+SUMMARY_MODEL_NAME = 'gemini-1.5-flash-latest'
+# Dokumen sampai 1,5x anggaran token 'summarize' diringkas sekali jalan dengan passage
+# paling informatif (sampul/daftar isi dibuang); yang lebih panjang memakai map-reduce.
+SUMMARY_SINGLE_PASS_SLACK = float(os.getenv("SUMMARY_SINGLE_PASS_SLACK", "1.5"))
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", "20000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_CALL_TIMEOUT = float(os.getenv("SUMMARY_CALL_TIMEOUT", "180"))
+# 'ai' = Gemini (ringkasan ekstraktif lokal sebagai cadangan), 'fast' = langsung ekstraktif tanpa AI.
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "ai").lower()
+# Batas total menunggu ringkasan AI sebelum beralih ke ringkasan ekstraktif.
+SUMMARY_DEADLINE = float(os.getenv("SUMMARY_DEADLINE", "240"))
+# Rata-rata jumlah halaman per potongan; batas potongan ditentukan oleh isi halaman
+# sehingga perubahan satu halaman hanya membatalkan ringkasan potongannya sendiri.
+SUMMARY_PAGES_PER_CHUNK = int(os.getenv("SUMMARY_PAGES_PER_CHUNK", "8"))
+CHUNK_SUMMARY_VERSION = 1
+
+SECTION_HEADING_PATTERN = re.compile(
+    r'^\s*(BAB\s+[IVXLCDM]+|LATAR BELAKANG|RUMUSAN PERMASALAHAN|TUJUAN DAN MANFAAT|KAJIAN KEPUSTAKAAN|METODOLOGI PENELITIAN|PENGEMBANGAN APLIKASI|PENGUJIAN|HASIL DAN PEMBAHASAN|KESIMPULAN)\s*$', 
+    re.IGNORECASE
+)
+
 
 # --- FUNGSI-FUNGSI UTAMA ---
 def detect_language_from_text(text):
-    """Mendeteksi bahasa (en/id) dari potongan teks di dalam dokumen."""
-    from langdetect import detect
-    try:
-        snippet = text[:2000]
-        lang = detect(snippet)
-        return 'id' if lang == 'id' else 'en'
-    except Exception:
-        return 'en'
+    """Mendeteksi bahasa (en/id) dari potongan teks yang tersebar di seluruh dokumen."""
+    return language_detector.detect_document_language(text)
 
-def extract_text_from_pdf(pdf_path):
-    """Mengekstrak teks dari PDF menggunakan PyMuPDF (fitz) yang andal."""
+def iter_pdf_pages(pdf_path):
+    """Generator (nomor_halaman, teks) yang membaca PDF satu halaman demi satu halaman."""
+    doc = fitz.open(pdf_path)
     try:
-        doc = fitz.open(pdf_path)
-        text = "".join(page.get_text() for page in doc)
+        for page in doc:
+            yield page.number, page.get_text()
+    finally:
         doc.close()
-        return text
+
+
+def extract_pages_from_pdf(pdf_path):
+    """Mengekstrak teks per halaman dari PDF menggunakan PyMuPDF (fitz)."""
+    try:
+        return [text for _, text in iter_pdf_pages(pdf_path)]
     except Exception as e:
         print(f"  -> Error saat mengekstrak PDF: {e}")
-        return ""
+        return []
+
+
+def extract_text_from_pdf(pdf_path):
+    """Mengekstrak teks dari PDF menggunakan PyMuPDF (fitz) yang andal."""
+    return "".join(extract_pages_from_pdf(pdf_path))
 
 
 def extract_text_from_docx(docx_path):
-    """Mengekstrak teks dari DOCX."""
+    """Mengekstrak teks dari DOCX (word/document.xml dibaca secara streaming)."""
     try:
-        doc = docx.Document(docx_path)
-        return "\n".join([p.text for p in doc.paragraphs])
+        return "\n".join(iter_docx_paragraphs(docx_path))
     except Exception as e:
         print(f"   -> Gagal mengekstrak DOCX: {e}")
         return ""
 
 
-def get_highly_relevant_sentences(text, language='en'):
+def load_document(file_path):
+    """
+    Mengambil teks, teks per halaman, dan bahasa dokumen dari cache berbasis hash isi file.
+    Ekstraksi hanya dijalankan jika file dengan isi yang sama belum pernah diproses.
+    """
+    digest = document_cache.file_digest(file_path)
+    record = document_cache.get(digest)
+    if record and 'text' in record:
+        print(f"   -> Cache dokumen ditemukan ({digest[:12]}), ekstraksi dilewati.")
+        return record
+
+    if file_path.endswith(".pdf"):
+        pages = extract_pages_from_pdf(file_path)
+        text = "".join(pages)
+    elif file_path.endswith(".docx"):
+        text = extract_text_from_docx(file_path)
+        pages = [text]
+    else:
+        text, pages = "", []
+
+    language = detect_language_from_text(text) if text.strip() else 'en'
+    record = {
+        'digest': digest,
+        'text': text,
+        'pages': pages,
+        'language': language,
+        'page_languages': language_detector.detect_page_languages(pages, language) if len(pages) > 1 else [language] * len(pages),
+        'sentences': {},
+    }
+    if text.strip():
+        document_cache.put(digest, record)
+    return record
+
+
+def get_cached_sentences(record, language):
+    """Kalimat relevan yang sudah tersimpan di record, atau None jika belum dinilai."""
+    return record.get('sentences', {}).get(f"{language}:v{SENTENCE_SCORER_VERSION}")
+
+
+def store_document_sentences(record, language, sentences):
+    """Menyimpan hasil penilaian kalimat ke record dan cache dokumen."""
+    record.setdefault('sentences', {})[f"{language}:v{SENTENCE_SCORER_VERSION}"] = sentences
+    document_cache.update(record['digest'], sentences=record['sentences'])
+
+
+def get_document_sentences(record, language):
+    """Mengembalikan kalimat relevan dari cache, atau menilainya sekali lalu menyimpannya."""
+    sentences = get_cached_sentences(record, language)
+    if sentences is None:
+        sections = language_detector.group_sections(record.get('page_languages') or [])
+        if len(sections) > 1:
+            sentences = get_sectioned_sentences(record['pages'], sections)
+        else:
+            sentences = get_highly_relevant_sentences(record['text'], language)
+        store_document_sentences(record, language, sentences)
+    else:
+        print(f"  -> Memakai {len(sentences)} kalimat relevan dari cache.")
+    return sentences
+
+
+def split_text_into_batches(text, max_chars=None):
+    """
+    Memecah teks menjadi potongan (teks, offset) di batas paragraf/baris
+    agar setiap potongan aman di bawah nlp.max_length dan bisa diproses paralel.
+    """
+    max_chars = max_chars or NLP_BATCH_CHARS
+    batches = []
+    start = 0
+    while start < len(text):
+        end = start + max_chars
+        if end >= len(text):
+            batches.append((text[start:], start))
+            break
+        cut = text.rfind('\n\n', start, end)
+        if cut > start:
+            cut += 2
+        else:
+            cut = text.rfind('\n', start, end) + 1 or text.rfind(' ', start, end) + 1
+            if cut <= start:
+                cut = end
+        batches.append((text[start:cut], start))
+        start = cut
+    return batches
+
+
+def iter_sentence_spans(text, nlp, matcher=None):
+    """
+    Menjalankan nlp.pipe atas potongan teks dan menghasilkan (offset_awal, kalimat, kategori_kata_kunci).
+    Komponen yang tidak dibaca penilai (tagger, lemmatizer, dll.) dimatikan. Jika `matcher`
+    diberikan, kata kunci semua kalimat dalam satu potongan dicari dengan satu kali pindai.
+    """
+    disabled = [name for name in nlp.pipe_names if name not in SCORER_PIPES]
+    docs = nlp.pipe(
+        split_text_into_batches(text),
+        as_tuples=True,
+        batch_size=NLP_BATCH_SIZE,
+        n_process=NLP_N_PROCESS,
+        disable=disabled,
+    )
+    for doc, offset in docs:
+        sents = list(doc.sents)
+        if matcher is not None:
+            categories = matcher.categorize(doc.text, [(sent.start_char, sent.end_char) for sent in sents])
+        else:
+            categories = [set() for _ in sents]
+        for sent, found in zip(sents, categories):
+            yield offset + sent.start_char, sent, found
+
+
+def score_relevant_sentences(text, language='en', skip_front_matter=True):
     """
     (Versi 4 - Akurasi Tinggi) Logika yang sangat selektif untuk menyorot
     hanya bagian paling penting dari dokumen akademis.
+    Mengembalikan [(kalimat, offset_awal)] sesuai urutan di dokumen.
     """
-    print("  -> Menilai kalimat dengan logika akurasi tinggi (v4)...")
-    nlp = nlp_id if language == 'id' else nlp_en
+    nlp = nlp_models.get_nlp(language)
     
     SCORE_THRESHOLD = 3  
     MIN_SENTENCE_LENGTH_WORDS = 12 
+    FRONT_MATTER_SENTENCES = 30
 
 
-    HIGH_IMPACT_KEYWORDS_ID = {'hasil', 'kesimpulan', 'metode', 'analisis', 'temuan', 'membuktikan', 'menunjukkan bahwa'}
-    MEDIUM_IMPACT_KEYWORDS_ID = {'penelitian', 'tujuan', 'latar belakang', 'data', 'implikasi', 'hipotesis', 'evaluasi', 'responden', 'dampak', 'signifikan'}
-    
-    HIGH_IMPACT_KEYWORDS_EN = {'result', 'conclusion', 'method', 'analysis', 'finding', 'proves', 'shows that'}
-    MEDIUM_IMPACT_KEYWORDS_EN = {'research', 'objective', 'background', 'data', 'implication', 'hypothesis', 'evaluation', 'respondent', 'impact', 'significant'}
-    
-    high_keywords = HIGH_IMPACT_KEYWORDS_ID if language == 'id' else HIGH_IMPACT_KEYWORDS_EN
-    medium_keywords = MEDIUM_IMPACT_KEYWORDS_ID if language == 'id' else MEDIUM_IMPACT_KEYWORDS_EN
+    # Kata kunci high/medium/boilerplate dimuat dari agents/lexicons/<bahasa>.json.
+    matcher = get_matcher(language)
 
     IMPORTANT_ENTITY_TYPES = {"PERSON", "ORG", "PRODUCT", "EVENT", "LAW", "FAC", "LOC", "GPE"}
     DATA_ENTITY_TYPES = {"CARDINAL", "MONEY", "QUANTITY", "PERCENT"}
     
-    relevant_sentences = set()
+    # kalimat -> offset kemunculan pertama (dict menjaga urutan dokumen)
+    relevant_sentences = {}
 
     # --- ATURAN 1 (DIPERBAIKI): Analisis Struktural dengan Filter ---
-    lines = text.split('\n')
-    HEADING_PATTERN = re.compile(
-        r'^\s*(BAB\s+[IVXLCDM]+|LATAR BELAKANG|RUMUSAN PERMASALAHAN|TUJUAN DAN MANFAAT|KAJIAN KEPUSTAKAAN|METODOLOGI PENELITIAN|PENGEMBANGAN APLIKASI|PENGUJIAN|HASIL DAN PEMBAHASAN|KESIMPULAN)\s*$', 
-        re.IGNORECASE
-    )
-
-    for i, line in enumerate(lines):
-        if HEADING_PATTERN.match(line.strip()):
-            for next_line in lines[i+1:]:
-                if next_line.strip():
-                    doc_line = nlp(next_line.strip())
-                    first_sentence = next(doc_line.sents, None)
-                    # Filter: Hanya ambil kalimat pertama jika cukup panjang & substantif
-                    if first_sentence and len(first_sentence.text.strip().split()) > 8:
-                        relevant_sentences.add(first_sentence.text.strip())
-                    break 
-
-    
-    doc = nlp(text)
-    all_sentences = list(doc.sents)
-    
-    
-    start_index = 0
-    BOILERPLATE_KEYWORDS = {'abstrak', 'kata kunci', 'daftar isi', 'lembar pengesahan', 'kata pengantar', 'ucapan terima kasih', 'npm', 'jurusan', 'program studi', 'tugas akhir'}
-    for i, sent in enumerate(all_sentences[:30]): # Cek 30 kalimat pertama
-        sent_lower = sent.text.lower()
-        if len(sent.text.strip().split()) < 10 or any(kw in sent_lower for kw in BOILERPLATE_KEYWORDS):
-            start_index = i + 1
-        
-    for sent in all_sentences[start_index:]:
+    # Hanya posisi baris setelah judul bab yang dicatat; kalimatnya diambil
+    # dari hasil nlp.pipe di bawah sehingga tidak ada pemanggilan nlp() tambahan.
+    heading_targets = []
+    awaiting_heading_line = False
+    offset = 0
+    for line in text.split('\n'):
+        if awaiting_heading_line and line.strip():
+            heading_targets.append(offset + len(line) - len(line.lstrip()))
+            awaiting_heading_line = False
+        if SECTION_HEADING_PATTERN.match(line.strip()):
+            awaiting_heading_line = True
+        offset += len(line) + 1
+
+    def score_sentence(sent, sent_start, keywords):
         score = 0
-        text_lower = sent.text.lower()
         
         
         if len(sent.text.split()) > MIN_SENTENCE_LENGTH_WORDS: score += 1
@@ -126,83 +251,402 @@ def get_highly_relevant_sentences(text, language='en'):
         if any(ent.label_ in DATA_ENTITY_TYPES for ent in sent.ents): score += 1
 
         
-        if any(keyword in text_lower for keyword in high_keywords): score += 2
-        elif any(keyword in text_lower for keyword in medium_keywords): score += 1
+        if 'high' in keywords: score += 2
+        elif 'medium' in keywords: score += 1
 
         if score >= SCORE_THRESHOLD:
-            relevant_sentences.add(sent.text.strip())
-            
+            relevant_sentences.setdefault(sent.text.strip(), sent_start)
+
+    # Kalimat awal ditahan dulu untuk menentukan di mana halaman sampul/abstrak berakhir.
+    front_matter = []
+    start_index = 0
+    target_pos = 0
+    for sent_start, sent, keywords in iter_sentence_spans(text, nlp, matcher):
+        sent_end = sent_start + len(sent.text)
+        while target_pos < len(heading_targets) and heading_targets[target_pos] < sent_end:
+            if heading_targets[target_pos] >= sent_start:
+                # Filter: Hanya ambil kalimat pertama jika cukup panjang & substantif
+                if len(sent.text.strip().split()) > 8:
+                    relevant_sentences.setdefault(sent.text.strip(), sent_start)
+            target_pos += 1
+
+        if skip_front_matter and len(front_matter) < FRONT_MATTER_SENTENCES:
+            if len(sent.text.strip().split()) < 10 or 'boilerplate' in keywords:
+                start_index = len(front_matter) + 1
+            front_matter.append((sent, sent_start, keywords))
+            if len(front_matter) == FRONT_MATTER_SENTENCES:
+                for buffered in front_matter[start_index:]:
+                    score_sentence(*buffered)
+            continue
+
+        score_sentence(sent, sent_start, keywords)
+
+    if len(front_matter) < FRONT_MATTER_SENTENCES:
+        for buffered in front_matter[start_index:]:
+            score_sentence(*buffered)
+
+    return list(relevant_sentences.items())
+
+
+def get_highly_relevant_sentences(text, language='en'):
+    """Mengembalikan daftar kalimat paling relevan dari seluruh teks dokumen."""
+    print("  -> Menilai kalimat dengan logika akurasi tinggi (v4)...")
+    relevant_sentences = [sentence for sentence, _ in score_relevant_sentences(text, language)]
+    print(f"  -> Total {len(relevant_sentences)} kalimat AKURAT ditemukan untuk disorot.")
+    return relevant_sentences
+
+
+def get_sectioned_sentences(pages, sections):
+    """
+    Menilai dokumen campuran bahasa: setiap bagian [(bahasa, halaman_awal, halaman_akhir)]
+    diproses dengan model spaCy dan leksikon bahasanya sendiri.
+    """
+    print(f"  -> Dokumen campuran bahasa: {', '.join(f'{lang.upper()} hal. {first + 1}-{last + 1}' for lang, first, last in sections)}")
+    relevant_sentences = {}
+    for i, (language, first, last) in enumerate(sections):
+        section_text = "".join(pages[first:last + 1])
+        for sentence, _ in score_relevant_sentences(section_text, language, skip_front_matter=(i == 0)):
+            relevant_sentences.setdefault(sentence, None)
     print(f"  -> Total {len(relevant_sentences)} kalimat AKURAT ditemukan untuk disorot.")
     return list(relevant_sentences)
 
 
-def highlight_pdf_file(pdf_path, output_path, language='en'):
-    """Membuat salinan PDF dengan sorotan visual pada kalimat yang paling relevan."""
+def iter_relevant_sentences(pages, language='en', window_pages=None, page_languages=None):
+    """
+    Penilaian bertahap untuk dokumen sangat besar. Halaman dibaca dari iterator
+    (nomor_halaman, teks) dan dinilai per jendela beberapa halaman, sehingga memori
+    spaCy tetap terbatas dan hasil tiap halaman tersedia begitu jendelanya selesai.
+    Halaman terakhir setiap jendela ikut dinilai ulang di jendela berikutnya agar
+    kalimat yang terpotong batas jendela tetap utuh. Jika `page_languages` diberikan,
+    jendela juga dipotong di pergantian bahasa dan dinilai dengan model bahasanya.
+    Menghasilkan (nomor_halaman, [kalimat]).
+    """
+    window_pages = window_pages or STREAM_WINDOW_PAGES
+    seen = set()
+    window = []
+    carried = 0
+    window_language = language
+    first_window = True
+
+    def score_window():
+        text = "".join(page_text for _, page_text in window)
+        page_starts, offset = [], 0
+        for _, page_text in window:
+            page_starts.append(offset)
+            offset += len(page_text)
+
+        by_page = {page_no: [] for page_no, _ in window}
+        for sentence, sent_start in score_relevant_sentences(text, window_language, skip_front_matter=first_window):
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            by_page[window[bisect_right(page_starts, sent_start) - 1][0]].append(sentence)
+
+        for i, (page_no, _) in enumerate(window):
+            # Halaman bawaan jendela sebelumnya hanya dilaporkan lagi jika ada kalimat baru.
+            if i >= carried or by_page[page_no]:
+                yield page_no, by_page[page_no]
+
+    for page_no, page_text in pages:
+        page_language = page_languages[page_no] if page_languages else language
+        if page_language != window_language:
+            # Bagian berbahasa lain dimulai: selesaikan jendela ini tanpa halaman bawaan.
+            if len(window) > carried:
+                yield from score_window()
+                first_window = False
+            window, carried, window_language = [], 0, page_language
+        window.append((page_no, page_text))
+        if len(window) - carried >= window_pages:
+            yield from score_window()
+            first_window = False
+            window = window[-1:]
+            carried = 1
+
+    if len(window) > carried:
+        yield from score_window()
+
+
+def build_pdf_word_index(pages):
+    """
+    Membangun aliran kata ternormalisasi untuk halaman-halaman PDF (sekali per halaman)
+    beserta posisinya: (nomor_halaman, blok, baris, Rect).
+    """
+    tokens, positions = [], []
+    for page in pages:
+        for x0, y0, x1, y1, word, block_no, line_no, _ in page.get_text("words"):
+            token = normalize_token(word)
+            if token:
+                tokens.append(token)
+                positions.append((page.number, block_no, line_no, fitz.Rect(x0, y0, x1, y1)))
+    return tokens, positions
+
+
+def locate_sentence_quads(pages, sentence_index):
+    """
+    Memetakan setiap kemunculan kalimat ke quad sorotannya dalam satu lintasan linear.
+    Kata pada baris yang sama digabung menjadi satu quad; kalimat yang terpotong
+    baris atau halaman tetap ditemukan. Hasil: {nomor_halaman: [[quad, ...] per kalimat]}.
+    """
+    tokens, positions = build_pdf_word_index(pages)
+    quads_per_page = {}
+    for start, end, _ in sentence_index.find_all(tokens):
+        line_rects = {}
+        for page_no, block_no, line_no, rect in positions[start:end]:
+            key = (page_no, block_no, line_no)
+            line_rects[key] = line_rects[key] | rect if key in line_rects else fitz.Rect(rect)
+
+        sentence_quads = {}
+        for (page_no, _, _), rect in line_rects.items():
+            sentence_quads.setdefault(page_no, []).append(rect.quad)
+        for page_no, quads in sentence_quads.items():
+            quads_per_page.setdefault(page_no, []).append(quads)
+    return quads_per_page
+
+
+def section_page_languages(page_languages):
+    """Label bahasa per halaman setelah bagian pendek digabung (sama dengan get_sectioned_sentences)."""
+    labels = list(page_languages)
+    for language, first, last in language_detector.group_sections(page_languages):
+        labels[first:last + 1] = [language] * (last - first + 1)
+    return labels
+
+
+def highlight_pdf_streaming(doc, language='en', page_texts=None, page_languages=None):
+    """
+    Menilai dan menyorot PDF besar halaman demi halaman lewat iter_relevant_sentences.
+    Kalimat tiap halaman dicari di halaman itu dan halaman berikutnya (kalimat lintas halaman).
+    Teks halaman yang sudah diekstrak (record dokumen) dipakai ulang jika diberikan.
+    Mengembalikan semua kalimat yang disorot.
+    """
+    print(f"  -> Mode streaming: menilai {doc.page_count} halaman per {STREAM_WINDOW_PAGES} halaman...")
+    highlighted = []
+    if page_texts is not None:
+        pages = enumerate(page_texts)
+    else:
+        pages = ((page.number, page.get_text()) for page in doc)
+    if page_languages:
+        page_languages = section_page_languages(page_languages)
+    for page_no, sentences in iter_relevant_sentences(pages, language, page_languages=page_languages):
+        if not sentences:
+            continue
+        highlighted.extend(sentences)
+        nearby_pages = [doc[n] for n in range(page_no, min(page_no + 2, doc.page_count))]
+        for quad_page_no, sentence_quads in locate_sentence_quads(nearby_pages, SentenceIndex(sentences)).items():
+            page = doc[quad_page_no]
+            for quads in sentence_quads:
+                page.add_highlight_annot(quads=quads).update()
+    print(f"  -> Total {len(highlighted)} kalimat disorot dalam mode streaming.")
+    return highlighted
+
+
+def highlight_pdf_file(pdf_path, output_path, language='en', sentences_to_highlight=None, record=None):
+    """
+    Membuat salinan PDF dengan sorotan visual pada kalimat yang paling relevan.
+    Jika kalimat tidak diberikan dan PDF sangat besar, penilaian berjalan dalam mode streaming
+    (memakai teks dan bahasa per halaman dari `record` jika ada).
+    Mengembalikan daftar kalimat yang disorot.
+    """
     print(f"  -> Membuat PDF dengan sorotan untuk: {os.path.basename(pdf_path)}")
     doc = fitz.open(pdf_path)
-    full_text = "".join(page.get_text() for page in doc)
-    sentences_to_highlight = get_highly_relevant_sentences(full_text, language)
+
+    if sentences_to_highlight is None and doc.page_count > STREAM_PAGE_THRESHOLD:
+        page_texts = record['pages'] if record and len(record.get('pages') or []) == doc.page_count else None
+        page_languages = record.get('page_languages') if page_texts is not None else None
+        sentences_to_highlight = highlight_pdf_streaming(doc, language, page_texts, page_languages)
+        doc.save(output_path, garbage=4, deflate=True, clean=True)
+        doc.close()
+        print(f"  -> PDF dengan sorotan disimpan ke {os.path.basename(output_path)}")
+        return sentences_to_highlight
+
+    if sentences_to_highlight is None:
+        sentences_to_highlight = get_document_sentences(load_document(pdf_path), language)
 
     if not sentences_to_highlight:
         print("  -> Tidak ada kalimat relevan untuk disorot. Menyimpan salinan asli.")
         doc.save(output_path)
         doc.close()
-        return
+        return sentences_to_highlight
 
     print(f"  -> Menyorot {len(sentences_to_highlight)} kalimat pada PDF...")
-    for page in doc:
-        for text_fragment in sentences_to_highlight:
-            for inst in page.search_for(text_fragment):
-                page.add_highlight_annot(inst).update()
+    quads_per_page = locate_sentence_quads(doc, SentenceIndex(sentences_to_highlight))
+    for page_no, sentence_quads in quads_per_page.items():
+        page = doc[page_no]
+        for quads in sentence_quads:
+            page.add_highlight_annot(quads=quads).update()
                 
     doc.save(output_path, garbage=4, deflate=True, clean=True)
     doc.close()
     print(f"  -> PDF dengan sorotan disimpan ke {os.path.basename(output_path)}")
+    return sentences_to_highlight
 
 
-def highlight_word_file(docx_path, output_path, language='en'):
+def highlight_word_file(docx_path, output_path, language='en', sentences_to_highlight=None):
     """
-    Membuat salinan DOCX dengan penandaan visual pada paragraf relevan.
-    CATATAN: Proses ini mungkin menghilangkan gambar dan format kompleks lainnya.
+    Membuat salinan DOCX dengan penandaan visual (tebal + merah) pada kalimat relevan.
+    Gambar, style, dan bagian paket lainnya disalin tanpa perubahan.
     """
     print(f"  -> Membuat DOCX dengan sorotan untuk: {os.path.basename(docx_path)}")
-    try:
-        original_doc = docx.Document(docx_path)
-    except Exception as e:
-        print(f"  -> Gagal membuka file DOCX: {e}")
-        return
-
-    full_text = "\n".join([p.text for p in original_doc.paragraphs])
-    sentences_to_highlight = get_highly_relevant_sentences(full_text, language)
+    if sentences_to_highlight is None:
+        sentences_to_highlight = get_document_sentences(load_document(docx_path), language)
 
     if not sentences_to_highlight:
         print("  -> Tidak ada kalimat relevan untuk ditandai. Menyimpan salinan asli.")
-        original_doc.save(output_path)
+        shutil.copyfile(docx_path, output_path)
         return
 
-    print(f"  -> Menyorot paragraf yang mengandung {len(sentences_to_highlight)} kalimat relevan...")
-    
-    for para in original_doc.paragraphs:
-        if any(sent in para.text for sent in sentences_to_highlight):
-            for run in para.runs:
-                run.bold = True
-                run.font.color.rgb = RGBColor(200, 0, 0)
-    
-    original_doc.save(output_path)
-    print(f"  -> DOCX dengan sorotan disimpan ke {os.path.basename(output_path)}")
+    print(f"  -> Menandai {len(sentences_to_highlight)} kalimat relevan...")
+    try:
+        matches = highlight_docx_package(docx_path, output_path, sentences_to_highlight)
+    except Exception as e:
+        print(f"  -> Gagal memproses file DOCX: {e}")
+        return
+    print(f"  -> {matches} kemunculan kalimat ditandai. DOCX dengan sorotan disimpan ke {os.path.basename(output_path)}")
     
 
-def summarize_with_ai_model(text, language='en'):
-    """Membuat ringkasan "pintar" menggunakan Google Gemini API."""
+def split_into_summary_chunks(text, pages=None, max_chars=None):
+    """
+    Memecah dokumen untuk ringkasan map-reduce. PDF dipotong di batas halaman,
+    dokumen lain di judul bab. Semua batas ditentukan oleh hash isi unit, bukan
+    posisinya: halaman yang hash-nya habis dibagi SUMMARY_PAGES_PER_CHUNK menutup
+    potongan, dan potongan yang melebihi max_chars dipotong setelah unit dengan
+    hash terendah di dalamnya. Suntingan di awal dokumen hanya menggeser potongan
+    di sekitarnya, sehingga ringkasan potongan lain tetap ditemukan di cache.
+    Unit tunggal yang tetap lebih panjang dari max_chars dipecah lagi.
+    """
+    max_chars = max_chars or SUMMARY_CHUNK_CHARS
+    if pages:
+        units = pages
+    else:
+        units, current = [], []
+        for line in text.splitlines(keepends=True):
+            if SECTION_HEADING_PATTERN.match(line.strip()) and current:
+                units.append("".join(current))
+                current = []
+            current.append(line)
+        if current:
+            units.append("".join(current))
+
+    chunks, current, size = [], [], 0
+    for unit in units:
+        unit_hash = int(hashlib.sha1(unit.encode('utf-8')).hexdigest(), 16)
+        current.append((unit, unit_hash))
+        size += len(unit)
+        while size > max_chars and len(current) > 1:
+            cut = min(range(len(current) - 1), key=lambda i: current[i][1]) + 1
+            chunks.append("".join(part for part, _ in current[:cut]))
+            current = current[cut:]
+            size = sum(len(part) for part, _ in current)
+        if pages and unit_hash % SUMMARY_PAGES_PER_CHUNK == 0:
+            chunks.append("".join(part for part, _ in current))
+            current, size = [], 0
+    if current:
+        chunks.append("".join(part for part, _ in current))
+
+    final_chunks = []
+    for chunk in chunks:
+        if len(chunk) > max_chars:
+            final_chunks.extend(part for part, _ in split_text_into_batches(chunk, max_chars))
+        elif chunk.strip():
+            final_chunks.append(chunk)
+    return final_chunks
+
+
+def _language_name(language):
+    return 'Indonesia' if language == 'id' else 'Inggris'
+
+
+def _cached_generate(model, prompt):
+    """Memanggil model lewat cache respons LLM; string kosong jika API tidak memberikan hasil."""
+    if model is None:
+        return gemini_client.generate_sync(
+            prompt, model_name=SUMMARY_MODEL_NAME, call_site='summarize',
+            priority=PRIORITY_BULK, timeout=SUMMARY_CALL_TIMEOUT,
+        )
+
+    def generate():
+        response = model.generate_content(prompt)
+        return response.text if response.parts else ''
+    model_name = getattr(model, 'model_name', type(model).__name__)
+    return llm_cache.get_or_generate('summarize', model_name, prompt, generate)
+
+
+def _generate_text(model, prompt):
+    text = _cached_generate(model, prompt)
+    if not text:
+        raise ValueError("API Gemini tidak memberikan hasil.")
+    return text
+
+
+def summarize_chunk(model, chunk, language, index, total):
+    """Ringkasan parsial (tahap map) untuk satu potongan, memakai cache jika isinya sama."""
+    chunk_key = hashlib.sha256(f"{CHUNK_SUMMARY_VERSION}:{language}:{chunk}".encode('utf-8')).hexdigest()
+    cached = document_cache.get(f"chunk-{chunk_key}")
+    if cached:
+        return cached['summary']
+
+    prompt = (
+        "Anda adalah seorang analis riset ahli. Teks berikut adalah SATU BAGIAN dari dokumen yang lebih panjang "
+        f"(bagian {index + 1} dari {total}).\n\n"
+        "Ringkas bagian ini dalam poin-poin padat. Catat semua metodologi, data, temuan, dan kesimpulan yang muncul; "
+        "jangan menambahkan informasi dari luar teks.\n"
+        f"Gunakan Bahasa {_language_name(language)}.\n\n"
+        "--- TEKS BAGIAN ---\n"
+        f"{chunk}"
+        "\n\n--- AKHIR BAGIAN ---\n\n"
+        "**Ringkasan Bagian:**"
+    )
+    summary = _generate_text(model, prompt)
+    document_cache.put(f"chunk-{chunk_key}", {'summary': summary})
+    return summary
+
+
+def summarize_with_map_reduce(model, text, language='en', pages=None):
+    """
+    Meringkas dokumen panjang: setiap potongan diringkas paralel (dibatasi
+    SUMMARY_CONCURRENCY), lalu ringkasan parsial digabung dalam satu panggilan akhir.
+    """
+    chunks = split_into_summary_chunks(text, pages)
+    print(f"   -> Dokumen panjang: meringkas {len(chunks)} bagian secara paralel (maks {SUMMARY_CONCURRENCY})...")
+    with ThreadPoolExecutor(max_workers=max(1, SUMMARY_CONCURRENCY)) as executor:
+        partial_summaries = list(executor.map(
+            lambda item: summarize_chunk(model, item[1], language, item[0], len(chunks)),
+            enumerate(chunks),
+        ))
+
+    joined = "\n\n".join(f"### Bagian {i + 1}\n{summary}" for i, summary in enumerate(partial_summaries))
+    prompt = (
+        "Anda adalah seorang analis riset ahli. Berikut adalah ringkasan per bagian dari satu dokumen, sesuai urutan aslinya. "
+        "Gabungkan menjadi satu ringkasan analitis yang komprehensif.\n\n"
+        "**Instruksi Spesifik:**\n"
+        "1.  **Kedalaman**: Buat ringkasan yang mendalam dan informatif. JANGAN terlalu singkat. Tangkap poin-poin utama, metodologi, temuan kunci, dan kesimpulan.\n"
+        "2.  **Struktur**: Awali dengan paragraf pembuka singkat, diikuti dengan poin-poin (bullet points) untuk detailnya.\n"
+        f"3.  **Bahasa**: Buat ringkasan dalam Bahasa {_language_name(language)}.\n\n"
+        "--- RINGKASAN PER BAGIAN ---\n"
+        f"{joined}"
+        "\n\n--- AKHIR RINGKASAN ---\n\n"
+        "**Ringkasan Analitis Komprehensif:**"
+    )
+    return _generate_text(model, prompt)
+
+
+def summarize_with_ai_model(text, language='en', pages=None, model=None):
+    """
+    Membuat ringkasan "pintar" menggunakan Google Gemini API.
+    Dokumen yang jauh melebihi anggaran token 'summarize' diringkas secara map-reduce.
+    `model` bisa diganti dengan objek lain yang punya generate_content() (misal stub lokal untuk pengujian).
+    """
     print("   -> Menganalisis teks untuk mendapatkan konteks sebelum meringkas...")
     
-    if not GEMINI_API_KEY:
+    if model is None and not gemini_client.available:
         return "Gagal: Kunci API Gemini tidak ditemukan di file .env."
     if len(text.strip().split()) < 150: 
         return "Gagal: Teks terlalu pendek untuk diringkas secara efektif oleh AI."
     
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
+        budget = context_budget.budget_for('summarize')
+        if context_budget.count_tokens(text) > budget * SUMMARY_SINGLE_PASS_SLACK:
+            return summarize_with_map_reduce(model, text, language, pages)
+        document_text = context_budget.fit_to_budget(text, budget, language)
         
         prompt = (
             "Anda adalah seorang analis riset ahli. Tugas Anda adalah membaca teks berikut dan membuat ringkasan analitis yang komprehensif.\n\n"
@@ -210,57 +654,88 @@ def summarize_with_ai_model(text, language='en'):
             "1.  **Kedalaman**: Buat ringkasan yang mendalam dan informatif. JANGAN terlalu singkat. Tangkap poin-poin utama, metodologi, temuan kunci, dan kesimpulan.\n"
             "2.  **Struktur**: Awali dengan paragraf pembuka singkat, diikuti dengan poin-poin (bullet points) untuk detailnya.\n"
             "3.  **Bahasa**: Buat ringkasan dalam Bahasa "
-            f"{'Indonesia' if language == 'id' else 'Inggris'}.\n\n"
+            f"{_language_name(language)}.\n\n"
             "--- TEKS DOKUMEN ---\n"
-            f"{text[:25000]}"
+            f"{document_text}"
             "\n\n--- AKHIR TEKS ---\n\n"
             "**Ringkasan Analitis Komprehensif:**"
         )
         
-        response = model.generate_content(prompt)
+        summary = _cached_generate(model, prompt)
         
-        return response.text if response.parts else "Gagal: API Gemini tidak memberikan hasil."
+        return summary or "Gagal: API Gemini tidak memberikan hasil."
 
     except Exception as e:
         print(f"   -> Terjadi error saat memanggil Gemini API: {e}")
         return f"Gagal: Terjadi error saat menghubungi layanan AI. ({e})"
 
+def summarize_document(text, language='en', pages=None):
+    """
+    Ringkasan untuk process_file sesuai SUMMARY_MODE. Pada mode 'ai', ringkasan
+    ekstraktif lokal dipakai jika kunci API tidak ada, AI gagal, atau SUMMARY_DEADLINE
+    terlewati (panggilan AI tetap selesai di latar belakang dan mengisi cache).
+    """
+    if SUMMARY_MODE == 'fast':
+        print("   -> Mode ringkasan cepat: memakai ringkasan ekstraktif lokal...")
+        return extractive_summarizer.summarize(text, language) or "Gagal: Tidak ada kalimat yang layak diringkas."
+
+    summary = None
+    if gemini_client.available:
+        print("   -> Menggunakan model AI (Gemini API) untuk ringkasan pintar...")
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(summarize_with_ai_model, text, language, pages)
+        executor.shutdown(wait=False)
+        try:
+            summary = future.result(timeout=SUMMARY_DEADLINE)
+        except FuturesTimeoutError:
+            print(f"   -> Ringkasan AI melewati batas {SUMMARY_DEADLINE:.0f} detik.")
+    if summary and not summary.startswith("Gagal:"):
+        return summary
+
+    print("   -> Beralih ke ringkasan ekstraktif lokal...")
+    return extractive_summarizer.summarize(text, language) or summary or "Gagal: Kunci API Gemini tidak ditemukan di file .env."
+
 def process_file(file_path):
     """Fungsi utama yang memproses satu file dan MENGEMBALIKAN path outputnya."""
     filename = os.path.basename(file_path)
     print(f"--- Memulai proses untuk: {filename} ---")
-    text, file_type = "", ""
+    file_type = ""
     if filename.endswith(".pdf"):
-        text = extract_text_from_pdf(file_path)
         file_type = "pdf"
     elif filename.endswith(".docx"):
-        text = extract_text_from_docx(file_path)
         file_type = "docx"
+
+    record = load_document(file_path)
+    text = record['text']
     
     if not text or not text.strip(): 
         print(f"Tidak ada teks yang bisa diekstrak dari {filename}. Proses dihentikan."); 
         return None, None
 
-    language = detect_language_from_text(text)
+    language = record['language']
     print(f"   -> Bahasa terdeteksi: {language.upper()}")
     
     output_base_name = os.path.splitext(filename)[0]
     
-    print("   -> Menggunakan model AI (Gemini API) untuk ringkasan pintar...")
-    summary = summarize_with_ai_model(text, language)
+    summary = summarize_document(text, language, record['pages'] if file_type == "pdf" else None)
     
     summary_path = os.path.join(output_dir, f"summary_{output_base_name}.txt")
     with open(summary_path, 'w', encoding='utf-8') as f:
         f.write(summary)
-    print(f"   -> Ringkasan AI disimpan ke {os.path.basename(summary_path)}")
+    print(f"   -> Ringkasan disimpan ke {os.path.basename(summary_path)}")
 
     highlighted_path = None
     if file_type == "pdf":
         highlighted_path = os.path.join(output_dir, f"highlighted_{output_base_name}.pdf")
-        highlight_pdf_file(file_path, highlighted_path, language)
+        sentences = get_cached_sentences(record, language)
+        if sentences is None and len(record['pages']) <= STREAM_PAGE_THRESHOLD:
+            sentences = get_document_sentences(record, language)
+        highlighted = highlight_pdf_file(file_path, highlighted_path, language, sentences, record)
+        if sentences is None:
+            store_document_sentences(record, language, highlighted)
     elif file_type == "docx":
         highlighted_path = os.path.join(output_dir, f"highlighted_{output_base_name}.docx")
-        highlight_word_file(file_path, highlighted_path, language)
+        highlight_word_file(file_path, highlighted_path, language, get_document_sentences(record, language))
     
     print(f"--- Selesai memproses: {filename} ---\n")
     
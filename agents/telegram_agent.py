@@ -3,13 +3,11 @@ import os
 project_root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root_path)
 import logging
-import threading
 import asyncio
 import json
 import re
 import telegram
 import docx
-import google.generativeai as genai 
 from datetime import datetime
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, WebAppInfo, InlineKeyboardButton, InlineKeyboardMarkup, CallbackQuery
 from telegram.ext import (
@@ -24,12 +22,22 @@ from telegram.ext import (
 )
 from telegram.request import HTTPXRequest
 from dotenv import load_dotenv
-from agents.google_calendar_agent import create_calendar_event
-from agents.summarizer_highlighter import process_file, extract_text_from_pdf, extract_text_from_docx
-from agents.quiz_generator import generate_quiz, score_essay_answer
-from agents.paper_finder_agent import cari_paper_ilmiah
-from agents.intent_router_agent import classify_intent
-from agents.semantic_scholar_agent import cari_paper_semantic_scholar
+from agents.google_calendar_agent import acreate_calendar_event
+from agents.summarizer_highlighter import process_file, load_document
+from agents.quiz_generator import generate_quiz
+from agents.intent_router_agent import aclassify_intent
+from agents.local_intent_classifier import clean_reminder_details
+from agents.paper_search import stream_paper_search
+from agents import context_budget, http_client
+from agents.gemini_client import gemini_client
+from agents.agent_executor import run_blocking, agent_executor
+from agents.telegram_streaming import stream_to_chat
+from agents.datetime_parser import extract_reminder, parse_time
+from agents.document_service import document_service, QueueFullError
+from agents.evaluation_grader import grade_evaluation, format_breakdown, build_feedback_prompt
+from agents.job_scheduler import job_scheduler
+from agents.chat_update_processor import PerChatUpdateProcessor
+from agents.evaluation_prefetch import evaluation_prefetcher, guess_study_topic, remember_document
 
 # --- Konfigurasi Awal ---
 logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
@@ -40,19 +48,34 @@ WEB_APP_URL = os.getenv("WEB_APP_URL", "https://example.com")
 TARGET_CHANNEL_ID = int(os.getenv("TELEGRAM_CHANNEL_ID", 0))
 PROJECT_ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 FOCUS_MODE_FILE = os.path.join(PROJECT_ROOT_DIR, 'focus_mode.json')
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
 
 
-def call_gemini_for_plan(prompt: str) -> str:
-    """Mengirim prompt ke Gemini dan mengembalikan respons teksnya."""
-    if not GEMINI_API_KEY:
+def call_gemini_for_plan(prompt: str, call_site: str = 'plan') -> str:
+    """Mengirim prompt ke Gemini dan mengembalikan respons teksnya (lewat cache respons LLM)."""
+    if not gemini_client.available:
         return "Error: GEMINI_API_KEY tidak diatur di file .env"
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
-        response = model.generate_content(prompt, safety_settings={'HARM_CATEGORY_HARASSMENT':'BLOCK_NONE'})
-        return response.text
+        response_text = gemini_client.generate_sync(
+            prompt, call_site=call_site, safety_settings={'HARM_CATEGORY_HARASSMENT':'BLOCK_NONE'}
+        )
+        if not response_text:
+            raise ValueError("API Gemini tidak memberikan hasil.")
+        return response_text
+    except Exception as e:
+        logger.error(f"Error saat memanggil Gemini API: {e}")
+        return f"Maaf, terjadi kesalahan saat berkomunikasi dengan AI: {e}"
+
+async def acall_gemini_for_plan(prompt: str, call_site: str = 'plan') -> str:
+    """Versi async call_gemini_for_plan untuk handler bot."""
+    if not gemini_client.available:
+        return "Error: GEMINI_API_KEY tidak diatur di file .env"
+    try:
+        response_text = await gemini_client.generate(
+            prompt, call_site=call_site, safety_settings={'HARM_CATEGORY_HARASSMENT':'BLOCK_NONE'}
+        )
+        if not response_text:
+            raise ValueError("API Gemini tidak memberikan hasil.")
+        return response_text
     except Exception as e:
         logger.error(f"Error saat memanggil Gemini API: {e}")
         return f"Maaf, terjadi kesalahan saat berkomunikasi dengan AI: {e}"
@@ -153,16 +176,23 @@ async def send_long_message(context: ContextTypes.DEFAULT_TYPE, chat_id: int, te
         await asyncio.sleep(1) 
 
 async def start_focus_mode(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Mengirim sinyal dan mengaktifkan status blokir."""
+    """Mengirim sinyal, mengaktifkan status blokir, dan mulai menyiapkan evaluasi di latar belakang."""
     
     if TARGET_CHANNEL_ID != 0:
         await context.bot.send_message(chat_id=TARGET_CHANNEL_ID, text="START_FOCUS")
         print("Sinyal START_FOCUS telah dikirim ke jembatan.")
     
     set_focus_mode_status(True)
+
+    # "/fokus jaringan komputer" -> topik eksplisit; tanpa argumen, tebak dari dokumen terakhir.
+    context.chat_data['focus_topic'] = " ".join(context.args or []).strip() or None
+    study_topic = guess_study_topic(context.chat_data)
+    if study_topic:
+        evaluation_prefetcher.prefetch(study_topic)
     
     await update.message.reply_text(
-        "🚀 Mode Fokus"
+        "🚀 Mode Fokus" + (f"\n\nTopik belajar: *{study_topic}*" if study_topic else ""),
+        parse_mode="Markdown"
     )
 
 async def stop_focus_mode(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -171,10 +201,20 @@ async def stop_focus_mode(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await context.bot.send_message(chat_id=TARGET_CHANNEL_ID, text="STOP_FOCUS")
         print("Sinyal STOP_FOCUS telah dikirim ke jembatan.")
     set_focus_mode_status(False)
-    
+
+    focus_topic = context.chat_data.pop('focus_topic', None)
+    if focus_topic:
+        # Topik sudah disebut saat /fokus: paketnya (mungkin) sudah siap, langsung mulai.
+        await update.message.reply_text(f"✅ Mode Fokus telah dihentikan.\n\nSaatnya menguji pemahaman Anda tentang *{focus_topic}*!", parse_mode="Markdown")
+        package_future = evaluation_prefetcher.package_for(focus_topic)
+        return await schedule_evaluation(update, context, focus_topic, package_future)
+
+    guessed_topic = guess_study_topic(context.chat_data)
+    reply_markup = ReplyKeyboardMarkup([[guessed_topic]], one_time_keyboard=True, resize_keyboard=True) if guessed_topic else None
     await update.message.reply_text(
         "✅ Mode Fokus telah dihentikan.\n\n"
-        "Untuk menguji pemahaman Anda, materi apa yang baru saja dipelajari?"
+        "Untuk menguji pemahaman Anda, materi apa yang baru saja dipelajari?",
+        reply_markup=reply_markup
     )
     
     return GET_STUDY_TOPIC
@@ -192,10 +232,32 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     return ConversationHandler.END
 
 async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    await update.message.reply_text("Tindakan dibatalkan.", reply_markup=ReplyKeyboardRemove())
+    stopped_documents, abandoned_documents = document_service.cancel(update.effective_user.id)
+    cancelled = stopped_documents + job_scheduler.cancel(update.effective_user.id)
+    message = "Tindakan dibatalkan." + (f" {cancelled} pekerjaan latar belakang dihentikan." if cancelled else "")
+    if abandoned_documents:
+        # Dokumen yang sudah diproses worker tidak bisa dihentikan; hasilnya hanya tidak dikirim.
+        message += (f" {abandoned_documents} dokumen sudah terlanjur diproses: hasilnya tidak akan dikirim, "
+                    "tetapi pemrosesannya tetap berjalan sampai selesai.")
+    await update.message.reply_text(message, reply_markup=ReplyKeyboardRemove())
     context.user_data.clear()
     return ConversationHandler.END
 
+async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Menampilkan pekerjaan latar belakang milik pengguna beserta statusnya."""
+    owner = update.effective_user.id
+    lines = [job.describe() for job in job_scheduler.jobs_for(owner)]
+    pending_documents = document_service.pending_for(owner)
+    abandoned_documents = document_service.abandoned_for(owner)
+    if pending_documents - abandoned_documents:
+        lines.insert(0, f"📄 {pending_documents - abandoned_documents} dokumen sedang diproses")
+    if abandoned_documents:
+        lines.insert(0, f"🗑️ {abandoned_documents} dokumen dibatalkan, menunggu worker selesai")
+    if not lines:
+        await update.message.reply_text("Tidak ada pekerjaan yang sedang berjalan.")
+        return
+    await update.message.reply_text("📋 Pekerjaan Anda:\n\n" + "\n".join(lines))
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Mencatat semua error yang muncul dan menampilkannya di konsol."""
     logger.error("Exception while handling an update:", exc_info=context.error)
@@ -205,7 +267,11 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
         await update.message.reply_text("Maaf, terjadi kesalahan internal. Coba lagi nanti.")
 
 def extract_reminder_details_sync(text: str, current_time: str) -> dict:
-    """Fungsi sinkron untuk memanggil AI dan mengekstrak detail reminder."""
+    """Mengekstrak detail reminder; parser lokal dulu, AI hanya jika frasa waktunya tidak dikenali."""
+    local_details = extract_reminder(text, datetime.strptime(current_time, "%Y-%m-%d %H:%M"), require_time=True)
+    if local_details:
+        return local_details
+
     prompt = (
         f"Anda adalah AI ahli dalam mengekstrak informasi. Berdasarkan permintaan pengguna dan waktu saat ini ({current_time}), ekstrak 'judul acara' dan 'waktu deadline' dalam format YYYY-MM-DD HH:MM.\n"
         "Contoh:\n"
@@ -219,7 +285,7 @@ def extract_reminder_details_sync(text: str, current_time: str) -> dict:
         f"Teks: '{text}'\n"
         "Hasil:"
     )
-    response_text = call_gemini_for_plan(prompt)
+    response_text = call_gemini_for_plan(prompt, call_site='reminder')
     try:
         match = re.search(r'\{.*\}', response_text, re.DOTALL)
         if match:
@@ -228,8 +294,10 @@ def extract_reminder_details_sync(text: str, current_time: str) -> dict:
         return {"error": "AI tidak mengembalikan format yang benar."}
     return {"error": "Gagal mengekstrak detail dari permintaan Anda."}
 
-def generate_plan_from_text_sync(task_topic: str, deadline_str: str, file_content: str) -> str:
-    """Membuat rencana belajar yang realistis berdasarkan sisa waktu yang dihitung."""
+PLAN_EXPIRED_MESSAGE = "Waktu untuk tugas ini sudah habis. Tidak ada rencana yang bisa dibuat."
+
+def build_plan_prompt(task_topic: str, deadline_str: str, file_content: str, language: str = 'en'):
+    """Menyusun prompt rencana berdasarkan sisa waktu. Mengembalikan None jika deadline sudah lewat."""
     
     time_constraint_text = f"Selesaikan tugas sebelum deadline: {deadline_str}."
     try:
@@ -239,7 +307,7 @@ def generate_plan_from_text_sync(task_topic: str, deadline_str: str, file_conten
         days_remaining = time_remaining.days
 
         if time_remaining.total_seconds() <= 0:
-            return "Waktu untuk tugas ini sudah habis. Tidak ada rencana yang bisa dibuat."
+            return None
 
         if days_remaining < 1:
             hours_remaining = max(1, int(time_remaining.total_seconds() / 3600))
@@ -258,10 +326,25 @@ def generate_plan_from_text_sync(task_topic: str, deadline_str: str, file_conten
         f"**KENDALA WAKTU UTAMA:** {time_constraint_text}\n\n"
         f"**PERINTAH TEGAS:** Buat rencana yang SANGAT REALISTIS dan hanya menggunakan sisa waktu yang ada. JANGAN membuat rencana yang melebihi batas waktu yang telah ditentukan. Jika waktu sangat singkat (kurang dari sehari), pecah tugas menjadi blok-blok per jam yang bisa dikerjakan. Jika waktunya beberapa hari, buat rencana harian.\n"
         "JANGAN membuat estimasi waktu yang tidak masuk akal seperti '300 hari' jika deadlinenya besok.\n\n"
-        f"**Materi Tugas (untuk referensi):**\n---\n{file_content[:3000]}\n---\n\n"
+        f"**Materi Tugas (untuk referensi):**\n---\n{context_budget.build_context(file_content, 'plan', language, query=task_topic)}\n---\n\n"
         f"Sajikan rencana dalam format Markdown yang jelas dan terstruktur."
     )
-    return call_gemini_for_plan(prompt)
+    return prompt
+
+def generate_plan_from_text_sync(task_topic: str, deadline_str: str, file_content: str, language: str = 'en') -> str:
+    """Membuat rencana belajar yang realistis berdasarkan sisa waktu yang dihitung."""
+    prompt = build_plan_prompt(task_topic, deadline_str, file_content, language)
+    return call_gemini_for_plan(prompt) if prompt else PLAN_EXPIRED_MESSAGE
+
+async def stream_plan(context: ContextTypes.DEFAULT_TYPE, chat_id: int, task_topic: str, deadline_str: str, file_content: str, language: str = 'en') -> None:
+    """Seperti generate_plan_from_text_sync, tetapi rencana ditampilkan bertahap selama dibuat AI."""
+    prompt = build_plan_prompt(task_topic, deadline_str, file_content, language)
+    if not prompt:
+        await context.bot.send_message(chat_id=chat_id, text=PLAN_EXPIRED_MESSAGE)
+        return
+    chunks = gemini_client.stream(prompt, call_site='plan', safety_settings={'HARM_CATEGORY_HARASSMENT':'BLOCK_NONE'})
+    if not await stream_to_chat(context.bot, chat_id, chunks):
+        await context.bot.send_message(chat_id=chat_id, text="Maaf, AI tidak memberikan hasil. Silakan coba lagi.")
 
 async def handle_plan_decision(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Menangani pilihan pengguna dan membuat rencana secara non-blocking."""
@@ -284,12 +367,9 @@ async def handle_plan_decision(update: Update, context: ContextTypes.DEFAULT_TYP
         await query.edit_message_text(text="Baik! Saya akan buatkan rencana belajar 🧠")
         
         try:
-            loop = asyncio.get_running_loop()
-            plan_result = await loop.run_in_executor(
-                None, generate_plan_from_text_sync, deadline_str, file_path
-            )
-            
-            await send_long_message(context, query.message.chat_id, plan_result)
+            document_record = await document_service.submit(load_document, file_path, owner=update.effective_user.id)
+            task_title = context.user_data.get('task_title', 'Tugas Anda')
+            await stream_plan(context, query.message.chat_id, task_title, deadline_str, document_record['text'], document_record['language'])
 
         except Exception as e:
             logger.error(f"Gagal membuat rencana: {e}")
@@ -315,8 +395,7 @@ async def help_command_handler(update: Update, context: ContextTypes.DEFAULT_TYP
     
     try:
         current_time_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-        loop = asyncio.get_running_loop()
-        details = await loop.run_in_executor(None, extract_reminder_details_sync, user_input, current_time_str)
+        details = await run_blocking(extract_reminder_details_sync, user_input, current_time_str, pool='llm')
 
         if "error" in details:
             await update.message.reply_text(f"Maaf, saya kesulitan memahami: {details['error']}")
@@ -359,10 +438,7 @@ async def confirm_reminder_handler(update: Update, context: ContextTypes.DEFAULT
 
         await query.edit_message_text("Sip! Sedang membuat reminder di Google Calendar...")
         
-        loop = asyncio.get_running_loop()
-        result_message = await loop.run_in_executor(
-            None, create_calendar_event, details['title'], details['deadline']
-        )
+        result_message = await acreate_calendar_event(details['title'], details['deadline'])
         await query.edit_message_text(result_message)
     else:
         await query.edit_message_text("Oke, dibatalkan.")
@@ -372,91 +448,43 @@ async def confirm_reminder_handler(update: Update, context: ContextTypes.DEFAULT
 
 
 async def paper_command_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Menangani perintah /paper dengan mencari di arXiv DAN Semantic Scholar."""
+    """Menangani perintah /paper dengan mencari di semua sumber paper sekaligus."""
     if not context.args:
         await update.message.reply_text("Gunakan format: /paper [topik pencarian]")
         return
 
     query = " ".join(context.args)
-    await update.message.reply_text(f"🔎 Siap! Saya cari paper tentang '{query}' dari berbagai sumber...")
-
-    
-    hasil_arxiv = cari_paper_ilmiah(query, max_results=3)
-    hasil_ss = cari_paper_semantic_scholar(query, max_results=3)
-
-    
-    hasil_gabungan = hasil_ss + hasil_arxiv 
-
-    
-    hasil_bersih = [res for res in hasil_gabungan if not res.startswith("Gagal")]
-
-    if not hasil_bersih:
-        await update.message.reply_text(f"Maaf, setelah mencari di berbagai sumber, saya tidak menemukan paper yang cocok untuk topik '{query}'.")
-        return
-
-    
-    unique_results = []
-    seen_titles = set()
-    for res in hasil_bersih:
-        
-        title_line = res.split('\n')[0] 
-        if title_line not in seen_titles:
-            unique_results.append(res)
-            seen_titles.add(title_line)
-
-
-    full_message = f"📚 Berikut adalah hasil gabungan terbaik dari berbagai sumber untuk '{query}':\n\n"
-    full_message += "\n\n---\n\n".join(unique_results)
-    
-    await send_long_message(context, update.effective_chat.id, full_message)
+    await stream_paper_search(context.bot, update.effective_chat.id, query, max_results=3)
 
-def evaluation_generation_thread(update: Update, context: ContextTypes.DEFAULT_TYPE, topic: str, loop: asyncio.AbstractEventLoop):
-    """Fungsi di thread untuk mencari, membuat ringkasan, dan kuis evaluasi."""
+async def deliver_evaluation(update: Update, context: ContextTypes.DEFAULT_TYPE, topic: str, package_future):
+    """Menunggu paket evaluasi (hasil prefetch atau yang baru dibuat) lalu memulai sesinya."""
     chat_id = update.effective_chat.id
-    
     try:
-        prompt = (
-            f"Anda adalah seorang tutor ahli. Saya baru saja selesai mempelajari topik: '{topic}'.\n\n"
-            "Tugas Anda adalah membuat paket evaluasi komprehensif berdasarkan topik ini. Lakukan langkah-langkah berikut:\n\n"
-            "1.  **Lakukan Riset Mendalam**: Cari informasi yang akurat dan relevan tentang '{topic}'.\n"
-            "2.  **Buat Ringkasan Poin Kunci**: Sajikan 3-5 poin paling penting dari topik ini dalam format bullet point. Gunakan *teks tebal* untuk menyorot istilah kunci.\n"
-            "3.  **Buat Kuis Evaluasi**: Buat 5-7 pertanyaan yang beragam untuk menguji pemahaman. Campurkan jenis pertanyaan (misalnya, Pilihan Ganda, Benar/Salah, Esai Singkat).\n"
-            "4.  **Format Output**: Kembalikan seluruh output dalam format JSON yang ketat. Strukturnya harus seperti ini:\n"
-            "    ```json\n"
-            "    {{\n"
-            '        "topic": "{topic}",\n'
-            '        "summary": ["Poin kunci pertama...", "Poin kunci kedua..."],\n'
-            '        "quiz": [\n'
-            '            {{"question_number": 1, "type": "Pilihan Ganda", "question": "...", "options": ["A. Opsi 1", "B. Opsi 2"], "answer": "..."}},\n'
-            '            {{"question_number": 2, "type": "Benar/Salah", "question": "...", "answer": "Benar"}},\n'
-            '            {{"question_number": 3, "type": "Esai Singkat", "question": "...", "answer": "Jawaban ideal..."}}\n'
-            '        ]\n'
-            '    }}\n'
-            "    ```\n\n"
-            "Pastikan JSON yang Anda hasilkan valid."
-        )
-
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
-        response = model.generate_content(prompt)
-        
-        cleaned_json = re.search(r'```json\n(.*?)\n```', response.text, re.DOTALL)
-        if not cleaned_json:
-            raise ValueError("AI tidak mengembalikan format JSON yang valid.")
-        
-        eval_data = json.loads(cleaned_json.group(1))
+        # Paket bisa dipakai bersama pengguna lain; membatalkan pekerjaan ini tidak boleh membatalkannya.
+        eval_data = await asyncio.shield(asyncio.wrap_future(package_future))
 
         context.user_data['evaluation_data'] = eval_data
         context.user_data['current_question_index'] = 0
         context.user_data['user_answers'] = []
 
-        asyncio.run_coroutine_threadsafe(start_evaluation_session(update, context), loop)
+        await start_evaluation_session(update, context)
 
     except Exception as e:
         logger.error(f"Gagal membuat evaluasi untuk topik '{topic}': {e}")
-        asyncio.run_coroutine_threadsafe(
-            context.bot.send_message(chat_id=chat_id, text=f"Maaf, terjadi kesalahan saat membuat evaluasi: {e}"),
-            loop
+        await context.bot.send_message(chat_id=chat_id, text=f"Maaf, terjadi kesalahan saat membuat evaluasi: {e}")
+        raise
+
+async def schedule_evaluation(update: Update, context: ContextTypes.DEFAULT_TYPE, topic: str, package_future) -> int:
+    """Menjadwalkan deliver_evaluation di job scheduler dan mengembalikan state percakapan berikutnya."""
+    try:
+        job_scheduler.submit(
+            deliver_evaluation, update, context, topic, package_future,
+            owner=update.effective_user.id, name=f"Evaluasi '{topic}'"
         )
+    except QueueFullError:
+        await update.message.reply_text("⏳ Antrian sedang penuh, evaluasi tidak bisa dibuat sekarang. Silakan coba lagi nanti.")
+        return ConversationHandler.END
+    return ANSWERING_EVALUATION
 
 async def start_evaluation_session(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Memulai sesi evaluasi dengan mengirim ringkasan dan pertanyaan pertama."""
@@ -488,20 +516,20 @@ async def ask_next_question(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await context.bot.send_message(chat_id=update.effective_chat.id, text=question_text, parse_mode="Markdown", reply_markup=reply_markup)
 
 async def get_study_topic(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """Menerima topik dari pengguna dan memulai thread pembuatan evaluasi."""
-    topic = update.message.text
-    await update.message.reply_text(f"Baik! Saya akan membuat paket evaluasi untuk topik *'{topic}'*.\n\nMohon tunggu sebentar... 🧠", parse_mode="Markdown")
-    
-    
-    loop = asyncio.get_running_loop()
-    
-    
-    threading.Thread(
-        target=evaluation_generation_thread, 
-        args=(update, context, topic, loop) 
-    ).start()
-    
-    return ANSWERING_EVALUATION
+    """Menerima topik dari pengguna dan memulai evaluasi, memakai paket prefetch jika ada."""
+    topic = update.message.text.strip()
+    package_future = evaluation_prefetcher.package_for(topic)
+    if package_future is None:
+        await update.message.reply_text("Topiknya belum saya tangkap. Materi apa yang baru saja dipelajari?")
+        return GET_STUDY_TOPIC
+
+    if not package_future.done():
+        await update.message.reply_text(
+            f"Baik! Saya akan membuat paket evaluasi untuk topik *'{topic}'*.\n\nMohon tunggu sebentar... 🧠",
+            parse_mode="Markdown", reply_markup=ReplyKeyboardRemove()
+        )
+
+    return await schedule_evaluation(update, context, topic, package_future)
 
 async def handle_evaluation_answer(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Menangani jawaban dari pengguna dan lanjut ke pertanyaan berikutnya atau menyimpulkan."""
@@ -518,51 +546,40 @@ async def handle_evaluation_answer(update: Update, context: ContextTypes.DEFAULT
         return ANSWERING_EVALUATION
     else:
         await update.message.reply_text("Kuis selesai! Saya akan mengevaluasi jawaban Anda sekarang...", reply_markup=ReplyKeyboardRemove())
-        loop = asyncio.get_running_loop()
-        threading.Thread(
-            target=final_scoring_thread, 
-            args=(update, context, loop) 
-        ).start()
+        try:
+            job_scheduler.submit(final_scoring, update, context, owner=update.effective_user.id, name="Penilaian kuis")
+        except QueueFullError:
+            await update.message.reply_text("⏳ Antrian sedang penuh, penilaian tidak bisa dijalankan sekarang. Silakan coba lagi nanti.")
+            context.user_data.clear()
         
         return ConversationHandler.END
 
-def final_scoring_thread(update: Update, context: ContextTypes.DEFAULT_TYPE, loop: asyncio.AbstractEventLoop):
-    """Thread untuk menilai semua jawaban dan memberikan umpan balik akhir."""
+async def final_scoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Menilai semua jawaban; umpan balik akhir ditampilkan bertahap selama dibuat AI."""
     chat_id = update.effective_chat.id
     
     try:
         eval_data = context.user_data['evaluation_data']
         user_answers = context.user_data['user_answers']
         
-        prompt = (
-            f"Anda adalah seorang guru yang sedang menilai hasil kuis. Berikut adalah data kuis dan jawaban siswa:\n"
-            f"**Topik**: {eval_data['topic']}\n"
-            f"**Detail Kuis (Soal dan Jawaban Benar)**:\n{json.dumps(eval_data['quiz'], indent=2, ensure_ascii=False)}\n"
-            f"**Jawaban Siswa**:\n{json.dumps(user_answers, indent=2, ensure_ascii=False)}\n\n"
-            "Tugas Anda:\n"
-            "1.  **Beri Skor**: Hitung skor siswa. Beri 1 poin untuk setiap jawaban yang benar. Untuk esai, berikan penilaian subjektif (0, 0.5, atau 1) berdasarkan kedekatan dengan jawaban ideal.\n"
-            "2.  **Hitung Total**: Tampilkan skor akhir dalam format 'Skor: X/Y'.\n"
-            "3.  **Beri Umpan Balik**: Berdasarkan skor, berikan kesimpulan akhir yang membangun. Klasifikasikan pemahaman siswa menjadi salah satu dari tiga level:\n"
-            "    - **Sangat Baik (Skor > 80%)**: Puji pemahaman mereka.\n"
-            "    - **Cukup Baik (Skor 50-80%)**: Beri tahu apa yang sudah bagus dan sebutkan 1-2 area spesifik yang perlu diperkuat.\n"
-            "    - **Perlu Belajar Lagi (Skor < 50%)**: Beri semangat dan sarankan untuk mempelajari kembali materi, terutama pada konsep yang salah dijawab.\n"
-            "4.  **Sajikan Hasil**: Gabungkan semuanya dalam satu pesan yang jelas, terstruktur, dan gunakan Markdown."
-        )
+        # Skor dihitung lokal (esai dinilai sekaligus); AI hanya menulis umpan balik.
+        result = await run_blocking(grade_evaluation, eval_data, user_answers, pool='llm')
+        breakdown = format_breakdown(result)
+        try:
+            await context.bot.send_message(chat_id=chat_id, text=breakdown, parse_mode="Markdown")
+        except telegram.error.BadRequest:
+            # Jawaban pengguna/kunci bisa berisi karakter yang merusak Markdown.
+            await context.bot.send_message(chat_id=chat_id, text=breakdown)
 
-        model = genai.GenerativeModel('gemini-1.5-flash-latest')
-        response = model.generate_content(prompt)
-        final_feedback = response.text
+        prompt = build_feedback_prompt(result)
 
-        asyncio.run_coroutine_threadsafe(
-            context.bot.send_message(chat_id=chat_id, text=final_feedback, parse_mode="Markdown"),
-            loop
-        )
+        final_feedback = await stream_to_chat(context.bot, chat_id, gemini_client.stream(prompt, call_site='final_scoring'))
+        if not final_feedback:
+            raise ValueError("API Gemini tidak memberikan hasil.")
     except Exception as e:
         logger.error(f"Gagal melakukan penilaian akhir: {e}")
-        asyncio.run_coroutine_threadsafe(
-            context.bot.send_message(chat_id=chat_id, text=f"Maaf, terjadi kesalahan saat menilai jawaban Anda: {e}"),
-            loop
-        )
+        await context.bot.send_message(chat_id=chat_id, text=f"Maaf, terjadi kesalahan saat menilai jawaban Anda: {e}")
+        raise
     finally:
         context.user_data.clear()
 
@@ -583,6 +600,7 @@ async def file_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     input_files_dir = os.path.join(PROJECT_ROOT_DIR, 'input_files')
     os.makedirs(input_files_dir, exist_ok=True)
     file_path = os.path.join(input_files_dir, document.file_name)
+    remember_document(context.chat_data, document.file_name)
 
     try:
         await file.download_to_drive(file_path)
@@ -592,8 +610,6 @@ async def file_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         return
 
     try:
-        loop = asyncio.get_running_loop()
-        
         if is_task_file_for_planning:
             await update.message.reply_text("File tugas diterima! Membuat rencana kerja untuk Anda, mohon tunggu...")
             
@@ -601,23 +617,19 @@ async def file_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
             task_topic = task_details.get('topic', 'Tugas Anda')
             deadline = task_details.get('deadline', 'segera')
             
-            file_content = ""
-            if file_path.endswith('.pdf'):
-                file_content = extract_text_from_pdf(file_path)
-            elif file_path.endswith('.docx'):
-                file_content = extract_text_from_docx(file_path)
+            document_record = await document_service.submit(load_document, file_path, owner=update.effective_user.id)
+            file_content = document_record['text']
 
             if file_content:
-                plan = await loop.run_in_executor(None, generate_plan_from_text_sync, task_topic, deadline, file_content)
                 await update.message.reply_text("✨ *Berikut adalah rencana kerja yang saya sarankan untuk tugas Anda:*")
-                await send_long_message(context, update.effective_chat.id, plan)
+                await stream_plan(context, update.effective_chat.id, task_topic, deadline, file_content, document_record['language'])
             else:
                 await update.message.reply_text("Gagal membaca konten file untuk dapat membuat rencana.")
 
         else:
             await update.message.reply_text("Menerima file, sedang memprosesnya untuk diringkas & disorot...")
             
-            summary_path, highlighted_path = await loop.run_in_executor(None, process_file, file_path)
+            summary_path, highlighted_path = await document_service.submit(process_file, file_path, owner=update.effective_user.id)
             
             if summary_path and os.path.exists(summary_path):
                 with open(summary_path, 'rb') as f:
@@ -627,11 +639,17 @@ async def file_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
                  with open(highlighted_path, 'rb') as f:
                     await update.message.reply_document(document=f, caption="Ini dokumen asli dengan bagian penting yang telah disorot.")
 
+    except QueueFullError:
+        await update.message.reply_text("⏳ Antrian pemrosesan dokumen sedang penuh. Silakan kirim ulang file Anda beberapa saat lagi.")
+    except asyncio.TimeoutError:
+        await update.message.reply_text("⌛ Pemrosesan file melebihi batas waktu. Coba kirim dokumen yang lebih kecil atau coba lagi nanti.")
+    except asyncio.CancelledError:
+        logger.info(f"Pemrosesan file '{document.file_name}' dibatalkan oleh pengguna.")
     except Exception as e:
         logger.error(f"Gagal memproses file: {e}")
         await update.message.reply_text(f"Maaf, terjadi kesalahan saat memproses file: {e}")
-    finally:a
-    context.user_data.clear()
+    finally:
+        context.user_data.clear()
 
 async def handle_task_title(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Menerima judul tugas dari pengguna dan meminta deadline."""
@@ -742,16 +760,19 @@ async def handle_reminder_time(update: Update, context: ContextTypes.DEFAULT_TYP
 
     final_deadline_str = f"{pending_reminder['date']} {user_time_text}"
 
-    prompt = (
-        f"Validasi dan format ulang teks berikut menjadi format YYYY-MM-DD HH:MM yang ketat. Waktu saat ini adalah {datetime.now().strftime('%Y-%m-%d %H:%M')} untuk referensi.\n"
-        f"Teks Input: '{final_deadline_str}'\n\n"
-        "Contoh:\n"
-        "Input: '2025-08-31 jam 5 sore' -> Hasil: '2025-08-31 17:00'\n"
-        "Input: '2025-09-01 9 pagi' -> Hasil: '2025-09-01 09:00'\n"
-        "Hasil:"
-    )
-    
-    cleaned_deadline = call_gemini_for_plan(prompt).strip().replace("'", "")
+    parsed_time = parse_time(user_time_text)
+    if parsed_time:
+        cleaned_deadline = f"{pending_reminder['date']} {parsed_time.strftime('%H:%M')}"
+    else:
+        prompt = (
+            f"Validasi dan format ulang teks berikut menjadi format YYYY-MM-DD HH:MM yang ketat. Waktu saat ini adalah {datetime.now().strftime('%Y-%m-%d %H:%M')} untuk referensi.\n"
+            f"Teks Input: '{final_deadline_str}'\n\n"
+            "Contoh:\n"
+            "Input: '2025-08-31 jam 5 sore' -> Hasil: '2025-08-31 17:00'\n"
+            "Input: '2025-09-01 9 pagi' -> Hasil: '2025-09-01 09:00'\n"
+            "Hasil:"
+        )
+        cleaned_deadline = (await acall_gemini_for_plan(prompt, call_site='reminder')).strip().replace("'", "")
 
     try:
         datetime.strptime(cleaned_deadline, "%Y-%m-%d %H:%M")
@@ -759,7 +780,7 @@ async def handle_reminder_time(update: Update, context: ContextTypes.DEFAULT_TYP
         title = pending_reminder['title']
         is_assignment = pending_reminder.get('is_assignment', False)
 
-        result_message = create_calendar_event(title, cleaned_deadline)
+        result_message = await acreate_calendar_event(title, cleaned_deadline)
         await context.bot.send_message(
             chat_id=chat_id,
             text=f"✅ Siap! Reminder berhasil dibuat di kalender!\n\n{result_message}",
@@ -791,7 +812,12 @@ async def handle_natural_text(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_text = update.message.text
     chat_id = update.effective_chat.id
     
-    classification = classify_intent(user_text)
+    if context.user_data.get('next_step') == 'get_reminder_details':
+        # Jawaban atas "mau diingatkan tentang apa?": seluruh pesan adalah isi reminder.
+        context.user_data.pop('next_step', None)
+        classification = {"intent": "create_reminder", "details": clean_reminder_details(user_text)}
+    else:
+        classification = await aclassify_intent(user_text)
     intent = classification.get("intent")
     
     if intent == "create_task_plan":
@@ -808,12 +834,17 @@ async def handle_natural_text(update: Update, context: ContextTypes.DEFAULT_TYPE
     elif intent == "create_reminder":
         details_text = classification.get("details")
         if not details_text:
-            await update.message.reply_text("Maaf, saya tidak bisa memahami detail reminder Anda.")
+            context.user_data['next_step'] = 'get_reminder_details'
+            await update.message.reply_text(
+                "Mau saya ingatkan tentang apa? Sebutkan acara dan waktunya, misalnya 'rapat besok jam 3 sore'."
+            )
             return
 
         await update.message.reply_text("Oke, saya coba proses permintaan reminder Anda...")
         is_assignment = 'tugas' in details_text.lower() or 'pr' in details_text.lower()
 
+        details = extract_reminder(details_text)
+        response_text = None
         current_time_str = datetime.now().strftime("%Y-%m-%d %H:%M")
         prompt = (
             f"Anda adalah AI ahli dalam mengekstrak informasi waktu. Ubah permintaan pengguna menjadi JSON. Gunakan waktu saat ini sebagai referensi.\n"
@@ -829,13 +860,14 @@ async def handle_natural_text(update: Update, context: ContextTypes.DEFAULT_TYPE
             "Hasil:"
         )
         
-        response_text = call_gemini_for_plan(prompt)
         try:
-            match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if not match:
-                raise ValueError("AI tidak mengembalikan format JSON yang valid.")
+            if details is None:
+                response_text = await acall_gemini_for_plan(prompt, call_site='reminder')
+                match = re.search(r'\{.*\}', response_text, re.DOTALL)
+                if not match:
+                    raise ValueError("AI tidak mengembalikan format JSON yang valid.")
+                details = json.loads(match.group(0))
 
-            details = json.loads(match.group(0))
             title = details.get("title")
             deadline = details.get("deadline")
 
@@ -855,7 +887,7 @@ async def handle_natural_text(update: Update, context: ContextTypes.DEFAULT_TYPE
                 await update.message.reply_text(f"Oke, saya catat untuk '{title}' pada tanggal {human_date}.\n\nJam berapa tepatnya?")
                 return
             
-            result_message = create_calendar_event(title, deadline)
+            result_message = await acreate_calendar_event(title, deadline)
             await update.message.reply_text(
                 f"✅ Reminder berhasil dibuat di kalender!\n\n{result_message}", 
                 parse_mode="Markdown"
@@ -877,21 +909,7 @@ async def handle_natural_text(update: Update, context: ContextTypes.DEFAULT_TYPE
     elif intent == "find_paper":
         topic = classification.get("topic")
         if topic:
-            await update.message.reply_text(f"🔎 Siap! Saya cari paper tentang '{topic}'...")
-            hasil_arxiv = cari_paper_ilmiah(topic, max_results=2)
-            hasil_ss = cari_paper_semantic_scholar(topic, max_results=2)
-            
-            hasil_gabungan = hasil_ss + hasil_arxiv
-            hasil_bersih = [res for res in hasil_gabungan if not res.startswith("Gagal")]
-
-            if not hasil_bersih:
-                await update.message.reply_text(f"Maaf, saya tidak menemukan paper yang cocok untuk topik '{topic}'.")
-                return
-            
-            unique_results = list(dict.fromkeys(hasil_bersih))
-            full_message = f"📚 Berikut adalah hasil pencarian untuk '{topic}':\n\n"
-            full_message += "\n\n---\n\n".join(unique_results)
-            await send_long_message(context, chat_id, full_message)
+            await stream_paper_search(context.bot, chat_id, topic, max_results=2)
         else:
             await update.message.reply_text("Saya mengerti Anda ingin mencari paper, tapi bisa sebutkan topiknya?")
 
@@ -918,6 +936,8 @@ def run_bot():
         .token(TELEGRAM_BOT_TOKEN)
         .persistence(persistence)
         .request(request)
+        # Chat berbeda diproses bersamaan; dalam satu chat berurutan agar state percakapan konsisten.
+        .concurrent_updates(PerChatUpdateProcessor())
         .build()
     )
 
@@ -953,12 +973,25 @@ def run_bot():
     application.add_handler(CommandHandler("start", start_command))
     application.add_handler(CommandHandler("fokus", start_focus_mode))
     application.add_handler(CommandHandler("paper", paper_command_handler))
+    application.add_handler(CommandHandler("status", status_command))
     application.add_handler(evaluation_conv_handler)
     application.add_handler(file_conv_handler) 
+    # /batal di luar percakapan tetap menghentikan pekerjaan latar belakang.
+    application.add_handler(CommandHandler("batal", cancel_command))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_natural_text))
 
+    # Worker dokumen dinyalakan di latar belakang selagi bot mulai mendengarkan.
+    document_service.start()
+
     logger.info("🤖 Bot Telegram sedang mendengarkan...")
-    application.run_polling()
+    try:
+        application.run_polling()
+    finally:
+        document_service.shutdown()
+        evaluation_prefetcher.shutdown()
+        agent_executor.shutdown()
+        http_client.close()
+        job_scheduler.shutdown()
 
 if __name__ == '__main__':
     run_bot()
\ No newline at end of file
@@ -0,0 +1,98 @@
+import os
+import time
+import asyncio
+import logging
+import telegram
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+# Telegram membatasi edit pesan (~1 per detik per chat); jangan mengedit lebih sering dari ini.
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.5"))
+STREAM_CURSOR = " ▌"
+
+
+def _split_point(text: str, limit: int) -> int:
+    """Posisi potong terbaik sebelum `limit`: baris baru, lalu spasi, lalu potong paksa."""
+    for separator in ("\n", " "):
+        cut = text.rfind(separator, 0, limit)
+        if cut > limit // 2:
+            return cut + 1
+    return limit
+
+
+class StreamingMessage:
+    """
+    Satu pesan Telegram yang isinya diperbarui bertahap dengan edit_message_text.
+    Edit dibatasi per STREAM_EDIT_INTERVAL; teks yang melewati 4096 karakter
+    dipindahkan ke pesan baru. Selama streaming teks dikirim polos, Markdown
+    baru dipakai di edit terakhir karena potongan Markdown sering tidak valid.
+    """
+
+    def __init__(self, bot, chat_id: int, interval: float = None, limit: int = TELEGRAM_MESSAGE_LIMIT):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.interval = STREAM_EDIT_INTERVAL if interval is None else interval
+        self.limit = limit
+        self.text = ''
+        self._current = ''
+        self._shown = ''
+        self._message = None
+        self._next_edit = 0.0
+
+    async def _render(self, text: str, final: bool = False) -> None:
+        try:
+            if self._message is None:
+                self._message = await self.bot.send_message(chat_id=self.chat_id, text=text)
+                self._shown = text
+                if not final:
+                    return
+            if final:
+                try:
+                    await self._message.edit_text(text, parse_mode="Markdown")
+                except telegram.error.BadRequest:
+                    await self._message.edit_text(text)
+            elif text != self._shown:
+                await self._message.edit_text(text)
+            self._shown = text
+        except telegram.error.RetryAfter as e:
+            if not final:
+                self._next_edit = time.monotonic() + e.retry_after
+                return
+            await asyncio.sleep(e.retry_after)
+            await self._render(text, final=True)
+        except telegram.error.BadRequest as e:
+            # "Message is not modified" dan sejenisnya tidak perlu menghentikan streaming.
+            logger.debug(f"Streaming: Edit pesan dilewati - {e}")
+
+    async def append(self, chunk: str) -> None:
+        self.text += chunk
+        self._current += chunk
+        # Sisakan ruang untuk kursor agar teks yang dirender tidak pernah melewati batas Telegram.
+        room = self.limit - len(STREAM_CURSOR)
+        while len(self._current) > room:
+            cut = _split_point(self._current, room)
+            await self._render(self._current[:cut], final=True)
+            self._current = self._current[cut:]
+            self._message = None
+        if time.monotonic() >= self._next_edit:
+            self._next_edit = time.monotonic() + self.interval
+            await self._render(self._current + STREAM_CURSOR)
+
+    async def finish(self) -> str:
+        if self._current:
+            await self._render(self._current, final=True)
+        return self.text
+
+
+async def stream_to_chat(bot, chat_id: int, chunks, interval: float = None) -> str:
+    """Mengalirkan potongan teks dari async iterator `chunks` ke chat. Mengembalikan teks lengkapnya."""
+    message = StreamingMessage(bot, chat_id, interval)
+    try:
+        async for chunk in chunks:
+            await message.append(chunk)
+    except Exception:
+        # Tinggalkan teks yang sudah diterima tanpa kursor sebelum meneruskan error.
+        await message.finish()
+        raise
+    return await message.finish()
@@ -12,6 +12,7 @@ from pytube import Search
 from telethon import TelegramClient, events
 from dotenv import load_dotenv
 from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
+from agents import http_client
 
 load_dotenv()
 
@@ -159,13 +160,13 @@ def control_hosts_file(action: str):
             except Exception as rec_e:
                 print(f"  -> [FATAL] Gagal memulihkan hosts dari backup: {rec_e}")
 
-def get_current_weather(api_key, city):
+async def get_current_weather(api_key, city):
     if not api_key or not city: return None
     base_url = "http://api.openweathermap.org/data/2.5/weather"
     params = {"q": city, "appid": api_key, "units": "metric"}
     try:
         print(f"Mengambil data cuaca untuk {city}...")
-        response = requests.get(base_url, params=params)
+        response = await http_client.aget(base_url, params=params)
         response.raise_for_status()
         data = response.json()
         weather_condition = data['weather'][0]['main']
@@ -259,7 +260,7 @@ async def main():
                 control_firewall_rules("CREATE")
                 control_hosts_file("BLOCK")
                 control_app_volumes("MUTE_OTHERS")
-                weather = get_current_weather(OPENWEATHER_API_KEY, CITY_NAME)
+                weather = await get_current_weather(OPENWEATHER_API_KEY, CITY_NAME)
                 play_youtube_by_weather(weather)
                 print("-> Aksi FOKUS AKTIF selesai.")
                 
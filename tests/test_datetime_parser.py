@@ -0,0 +1,96 @@
+from datetime import datetime
+
+import pytest
+
+from agents.datetime_parser import extract_reminder, parse_datetime, parse_time
+
+# Rabu, 20 Agustus 2025 pukul 10.00.
+NOW = datetime(2025, 8, 20, 10, 0)
+
+
+def _deadline(text: str):
+    parsed = parse_datetime(text, NOW)
+    if parsed is None:
+        return None
+    if parsed.time is None:
+        return parsed.date.strftime("%Y-%m-%d")
+    return datetime.combine(parsed.date, parsed.time).strftime("%Y-%m-%d %H:%M")
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Hari relatif
+    ("besok jam 7 malam", "2025-08-21 19:00"),
+    ("besok jam 5 sore", "2025-08-21 17:00"),
+    ("besok jam 12 malam", "2025-08-22 00:00"),
+    ("lusa pagi", "2025-08-22 08:00"),
+    ("hari ini jam 14:30", "2025-08-20 14:30"),
+    ("nanti malam", "2025-08-20 19:00"),
+    ("nanti sore", "2025-08-20 16:00"),
+    ("jumat pagi", "2025-08-22 08:00"),
+    ("tomorrow morning", "2025-08-21 08:00"),
+    ("3 hari lagi", "2025-08-23"),
+    ("dalam 2 minggu", "2025-09-03"),
+    ("2 jam lagi", "2025-08-20 12:00"),
+    ("minggu depan", "2025-08-27"),
+    ("bulan depan", "2025-09-20"),
+    ("tomorrow at 9am", "2025-08-21 09:00"),
+    # Hanya jam: waktu terdekat yang belum lewat
+    ("jam 9 pagi", "2025-08-21 09:00"),
+    ("jam 11", "2025-08-20 11:00"),
+    # Nama hari
+    ("Jumat ini 23:59", "2025-08-22 23:59"),
+    ("senin depan", "2025-08-25"),
+    ("rabu", "2025-08-27"),
+    ("rabu jam 3 sore", "2025-08-20 15:00"),
+    ("next friday at 5 pm", "2025-08-29 17:00"),
+    # Tanggal dengan nama bulan dan format angka
+    ("31 Agustus 2025 14.30", "2025-08-31 14:30"),
+    ("tanggal 5 September", "2025-09-05"),
+    ("5 Januari", "2026-01-05"),
+    ("August 25th", "2025-08-25"),
+    ("tanggal 10", "2025-09-10"),
+    ("25/12", "2025-12-25"),
+    ("2025-09-01", "2025-09-01"),
+])
+def test_parse_datetime(text, expected):
+    assert _deadline(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "kerjakan tugas 2 secepatnya",
+    "nanti kabari ya",
+    "deadline-nya kapan?",
+    "revisi bab 3",
+    "makan malam bersama keluarga",
+])
+def test_ambiguous_phrases_are_not_parsed(text):
+    # Tanpa tanggal/jam yang jelas, pemanggil harus jatuh ke Gemini.
+    assert parse_datetime(text, NOW) is None
+
+
+def test_extract_reminder():
+    assert extract_reminder("ingatkan aku kumpul laporan besok jam 7 malam", NOW) == {
+        "title": "Kumpul laporan", "deadline": "2025-08-21 19:00",
+    }
+
+
+@pytest.mark.parametrize("text", [
+    "ingatkan aku kumpul laporan besok",   # jam wajib tapi tidak disebut
+    "ingatkan aku kumpul laporan secepatnya",
+    "besok jam 7 malam",                   # tidak ada judul acara
+    "ingatkan aku makan malam bersama keluarga besok",  # "malam" bagian nama acara, bukan jam
+])
+def test_extract_reminder_falls_back(text):
+    assert extract_reminder(text, NOW, require_time=True) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("jam 5 sore", "17:00"),
+    ("14:30", "14:30"),
+    ("9 pagi", "09:00"),
+    ("malam", "19:00"),
+    ("terserah", None),
+])
+def test_parse_time(text, expected):
+    parsed = parse_time(text)
+    assert (parsed.strftime("%H:%M") if parsed else None) == expected
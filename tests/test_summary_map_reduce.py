@@ -0,0 +1,95 @@
+import os
+import random
+import threading
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("google.generativeai")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from agents import context_budget, document_cache, llm_cache  # noqa: E402
+from agents import summarizer_highlighter as sh  # noqa: E402
+
+WORDS = "data metode hasil analisis responden sampel variabel temuan model uji nilai kelompok".split()
+
+
+class StubModel:
+    """Pengganti model Gemini: mencatat prompt dan menjawab tanpa jaringan."""
+
+    model_name = 'stub'
+
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+            self.parts = [text]
+
+    def __init__(self):
+        self.map_prompts = []
+        self.reduce_prompts = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            if "--- RINGKASAN PER BAGIAN ---" in prompt:
+                self.reduce_prompts.append(prompt)
+                return self._Response("RINGKASAN AKHIR")
+            self.map_prompts.append(prompt)
+            return self._Response(f"ringkasan-parsial-{len(self.map_prompts)}-{hash(prompt) & 0xffff:x}")
+
+    def map_outputs(self):
+        return [f"ringkasan-parsial-{i + 1}-{hash(prompt) & 0xffff:x}" for i, prompt in enumerate(self.map_prompts)]
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    # Hanya cache ringkasan potongan (chunk-<sha>) yang diuji; cache respons LLM dimatikan.
+    monkeypatch.setattr(document_cache, 'CACHE_DIR', str(tmp_path / 'documents'))
+    monkeypatch.setattr(llm_cache, 'LLM_CACHE_ENABLED', False)
+    monkeypatch.setattr(context_budget, 'budget_for', lambda call_site: 500)
+    monkeypatch.setattr(sh, 'SUMMARY_CHUNK_CHARS', 6000)
+    # Halaman hampir tidak pernah menutup potongan lewat hash-nya, jadi hampir semua batas
+    # adalah potongan paksa karena max_chars: yang diuji adalah pemilihan potongan paksa.
+    monkeypatch.setattr(sh, 'SUMMARY_PAGES_PER_CHUNK', 10 ** 6)
+
+
+def _pages(count=40, seed=7):
+    rng = random.Random(seed)
+    return [
+        f"Halaman {number}. " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(200, 220))) + "\n"
+        for number in range(count)
+    ]
+
+
+def test_map_reduce_summarizes_every_chunk_and_reduces_their_outputs():
+    pages = _pages()
+    text = "".join(pages)
+    expected_chunks = sh.split_into_summary_chunks(text, pages)
+    assert len(expected_chunks) > 2
+
+    model = StubModel()
+    summary = sh.summarize_with_ai_model(text, 'id', pages=pages, model=model)
+
+    assert summary == "RINGKASAN AKHIR"
+    assert len(model.map_prompts) == len(expected_chunks)
+    assert len(model.reduce_prompts) == 1
+    for output in model.map_outputs():
+        assert output in model.reduce_prompts[0]
+
+
+def test_unchanged_chunks_are_served_from_chunk_cache_after_an_edit():
+    pages = _pages()
+    sh.summarize_with_ai_model("".join(pages), 'id', pages=pages, model=StubModel())
+    before = sh.split_into_summary_chunks("".join(pages), pages)
+
+    edited = list(pages)
+    edited[2] = edited[2].rstrip("\n") + " Paragraf tambahan hasil revisi pembimbing." * 20 + "\n"
+    after = sh.split_into_summary_chunks("".join(edited), edited)
+    changed = [chunk for chunk in after if chunk not in before]
+    assert 0 < len(changed) <= 2 < len(after)
+
+    model = StubModel()
+    assert sh.summarize_with_ai_model("".join(edited), 'id', pages=edited, model=model) == "RINGKASAN AKHIR"
+    # Hanya potongan yang isinya berubah yang diringkas ulang; sisanya dari chunk-<sha>.
+    assert len(model.map_prompts) == len(changed)
+    assert all(any(chunk in prompt for prompt in model.map_prompts) for chunk in changed)